@@ -0,0 +1,212 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Admission control of background requests. The consumer group lag and the Redis memory are
+read by a snapshot refreshed in the background at most every ASYNC_REQUEST_ADMISSION_REFRESH_SEC,
+so a request only compares cached numbers; the Kafka clients of the lag reads are kept by the
+snapshot and reused. The in-flight tasks of a channel are counted in Redis.
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import AsyncExitStack
+
+from django.conf import settings
+
+from aiokafka import AIOKafkaConsumer
+from aiokafka.admin import AIOKafkaAdminClient
+
+from bazis.contrib.async_background.utils import get_redis_async
+from bazis.contrib.ws.utils import drop_closed_loops
+
+from .lanes import get_lane_topics
+
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_TASKS_KEY_PREFIX = "async_request:channel_tasks:"
+
+OVERLOAD_LAG = "lag"
+OVERLOAD_REDIS_MEMORY = "redis_memory"
+OVERLOAD_CHANNEL_QUOTA = "channel_quota"
+
+
+def get_consumed_topics() -> set[str]:
+    return {topic for topics in get_lane_topics().values() for topic in topics}
+
+
+async def get_consumer_lag(admin: AIOKafkaAdminClient, consumer: AIOKafkaConsumer) -> int:
+    """The messages of the consumed topics the consumer group has not committed yet."""
+    topics = get_consumed_topics()
+    group_offsets = await admin.list_consumer_group_offsets(settings.KAFKA_GROUP_ID)
+    committed = {
+        partition: offset.offset
+        for partition, offset in group_offsets.items()
+        if partition.topic in topics and offset.offset >= 0
+    }
+    if not committed:
+        return 0
+    end_offsets = await consumer.end_offsets(list(committed))
+    return sum(max(end_offsets[partition] - offset, 0) for partition, offset in committed.items())
+
+
+async def get_redis_memory_ratio() -> float | None:
+    """The used share of the Redis maxmemory (None if Redis has no limit)."""
+    info = await get_redis_async().info("memory")
+    if not info.get("maxmemory"):
+        return None
+    return info["used_memory"] / info["maxmemory"]
+
+
+class AdmissionSnapshot:
+    """The cached load of an event loop; a stale snapshot is refreshed by a background task."""
+
+    def __init__(self) -> None:
+        self.lag: int | None = None
+        self.redis_memory_ratio: float | None = None
+        self.refreshed_at = float("-inf")
+        self.refreshing: asyncio.Task | None = None
+        # the Kafka clients of the lag reads, started by the first one
+        self.kafka_clients: AsyncExitStack | None = None
+        self.admin: AIOKafkaAdminClient | None = None
+        self.consumer: AIOKafkaConsumer | None = None
+
+    def overload(self) -> str | None:
+        """The reason to shed the request (OVERLOAD_*), or None."""
+        if time.monotonic() - self.refreshed_at > settings.ASYNC_REQUEST_ADMISSION_REFRESH_SEC:
+            if self.refreshing is None or self.refreshing.done():
+                self.refreshing = asyncio.create_task(self.refresh())
+        max_lag = settings.ASYNC_REQUEST_MAX_LAG
+        if max_lag is not None and self.lag is not None and self.lag > max_lag:
+            return OVERLOAD_LAG
+        max_ratio = settings.ASYNC_REQUEST_MAX_REDIS_MEMORY_RATIO
+        if (
+            max_ratio is not None
+            and self.redis_memory_ratio is not None
+            and self.redis_memory_ratio > max_ratio
+        ):
+            return OVERLOAD_REDIS_MEMORY
+        return None
+
+    async def start_kafka_clients(self) -> None:
+        async with AsyncExitStack() as stack:
+            admin = AIOKafkaAdminClient(
+                bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS,
+                request_timeout_ms=settings.KAFKA_ADMIN_TIMEOUT_MS,
+            )
+            await admin.start()
+            stack.push_async_callback(admin.close)
+            consumer = AIOKafkaConsumer(
+                bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS,
+                request_timeout_ms=settings.KAFKA_ADMIN_TIMEOUT_MS,
+            )
+            await consumer.start()
+            stack.push_async_callback(consumer.stop)
+            self.kafka_clients = stack.pop_all()
+        self.admin, self.consumer = admin, consumer
+
+    async def close_kafka_clients(self) -> None:
+        if self.kafka_clients is not None:
+            clients, self.kafka_clients = self.kafka_clients, None
+            self.admin = self.consumer = None
+            await clients.aclose()
+
+    async def close(self) -> None:
+        """Stops the refresh and the Kafka clients of the lag reads (e.g. before a shutdown)."""
+        if self.refreshing is not None and not self.refreshing.done():
+            self.refreshing.cancel()
+            await asyncio.gather(self.refreshing, return_exceptions=True)
+        await self.close_kafka_clients()
+
+    async def read_lag(self) -> int | None:
+        if not settings.KAFKA_GROUP_ID:
+            return None
+        if self.kafka_clients is None:
+            await self.start_kafka_clients()
+        return await get_consumer_lag(self.admin, self.consumer)
+
+    async def refresh(self) -> None:
+        # a failed read leaves the value unknown: the requests are admitted
+        self.refreshed_at = time.monotonic()
+        if settings.ASYNC_REQUEST_MAX_LAG is not None:
+            try:
+                self.lag = await self.read_lag()
+            except Exception:
+                logger.warning("Failed to read the consumer group lag.", exc_info=True)
+                self.lag = None
+                # the clients are reconnected by the next read
+                await self.close_kafka_clients()
+        if settings.ASYNC_REQUEST_MAX_REDIS_MEMORY_RATIO is not None:
+            try:
+                self.redis_memory_ratio = await get_redis_memory_ratio()
+            except Exception:
+                logger.warning("Failed to read the Redis memory.", exc_info=True)
+                self.redis_memory_ratio = None
+
+
+_snapshots_by_loop: dict[asyncio.AbstractEventLoop, AdmissionSnapshot] = {}
+
+
+def get_admission_snapshot() -> AdmissionSnapshot:
+    """Returns the admission snapshot of the running event loop."""
+    loop = asyncio.get_running_loop()
+    snapshot = _snapshots_by_loop.get(loop)
+    if snapshot is None:
+        drop_closed_loops(_snapshots_by_loop)
+        snapshot = _snapshots_by_loop[loop] = AdmissionSnapshot()
+    return snapshot
+
+
+async def close_admission_snapshot() -> None:
+    """Closes the admission snapshot of the running event loop, if there is one."""
+    snapshot = _snapshots_by_loop.pop(asyncio.get_running_loop(), None)
+    if snapshot is not None:
+        await snapshot.close()
+
+
+def channel_tasks_key(channel_name: str) -> str:
+    return f"{CHANNEL_TASKS_KEY_PREFIX}{channel_name}"
+
+
+# the tasks of the channel are a sorted set scored by their start: the tasks older than the
+# window (lost by a consumer) stop counting
+_ADMIT_CHANNEL_TASK = """
+redis.call("zremrangebyscore", KEYS[1], "-inf", ARGV[2] - ARGV[3])
+if redis.call("zcard", KEYS[1]) >= tonumber(ARGV[4]) then
+    return 0
+end
+redis.call("zadd", KEYS[1], ARGV[2], ARGV[1])
+redis.call("expire", KEYS[1], ARGV[3])
+return 1
+"""
+
+
+async def admit_channel_task(channel_name: str, task_id: str) -> bool:
+    """Counts the task in the in-flight tasks of the channel, False if the quota is used up."""
+    quota = settings.ASYNC_REQUEST_CHANNEL_QUOTA
+    if quota is None:
+        return True
+    window = settings.ASYNC_REQUEST_CHANNEL_QUOTA_WINDOW_SEC
+    admitted = await get_redis_async().eval(
+        _ADMIT_CHANNEL_TASK, 1, channel_tasks_key(channel_name), task_id, time.time(), window, quota
+    )
+    return bool(admitted)
+
+
+async def release_channel_task(channel_name: str, task_id: str) -> None:
+    """Drops the task from the in-flight tasks of the channel."""
+    if settings.ASYNC_REQUEST_CHANNEL_QUOTA is not None:
+        await get_redis_async().zrem(channel_tasks_key(channel_name), task_id)
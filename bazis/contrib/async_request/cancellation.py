@@ -0,0 +1,155 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Cancellation of background tasks. `DELETE /async_background_response/{task_id}/` marks the
+task cancelled in Redis: a consumer reads the marks of the tasks it checks concurrently with one
+MGET and does not execute the cancelled ones, and an endpoint that is already running learns
+about the cancellation through the TaskCancellation dependency.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Iterable
+
+from django.conf import settings
+
+from fastapi import Request
+
+from bazis.contrib.async_background.utils import get_redis_async
+from bazis.contrib.ws.utils import drop_closed_loops
+
+
+logger = logging.getLogger(__name__)
+
+CANCEL_KEY_PREFIX = "async_request:cancel:"
+
+#: the header of the internal request with the id of its task
+TASK_ID_HEADER = "x-async-task-id"
+
+#: the longest time a running endpoint may miss the cancellation of its task
+CHECK_INTERVAL_SEC = 1
+
+
+def cancel_key(task_id: str) -> str:
+    return f"{CANCEL_KEY_PREFIX}{task_id}"
+
+
+async def request_cancellation(task_id: str) -> None:
+    """Marks the task cancelled for as long as its status is kept."""
+    await get_redis_async().set(cancel_key(task_id), 1, ex=settings.KAFKA_RESPONSE_HOLD_SEC)
+
+
+async def cancelled_task_ids(task_ids: Iterable[str]) -> set[str]:
+    """The cancelled tasks among `task_ids` (one round trip for the batch)."""
+    task_ids = list(task_ids)
+    if not task_ids:
+        return set()
+    marks = await get_redis_async().mget([cancel_key(task_id) for task_id in task_ids])
+    return {task_id for task_id, mark in zip(task_ids, marks, strict=True) if mark is not None}
+
+
+class CancellationReader:
+    """
+    Reads the cancellation of the tasks checked since the last round trip to Redis in one
+    MGET: the tasks of a batch or of the ordered executor that start or finish together share
+    it.
+    """
+
+    def __init__(self) -> None:
+        self.pending: list[tuple[str, asyncio.Future]] = []
+        self.reader: asyncio.Task | None = None
+
+    async def is_cancelled(self, task_id: str) -> bool:
+        """Whether the task was cancelled (the errors of Redis are raised)."""
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((task_id, future))
+        if self.reader is None or self.reader.done():
+            self.reader = asyncio.create_task(self._read())
+        return await future
+
+    async def _read(self) -> None:
+        while self.pending:
+            checks, self.pending = self.pending, []
+            try:
+                cancelled = await cancelled_task_ids({task_id for task_id, _ in checks})
+            except Exception as err:
+                for _, future in checks:
+                    if not future.done():
+                        future.set_exception(err)
+            else:
+                for task_id, future in checks:
+                    if not future.done():
+                        future.set_result(task_id in cancelled)
+
+
+_readers_by_loop: dict[asyncio.AbstractEventLoop, CancellationReader] = {}
+
+
+async def is_cancelled(task_id: str) -> bool:
+    """
+    Whether the task was cancelled, read by the cancellation reader of the running loop. A
+    failed read is logged and counts as not cancelled: the task is not left without a status.
+    """
+    loop = asyncio.get_running_loop()
+    reader = _readers_by_loop.get(loop)
+    if reader is None:
+        drop_closed_loops(_readers_by_loop)
+        reader = _readers_by_loop[loop] = CancellationReader()
+    try:
+        return await reader.is_cancelled(task_id)
+    except Exception:
+        logger.exception("Failed to read the cancellation of task_id=%s", task_id)
+        return False
+
+
+class TaskCancelledError(Exception):
+    """The client cancelled the background task."""
+
+
+class TaskCancellation:
+    """
+    Dependency of an endpoint that lets a long background task stop when its client cancels it:
+
+        @router.post("/export/")
+        async def export(cancellation: TaskCancellation = Depends()):
+            for chunk in chunks:
+                await cancellation.raise_if_requested()
+                ...
+
+    A task cancelled while it runs ends with the cancelled status whether the endpoint stops
+    or not. Outside of a background task the cancellation is never requested.
+    """
+
+    def __init__(self, request: Request) -> None:
+        internal = request.headers.get("x-async-background-internal", "").lower() == "true"
+        self.task_id = request.headers.get(TASK_ID_HEADER) if internal else None
+        self._requested = False
+        self._checked_at: float | None = None
+
+    async def is_requested(self) -> bool:
+        """Whether the task was cancelled; Redis is read at most every CHECK_INTERVAL_SEC."""
+        if self.task_id is None or self._requested:
+            return self._requested
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= CHECK_INTERVAL_SEC:
+            self._checked_at = now
+            self._requested = bool(await cancelled_task_ids([self.task_id]))
+        return self._requested
+
+    async def raise_if_requested(self) -> None:
+        """Raises TaskCancelledError if the task was cancelled."""
+        if await self.is_requested():
+            raise TaskCancelledError(self.task_id)
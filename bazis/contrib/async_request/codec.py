@@ -0,0 +1,180 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Encoding of the Kafka messages of background requests.
+
+A message is either the JSON of KafkaTask (the format of bazis-async-background, and of the
+messages already in the topic) or a binary frame: WIRE_MAGIC, the version of the frame and
+the msgpack of KafkaTask, where the bytes of the body and headers are stored as they are.
+A message above ASYNC_REQUEST_COMPRESSION_THRESHOLD may be wrapped into a compressed frame:
+COMPRESSED_MAGIC, the algorithm and the compressed message of either format.
+The format is detected per message, so consumers read both while producers switch.
+"""
+
+import gzip
+import logging
+import zlib
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from bazis.contrib.async_background.schemas import KafkaTask
+
+from .schemas import AsyncRequestPayload
+
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    from compression import zstd  # Python 3.14
+except ImportError:
+    try:
+        import zstandard as zstd
+    except ImportError:
+        zstd = None
+
+
+logger = logging.getLogger(__name__)
+
+#: the errors of a corrupt compressed frame (zlib.error is not an OSError)
+DECOMPRESSION_ERRORS: tuple[type[Exception], ...] = (OSError, EOFError, ValueError, zlib.error)
+if zstd is not None:
+    DECOMPRESSION_ERRORS += (zstd.ZstdError,)
+
+
+WIRE_FORMAT_JSON = "json"
+WIRE_FORMAT_MSGPACK = "msgpack"
+
+#: JSON never starts with a zero byte
+WIRE_MAGIC = b"\x00BZR"
+WIRE_VERSION = 1
+
+COMPRESSED_MAGIC = b"\x00BZC"
+COMPRESSION_GZIP = 1
+COMPRESSION_ZSTD = 2
+
+
+#: Kafka headers of a message: a consumer reads them without decoding the message
+HEADER_TASK_ID = "x-async-task-id"
+HEADER_CHANNEL = "x-async-channel"
+HEADER_DEADLINE = "x-async-deadline"
+HEADER_INFLIGHT_KEY = "x-async-inflight-key"
+HEADER_BODY_REF = "x-async-body-ref"
+
+
+class WireFormatError(Exception):
+    """The message is not a background request in a known format."""
+
+
+def _require_msgpack():
+    if msgpack is None:
+        raise ImproperlyConfigured(
+            "The msgpack wire format requires msgpack: pip install bazis-async-request[msgpack]"
+        )
+    return msgpack
+
+
+def _zstd_decompress(data: bytes) -> bytes:
+    if zstd is None:
+        raise WireFormatError("The message is compressed with zstd: install the zstd extra")
+    return zstd.decompress(data)
+
+
+def compress(data: bytes, compression: str, level: int | None = None) -> bytes:
+    """Wraps an encoded message into a compressed frame."""
+    if compression == "zstd" and zstd is None:
+        logger.warning("zstd is not available, the message is compressed with gzip.")
+        compression = "gzip"
+    if compression == "zstd":
+        compressed = zstd.compress(data, level) if level is not None else zstd.compress(data)
+        return COMPRESSED_MAGIC + bytes((COMPRESSION_ZSTD,)) + compressed
+    if compression == "gzip":
+        compressed = gzip.compress(data, compresslevel=level if level is not None else 6, mtime=0)
+        return COMPRESSED_MAGIC + bytes((COMPRESSION_GZIP,)) + compressed
+    raise ImproperlyConfigured(f"Unknown compression: {compression}")
+
+
+def decompress(data: bytes) -> bytes:
+    """Unwraps a compressed frame."""
+    algorithm = data[len(COMPRESSED_MAGIC)] if len(data) > len(COMPRESSED_MAGIC) else None
+    compressed = data[len(COMPRESSED_MAGIC) + 1 :]
+    try:
+        if algorithm == COMPRESSION_GZIP:
+            return gzip.decompress(compressed)
+        if algorithm == COMPRESSION_ZSTD:
+            return _zstd_decompress(compressed)
+    except DECOMPRESSION_ERRORS as err:
+        raise WireFormatError(f"Malformed compressed message: {err}") from err
+    raise WireFormatError(f"Unsupported compression: {algorithm}")
+
+
+def encode_task(task: KafkaTask[AsyncRequestPayload], wire_format: str | None = None) -> bytes:
+    """
+    Encodes the task in `wire_format` (ASYNC_REQUEST_WIRE_FORMAT by default) and compresses
+    it according to ASYNC_REQUEST_COMPRESSION.
+    """
+    wire_format = wire_format or settings.ASYNC_REQUEST_WIRE_FORMAT
+    if wire_format == WIRE_FORMAT_MSGPACK:
+        packed = _require_msgpack().packb(task.model_dump(), use_bin_type=True)
+        data = WIRE_MAGIC + bytes((WIRE_VERSION,)) + packed
+    elif wire_format == WIRE_FORMAT_JSON:
+        data = task.model_dump_json().encode("utf-8")
+    else:
+        raise ImproperlyConfigured(f"Unknown wire format: {wire_format}")
+
+    compression = settings.ASYNC_REQUEST_COMPRESSION
+    if compression and len(data) >= settings.ASYNC_REQUEST_COMPRESSION_THRESHOLD:
+        compressed = compress(data, compression, settings.ASYNC_REQUEST_COMPRESSION_LEVEL)
+        # an incompressible body (an archive, an image) is sent as it is
+        if len(compressed) < len(data):
+            return compressed
+    return data
+
+
+def decode_task(data: bytes) -> KafkaTask[AsyncRequestPayload]:
+    """
+    Decodes a message of any supported format (raises WireFormatError or a pydantic
+    ValidationError).
+    """
+    if data.startswith(COMPRESSED_MAGIC):
+        data = decompress(data)
+
+    if not data.startswith(WIRE_MAGIC):
+        return KafkaTask[AsyncRequestPayload].model_validate_json(data)
+
+    version = data[len(WIRE_MAGIC)] if len(data) > len(WIRE_MAGIC) else None
+    if version != WIRE_VERSION:
+        raise WireFormatError(f"Unsupported wire format version: {version}")
+    try:
+        raw = _require_msgpack().unpackb(data[len(WIRE_MAGIC) + 1 :], raw=False)
+    except ValueError as err:
+        raise WireFormatError(f"Malformed msgpack message: {err}") from err
+    return KafkaTask[AsyncRequestPayload].model_validate(raw)
+
+
+def encode_headers(task: KafkaTask[AsyncRequestPayload]) -> dict[str, str]:
+    """The Kafka headers of the task: enough to expire it without decoding the message."""
+    headers = {HEADER_TASK_ID: task.task_id, HEADER_CHANNEL: task.channel_name}
+    payload = task.payload
+    if payload.deadline is not None:
+        headers[HEADER_DEADLINE] = repr(payload.deadline)
+    if payload.inflight_key:
+        headers[HEADER_INFLIGHT_KEY] = payload.inflight_key
+    if payload.body_ref:
+        headers[HEADER_BODY_REF] = payload.body_ref
+    return headers
@@ -0,0 +1,349 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Literal
+
+from pydantic import Field
+
+from bazis.core.utils.schemas import BazisSettings
+
+
+class Settings(BazisSettings):
+    """Background request configuration."""
+
+    ASYNC_REQUEST_RAW_BODY: bool = Field(
+        default=False,
+        description=(
+            "Carry the request body as the original bytes instead of parsed JSON: every content "
+            "type reaches the endpoint verbatim. Enable it once all consumers are updated."
+        ),
+    )
+
+    ASYNC_REQUEST_TOPICS: list[str] = Field(
+        default=[],
+        description=(
+            "Kafka topics consumed in addition to KAFKA_TOPIC_ASYNC_BG: the topics of the routes "
+            "with their own AsyncPolicy topic."
+        ),
+    )
+
+    ASYNC_REQUEST_PRIORITY_LANES: dict[str, str] = Field(
+        default={},
+        description=(
+            "Priority lanes of `X-Async-Priority` and their Kafka topics, e.g. "
+            '{"high": "app_async_high", "low": "app_async_low"}. The lane "default" is '
+            "KAFKA_TOPIC_ASYNC_BG."
+        ),
+    )
+
+    ASYNC_REQUEST_PRIORITY_WEIGHTS: dict[str, int] = Field(
+        default={},
+        description=(
+            "Share of the execution slots of a consumer each lane gets while several lanes "
+            'wait, e.g. {"high": 8, "default": 2, "low": 1}. A lane without a weight gets 1.'
+        ),
+    )
+
+    ASYNC_REQUEST_CONSUMER_SLOTS: int = Field(
+        default=1,
+        description=(
+            "Number of background requests a consumer executes at once across the lanes. Above "
+            "one the requests of a partition key keep their order and the others run in "
+            "parallel; the offsets are committed once the requests are done."
+        ),
+    )
+
+    ASYNC_REQUEST_CONSUMER_BUFFER: int = Field(
+        default=100,
+        description=(
+            "Maximum number of the messages of a lane taken ahead of their execution by the "
+            "ordered executor (ASYNC_REQUEST_CONSUMER_SLOTS above one or batches)."
+        ),
+    )
+
+    ASYNC_REQUEST_CONSUMER_BATCH_SIZE: int | None = Field(
+        default=None,
+        description=(
+            "Consume the messages in batches of up to this many, executed by the ordered "
+            "executor with manual commits of the finished offsets. None consumes one by one."
+        ),
+    )
+
+    ASYNC_REQUEST_CONSUMER_BATCH_TIMEOUT_MS: int = Field(
+        default=200, description="Longest wait of a consumer for its batch to fill up."
+    )
+
+    ASYNC_REQUEST_CONSUMER_THREADS: int | None = Field(
+        default=None,
+        description=(
+            "Threads of a consumer for the sync endpoints and dependencies of the background "
+            "requests. None takes the max_size of the connection pool of the default database, "
+            "or keeps the defaults of anyio and asyncio without a pool."
+        ),
+    )
+
+    ASYNC_REQUEST_PROCESS_POOL_SIZE: int | None = Field(
+        default=None,
+        description=(
+            "Worker processes of a consumer for the routes with AsyncPolicy(cpu_bound=True). "
+            "None starts one per CPU. The pool is started when the consumer joins its group."
+        ),
+    )
+
+    ASYNC_REQUEST_PROCESSING_STATUS_DELAY_MS: float = Field(
+        default=0,
+        description=(
+            "Time a task runs before its processing status is written: a faster task goes from "
+            "pending straight to its final status. 0 writes it when the task starts."
+        ),
+    )
+
+    ASYNC_REQUEST_PARTITION_KEY: str = Field(
+        default="object",
+        description=(
+            "Partition key of the routes without their own AsyncPolicy partition_key: object "
+            "(the JSON:API id of the body), user, none, path:<parameter> or body:<JSON pointer>."
+        ),
+    )
+
+    ASYNC_REQUEST_MAX_DELAY_SEC: float = Field(
+        default=604800,
+        description=(
+            "Upper bound of the delay of `X-Async-Not-Before` and `X-Async-Delay`: a request "
+            "scheduled further ahead is rejected with 400."
+        ),
+    )
+
+    ASYNC_REQUEST_SCHEDULER_POLL_SEC: float = Field(
+        default=5,
+        description=(
+            "Longest sleep of the releaser of the delayed requests: the requests scheduled by "
+            "the other workers are released at most this late."
+        ),
+    )
+
+    ASYNC_REQUEST_SCHEDULER_BATCH_SIZE: int = Field(
+        default=100, description="Maximum number of due requests released at once."
+    )
+
+    ASYNC_REQUEST_PRODUCER_BATCHING: bool = Field(
+        default=False,
+        description=(
+            "Publish the background requests of a web worker in micro-batches instead of one "
+            "round trip to Kafka per request."
+        ),
+    )
+
+    ASYNC_REQUEST_PRODUCER_BATCH_SIZE: int = Field(
+        default=100, description="Maximum number of messages in a batch."
+    )
+
+    ASYNC_REQUEST_PRODUCER_LINGER_MS: float = Field(
+        default=2, description="Maximum time a message waits for its batch to fill up."
+    )
+
+    ASYNC_REQUEST_PRODUCER_QUEUE_SIZE: int = Field(
+        default=10000,
+        description=(
+            "Maximum number of messages queued or awaiting the Kafka ack; beyond it the requests "
+            "are held back."
+        ),
+    )
+
+    ASYNC_REQUEST_PRODUCER_ACK: bool = Field(
+        default=True,
+        description=(
+            "Respond with 202 after Kafka acknowledges the batch. If false, respond as soon as "
+            "the message is queued (a message queued when the worker dies is lost)."
+        ),
+    )
+
+    ASYNC_REQUEST_MAX_WAIT_SEC: float = Field(
+        default=30,
+        description=(
+            "Upper bound of the `wait` parameter of the results route: the time a request may "
+            "wait for the task to finish."
+        ),
+    )
+
+    ASYNC_REQUEST_SSE_KEEPALIVE_SEC: float = Field(
+        default=15, description="Interval of the keep-alive comments of an idle event stream."
+    )
+
+    ASYNC_REQUEST_AUTO_THRESHOLD_MS: float = Field(
+        default=500,
+        description=(
+            "Expected execution time (ms) of a route above which `X-Async-Background: auto` "
+            "executes the request in the background; faster or unknown routes run inline."
+        ),
+    )
+
+    ASYNC_REQUEST_DEFER_BUDGET_MS: float = Field(
+        default=1000,
+        description=(
+            "Time `X-Async-Background: defer` waits for the inline response before the client "
+            "gets 202 and the request goes on detached."
+        ),
+    )
+
+    ASYNC_REQUEST_LATENCY_ALPHA: float = Field(
+        default=0.2, description="Weight of a new execution time in the moving average of a route."
+    )
+
+    ASYNC_REQUEST_LATENCY_REFRESH_SEC: float = Field(
+        default=30, description="Age of the cached route latencies that triggers a refresh."
+    )
+
+    ASYNC_REQUEST_MAX_LAG: int | None = Field(
+        default=None,
+        description=(
+            "Consumer group lag (messages of the consumed topics) above which background "
+            "requests are shed. None disables the check."
+        ),
+    )
+
+    ASYNC_REQUEST_MAX_REDIS_MEMORY_RATIO: float | None = Field(
+        default=None,
+        description=(
+            "Share of the Redis maxmemory above which background requests are shed (e.g. 0.9). "
+            "None disables the check."
+        ),
+    )
+
+    ASYNC_REQUEST_ADMISSION_REFRESH_SEC: float = Field(
+        default=10, description="Age of the cached lag and Redis memory that triggers a refresh."
+    )
+
+    ASYNC_REQUEST_CHANNEL_QUOTA: int | None = Field(
+        default=None,
+        description="Maximum number of background tasks of a channel in flight. None disables it.",
+    )
+
+    ASYNC_REQUEST_CHANNEL_QUOTA_WINDOW_SEC: int = Field(
+        default=3600,
+        description="Age after which an unfinished task stops counting against the quota.",
+    )
+
+    ASYNC_REQUEST_RETRY_AFTER_SEC: int = Field(
+        default=30, description="Retry-After of the background requests rejected with 429."
+    )
+
+    ASYNC_REQUEST_OVERLOAD_INLINE: bool = Field(
+        default=True,
+        description=(
+            "Execute a shed request inline if its route allows it (the allow policy) instead of "
+            "rejecting it with 429."
+        ),
+    )
+
+    ASYNC_REQUEST_IDEMPOTENCY_TTL_SEC: int = Field(
+        default=86400,
+        description=(
+            "Time an Idempotency-Key stays bound to its task: a retry with the key within this "
+            "time gets the id of the original task."
+        ),
+    )
+
+    ASYNC_REQUEST_COALESCE_METHODS: list[str] = Field(
+        default=["GET", "HEAD"],
+        description=(
+            "Methods of the background requests that are coalesced: an identical request of the "
+            "same channel gets the task that is still in flight instead of a new one. An empty "
+            "list disables coalescing."
+        ),
+    )
+
+    ASYNC_REQUEST_COALESCE_HEADERS: list[str] = Field(
+        default=["accept", "accept-language"],
+        description="Headers that make otherwise identical requests different for coalescing.",
+    )
+
+    ASYNC_REQUEST_COALESCE_TTL_SEC: int = Field(
+        default=300,
+        description=(
+            "Upper bound of the time a task is in flight for coalescing, so that a task lost by "
+            "a consumer does not capture identical requests for longer."
+        ),
+    )
+
+    ASYNC_REQUEST_HEADERS_ALLOW: list[str] | None = Field(
+        default=["authorization", "content-type", "accept", "accept-language", "host"],
+        description=(
+            "Headers copied into the background request (case-insensitive). None copies every "
+            "header except ASYNC_REQUEST_HEADERS_DENY."
+        ),
+    )
+
+    ASYNC_REQUEST_HEADERS_DENY: list[str] = Field(
+        default=["cookie"],
+        description="Headers never copied into the background request (case-insensitive).",
+    )
+
+    ASYNC_REQUEST_WIRE_FORMAT: Literal["json", "msgpack"] = Field(
+        default="json",
+        description=(
+            "Encoding of the Kafka messages: json or msgpack (requires the msgpack extra). "
+            "Consumers detect the format of each message."
+        ),
+    )
+
+    ASYNC_REQUEST_COMPRESSION: Literal["gzip", "zstd"] | None = Field(
+        default=None,
+        description=(
+            "Compression of the Kafka messages above ASYNC_REQUEST_COMPRESSION_THRESHOLD: gzip or "
+            "zstd (Python 3.14 or the zstd extra, gzip otherwise). None disables it."
+        ),
+    )
+
+    ASYNC_REQUEST_COMPRESSION_THRESHOLD: int = Field(
+        default=16384, description="Message size (in bytes) from which the message is compressed."
+    )
+
+    ASYNC_REQUEST_COMPRESSION_LEVEL: int | None = Field(
+        default=None, description="Compression level (the default level of the algorithm if None)."
+    )
+
+    ASYNC_REQUEST_CLAIM_CHECK_THRESHOLD: int | None = Field(
+        default=1048576,
+        description=(
+            "Body size (in bytes) above which the body is streamed to the blob store and only "
+            "its key travels through Kafka (claim check); its partition key is read from the "
+            "first this many bytes. None keeps every body in the message."
+        ),
+    )
+
+    ASYNC_REQUEST_BLOB_STORE: str = Field(
+        default="bazis.contrib.async_request.storage.RedisBlobStore",
+        description="Dotted path of the blob store class for claim-checked bodies.",
+    )
+
+    ASYNC_REQUEST_BLOB_STORE_PATH: str | None = Field(
+        default=None,
+        description=(
+            "Root directory of FileSystemBlobStore. It must be shared by the API and the "
+            "consumers (for example, a mounted volume)."
+        ),
+    )
+
+    ASYNC_REQUEST_BLOB_CHUNK_SIZE: int = Field(
+        default=262144, description="Size (in bytes) of the chunks the blob store reads and writes."
+    )
+
+    ASYNC_REQUEST_BLOB_TTL_SEC: int = Field(
+        default=86400,
+        description="Time to keep a claim-checked body that was not consumed (RedisBlobStore).",
+    )
+
+
+settings = Settings()
@@ -0,0 +1,156 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Concurrent execution inside a consumer process. With ASYNC_REQUEST_CONSUMER_SLOTS above one or
+with batches (ASYNC_REQUEST_CONSUMER_BATCH_SIZE) the subscriber of a lane does not execute a
+message itself: it hands the message to the ordered executor of the lane and polls the next
+one. The messages with one Kafka key (the partition marker) run one after another in their
+order, the others run in parallel in the slots of the lane scheduler. The offsets are
+committed by the executor: an offset only once every earlier message of its partition is done,
+so a crash redelivers the unfinished messages.
+"""
+
+import asyncio
+import logging
+from collections import defaultdict, deque
+from collections.abc import Awaitable, Callable
+
+from django.conf import settings
+
+from aiokafka import ConsumerRecord, TopicPartition
+
+from bazis.contrib.ws.utils import drop_closed_loops
+
+
+logger = logging.getLogger(__name__)
+
+
+class OffsetTracker:
+    """
+    The committable positions of the partitions: the lowest offset still in flight, or the
+    offset after the last one seen if none is.
+    """
+
+    def __init__(self) -> None:
+        self.in_flight: dict[TopicPartition, set[int]] = defaultdict(set)
+        self.next_offsets: dict[TopicPartition, int] = {}
+
+    def add(self, partition: TopicPartition, offset: int) -> None:
+        self.in_flight[partition].add(offset)
+        self.next_offsets[partition] = max(self.next_offsets.get(partition, 0), offset + 1)
+
+    def done(self, partition: TopicPartition, offset: int) -> int:
+        """Marks the offset done and returns the position the partition may be committed at."""
+        in_flight = self.in_flight[partition]
+        in_flight.discard(offset)
+        # the set is bounded by ASYNC_REQUEST_CONSUMER_BUFFER
+        return min(in_flight) if in_flight else self.next_offsets[partition]
+
+
+class OrderedExecutor:
+    """
+    Executes the messages of a subscriber concurrently, in order per key. At most
+    ASYNC_REQUEST_CONSUMER_BUFFER messages are taken ahead: a full buffer holds the subscriber
+    back, and with it the polling of the lane.
+    """
+
+    def __init__(self, buffer: int) -> None:
+        self.buffer = asyncio.Semaphore(buffer)
+        self.chains: dict[object, deque] = {}
+        self.tracker = OffsetTracker()
+        self.positions: dict[TopicPartition, int] = {}
+        self.committed: dict[TopicPartition, int] = {}
+        self.consumer = None
+        self.committer: asyncio.Task | None = None
+        self.tasks: set[asyncio.Task] = set()
+
+    async def submit(
+        self, record: ConsumerRecord, consumer, job: Callable[[], Awaitable[None]]
+    ) -> None:
+        """
+        Queues the job of the Kafka record behind the earlier jobs of its key; the offsets are
+        committed with the consumer of the record.
+        """
+        await self.buffer.acquire()
+        partition = TopicPartition(record.topic, record.partition)
+        self.tracker.add(partition, record.offset)
+        self.consumer = consumer
+        # the messages without a key are not ordered
+        key = record.key if record.key is not None else object()
+        entry = (job, partition, record.offset)
+        if (chain := self.chains.get(key)) is not None:
+            chain.append(entry)
+            return
+        self.chains[key] = deque([entry])
+        task = asyncio.create_task(self._run_chain(key))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _run_chain(self, key: object) -> None:
+        chain = self.chains[key]
+        try:
+            while chain:
+                job, partition, offset = chain[0]
+                try:
+                    await job()
+                except Exception:
+                    logger.exception(
+                        "Failed to process the message at offset %s of %s", offset, partition
+                    )
+                chain.popleft()
+                self.buffer.release()
+                self._commit_soon(partition, self.tracker.done(partition, offset))
+        finally:
+            # a cancelled chain (a shutdown, a rebalance) leaves its offsets in flight: they
+            # and the later ones of their partitions are not committed, so they are redelivered
+            del self.chains[key]
+            for _ in chain:
+                self.buffer.release()
+
+    def _commit_soon(self, partition: TopicPartition, position: int) -> None:
+        # a position that does not advance the partition is not committed again
+        if position <= self.committed.get(partition, -1):
+            return
+        self.positions[partition] = position
+        if self.committer is None or self.committer.done():
+            self.committer = asyncio.create_task(self._commit())
+
+    async def _commit(self) -> None:
+        # the positions that change during a commit are committed by the next round
+        while self.positions:
+            positions, self.positions = self.positions, {}
+            self.committed.update(positions)
+            try:
+                await self.consumer.commit(positions)
+            except Exception as err:
+                # e.g. a revoked partition: its unfinished messages are redelivered elsewhere
+                logger.warning("Failed to commit the offsets %s: %s", positions, err)
+                for partition in positions:
+                    self.committed.pop(partition, None)
+
+
+_executors_by_loop: dict[asyncio.AbstractEventLoop, dict[str, OrderedExecutor]] = {}
+
+
+def get_ordered_executor(lane: str) -> OrderedExecutor:
+    """The executor of the lane in the running event loop."""
+    loop = asyncio.get_running_loop()
+    executors = _executors_by_loop.get(loop)
+    if executors is None:
+        drop_closed_loops(_executors_by_loop)
+        executors = _executors_by_loop[loop] = {}
+    if (executor := executors.get(lane)) is None:
+        executor = executors[lane] = OrderedExecutor(settings.ASYNC_REQUEST_CONSUMER_BUFFER)
+    return executor
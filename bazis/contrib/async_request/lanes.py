@@ -0,0 +1,132 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Priority lanes: `X-Async-Priority` (or the `priority` of the route policy) sends a background
+request to the Kafka topic of its lane. A consumer polls every lane with its own subscriber,
+and the lanes share the execution slots of the consumer by weighted round robin, so that a
+flood in a low lane does not hold back the requests of a high one.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+
+from bazis.contrib.ws.utils import drop_closed_loops
+
+
+logger = logging.getLogger(__name__)
+
+#: the lane of KAFKA_TOPIC_ASYNC_BG and ASYNC_REQUEST_TOPICS
+DEFAULT_LANE = "default"
+
+
+def get_lane_topic(lane: str) -> str | None:
+    """The topic of the lane, None for an unknown lane."""
+    if lane == DEFAULT_LANE:
+        return settings.KAFKA_TOPIC_ASYNC_BG
+    return settings.ASYNC_REQUEST_PRIORITY_LANES.get(lane)
+
+
+def get_lane_topics() -> dict[str, list[str]]:
+    """The topics consumed by each lane."""
+    lanes = {DEFAULT_LANE: [settings.KAFKA_TOPIC_ASYNC_BG, *settings.ASYNC_REQUEST_TOPICS]}
+    for lane, topic in settings.ASYNC_REQUEST_PRIORITY_LANES.items():
+        lanes.setdefault(lane, []).append(topic)
+    return lanes
+
+
+class LaneScheduler:
+    """
+    Grants the execution slots of a consumer to the lanes by deficit round robin: while
+    several lanes wait, each lane gets up to its weight of grants per round. A free slot is
+    taken at once if nobody waits.
+    """
+
+    def __init__(self, slots: int, weights: dict[str, int]) -> None:
+        self.free = slots
+        self.weights = weights
+        self.lanes = list(weights)
+        self.waiting: dict[str, deque[asyncio.Future]] = {lane: deque() for lane in self.lanes}
+        self.credits = dict.fromkeys(self.lanes, 0)
+        self.credits[self.lanes[0]] = weights[self.lanes[0]]
+        self.position = 0
+
+    def waiting_count(self, lane: str) -> int:
+        return sum(not future.done() for future in self.waiting[lane])
+
+    @asynccontextmanager
+    async def slot(self, lane: str):
+        """Holds an execution slot of the lane."""
+        if self.free and not any(map(self.waiting_count, self.lanes)):
+            self.free -= 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self.waiting[lane].append(future)
+            try:
+                await future
+            except asyncio.CancelledError:
+                # the slot may have been granted just before the cancellation
+                if future.done() and not future.cancelled():
+                    self._release()
+                raise
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        if (future := self._next_waiting()) is not None:
+            future.set_result(None)
+        else:
+            self.free += 1
+
+    def _next_waiting(self) -> asyncio.Future | None:
+        for queue in self.waiting.values():
+            while queue and queue[0].done():
+                queue.popleft()
+        if not any(self.waiting.values()):
+            return None
+        while True:
+            lane = self.lanes[self.position]
+            queue = self.waiting[lane]
+            if queue and self.credits[lane] > 0:
+                self.credits[lane] -= 1
+                return queue.popleft()
+            # the round of the lane is over: the next one gets its weight, unused credits lapse
+            self.position = (self.position + 1) % len(self.lanes)
+            lane = self.lanes[self.position]
+            self.credits[lane] = self.weights[lane]
+
+
+_schedulers_by_loop: dict[asyncio.AbstractEventLoop, LaneScheduler] = {}
+
+
+def get_lane_scheduler() -> LaneScheduler:
+    """The scheduler of the running event loop."""
+    loop = asyncio.get_running_loop()
+    scheduler = _schedulers_by_loop.get(loop)
+    if scheduler is None:
+        drop_closed_loops(_schedulers_by_loop)
+        weights = {
+            lane: max(1, settings.ASYNC_REQUEST_PRIORITY_WEIGHTS.get(lane, 1))
+            for lane in get_lane_topics()
+        }
+        scheduler = _schedulers_by_loop[loop] = LaneScheduler(
+            settings.ASYNC_REQUEST_CONSUMER_SLOTS, weights
+        )
+    return scheduler
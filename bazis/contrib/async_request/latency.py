@@ -0,0 +1,123 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Per-route latency estimates of `X-Async-Background: auto`: an exponentially weighted moving
+average of the execution time, fed by the consumers and by the requests the middleware
+executes inline. The estimates are kept in a Redis hash and cached by each event loop.
+"""
+
+import asyncio
+import logging
+import time
+
+from django.conf import settings
+
+from bazis.contrib.async_background.utils import get_redis_async
+from bazis.contrib.ws.utils import drop_closed_loops
+
+
+logger = logging.getLogger(__name__)
+
+LATENCY_KEY = "async_request:latency"
+
+_RECORD_LATENCY = """
+local previous = tonumber(redis.call("hget", KEYS[1], ARGV[1]))
+local value = tonumber(ARGV[2])
+if previous then
+    value = previous + tonumber(ARGV[3]) * (value - previous)
+end
+redis.call("hset", KEYS[1], ARGV[1], value)
+return tostring(value)
+"""
+
+
+def route_key(method: str, path: str) -> str:
+    """The key of a route: the method and the path template."""
+    return f"{method} {path}"
+
+
+async def record_latency(key: str, elapsed_ms: float) -> None:
+    """Adds an execution time of the route to its moving average."""
+    await get_redis_async().eval(
+        _RECORD_LATENCY, 1, LATENCY_KEY, key, elapsed_ms, settings.ASYNC_REQUEST_LATENCY_ALPHA
+    )
+
+
+#: the tasks recording the latencies of inline requests (the loop keeps weak refs)
+_record_tasks: set[asyncio.Task] = set()
+
+
+def record_latency_soon(key: str, elapsed_ms: float) -> None:
+    """Records the latency in the background: the response is not held back by Redis."""
+
+    async def record() -> None:
+        try:
+            await record_latency(key, elapsed_ms)
+        except Exception:
+            logger.warning("Failed to record the latency of %s.", key, exc_info=True)
+
+    task = asyncio.create_task(record())
+    _record_tasks.add(task)
+    task.add_done_callback(_record_tasks.discard)
+
+
+class LatencyEstimates:
+    """The cached estimates of an event loop; a stale cache is refreshed by a background task."""
+
+    def __init__(self) -> None:
+        self.estimates: dict[str, float] = {}
+        self.refreshed_at = float("-inf")
+        self.refreshing: asyncio.Task | None = None
+
+    async def get(self, key: str) -> float | None:
+        """
+        The expected execution time of the route in ms, None if it is not known yet. The first
+        call waits for the estimates, a later one refreshes stale estimates in the background.
+        """
+        if self.refreshing is None:
+            self.refreshing = asyncio.create_task(self.refresh())
+            await self.refreshing
+        elif time.monotonic() - self.refreshed_at > settings.ASYNC_REQUEST_LATENCY_REFRESH_SEC:
+            if self.refreshing.done():
+                self.refreshing = asyncio.create_task(self.refresh())
+        return self.estimates.get(key)
+
+    async def refresh(self) -> None:
+        self.refreshed_at = time.monotonic()
+        try:
+            values = await get_redis_async().hgetall(LATENCY_KEY)
+        except Exception:
+            logger.warning("Failed to read the route latencies.", exc_info=True)
+            return
+        self.estimates = {key.decode(): float(value) for key, value in values.items()}
+
+
+_estimates_by_loop: dict[asyncio.AbstractEventLoop, LatencyEstimates] = {}
+
+
+def get_latency_estimates() -> LatencyEstimates:
+    """Returns the latency estimates of the running event loop."""
+    loop = asyncio.get_running_loop()
+    estimates = _estimates_by_loop.get(loop)
+    if estimates is None:
+        drop_closed_loops(_estimates_by_loop)
+        estimates = _estimates_by_loop[loop] = LatencyEstimates()
+    return estimates
+
+
+async def is_slow_route(key: str) -> bool:
+    """Whether the route is expected to run longer than ASYNC_REQUEST_AUTO_THRESHOLD_MS."""
+    estimate = await get_latency_estimates().get(key)
+    return estimate is not None and estimate > settings.ASYNC_REQUEST_AUTO_THRESHOLD_MS
@@ -14,61 +14,215 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
+from urllib.parse import parse_qs
+from uuid import uuid4
 
 from django.conf import settings
 
 from fastapi import Request
 
-from starlette.datastructures import Headers
 from starlette.responses import JSONResponse
 
-from bazis.contrib.async_background.producer import enqueue_task_async
-from bazis.contrib.async_background.routes import get_async_background_response
-from bazis.contrib.async_background.utils import ChannelNameError, resolve_channel_name_async
+from bazis.contrib.async_background.schemas import TaskStatus
+from bazis.contrib.async_background.utils import (
+    ChannelNameError,
+    resolve_channel_name_async,
+    set_and_publish_status_async,
+)
 
-from .utils import build_request_payload
+from .admission import (
+    OVERLOAD_CHANNEL_QUOTA,
+    admit_channel_task,
+    close_admission_snapshot,
+    get_admission_snapshot,
+    release_channel_task,
+)
+from .cancellation import is_cancelled
+from .lanes import get_lane_topic
+from .latency import is_slow_route, record_latency_soon, route_key
+from .notifications import wait_for_task
+from .partition import resolve_partition_marker
+from .policy import BackgroundMode, PolicyTable, RoutePolicy
+from .producer import enqueue_request_async, flush_batch_publisher
+from .scheduling import get_scheduled_releaser, parse_deadline, parse_not_before
+from .schemas import AsyncRequestStatus
+from .signals import request_shed
+from .utils import (
+    IDEMPOTENCY_KEY_MAX_LENGTH,
+    RequestBodyTooLargeError,
+    ResponseCollector,
+    build_request_payload,
+    drop_body,
+    idempotency_key,
+    inflight_key,
+    read_request_body,
+    release_task_ids,
+    reserve_task_id,
+)
 
 
 logger = logging.getLogger(__name__)
 
+BACKGROUND_HEADER = b"x-async-background"
+INTERNAL_HEADER = b"x-async-background-internal"
+AUTO_VALUE = b"auto"  # X-Async-Background: auto, background only for the slow routes
+WAIT_PARAM = b"wait="  # the long polling of the results route
+DEFER_VALUE = b"defer"  # X-Async-Background: defer, inline up to a budget, then detached
+
+
+def scan_background_headers(raw_headers) -> tuple[bytes | None, bool]:
+    """
+    One pass over the raw ASGI headers (lowercase names): the value of X-Async-Background
+    (None if absent) and whether the request is an internal background request.
+    """
+    background = None
+    internal = False
+    for name, value in raw_headers:
+        if name == BACKGROUND_HEADER:
+            background = value
+        elif name == INTERNAL_HEADER:
+            internal = value.lower() == b"true"
+    return background, internal
+
+
+def exceeds_content_length(request: Request, max_size: int | None) -> bool:
+    """Whether the declared Content-Length is above the limit (the body is checked as read)."""
+    if max_size is None:
+        return False
+    content_length = request.headers.get("content-length", "")
+    return content_length.isdigit() and int(content_length) > max_size
+
+
+def resolve_topic(request: Request, policy: RoutePolicy) -> str:
+    """
+    The topic of a background request: the lane of X-Async-Priority or of the route, else the
+    topic of the route. ValueError for an unknown lane.
+    """
+    if lane := request.headers.get("x-async-priority") or policy.priority:
+        if (topic := get_lane_topic(lane)) is None:
+            raise ValueError(f"Unknown priority lane: {lane}.")
+        return topic
+    return policy.topic or settings.KAFKA_TOPIC_ASYNC_BG
+
+
+async def respond(
+    scope, receive, send, status_code: int, detail: str, headers: dict | None = None
+) -> None:
+    """Responds with an error of the middleware."""
+    response = JSONResponse(status_code=status_code, content={'detail': detail}, headers=headers)
+    await response(scope, receive, send)
+
+
+async def accepted(scope, receive, send, task_id: str, headers: dict | None = None) -> None:
+    """Responds with 202 and the id of the background task."""
+    response = JSONResponse(
+        status_code=202,
+        content={"data": None, "meta": {"async_request_id": task_id}},
+        headers=headers,
+    )
+    await response(scope, receive, send)
+
+
+async def abandon_task(
+    task_id: str,
+    channel_name: str,
+    reserved: list[str],
+    admitted: bool,
+    body_ref: str | None,
+) -> None:
+    """Releases what was taken for a task that was not enqueued."""
+    await release_task_ids(*reserved)
+    if admitted:
+        await release_channel_task(channel_name, task_id)
+    if body_ref:
+        # no consumer gets the task: its claim-checked body would never be dropped
+        await drop_body(task_id, body_ref)
+
+
+#: the modes of the routes that `X-Async-Background: auto` may execute inline
+INLINE_MODES = (BackgroundMode.ALLOW, BackgroundMode.NEVER)
+
 
 class AsyncRequestMiddleware:
     def __init__(self, app):
         self.app = app
-        self._no_bg_prefixes: tuple[str, ...] | None = None
-
-    def _build_no_bg_prefixes(self, app) -> tuple[str, ...]:
-        prefixes: list[str] = []
-        path = app.url_path_for(get_async_background_response.__name__, task_id="__dummy__")
-        if path:
-            prefix = str(path).replace("/__dummy__/", "/")
-            while "//" in prefix:
-                prefix = prefix.replace("//", "/")
-            prefixes.append(prefix)
-        return tuple(prefixes)
+        self._policies: PolicyTable | None = None
+        self._detached: set[asyncio.Task] = set()
+
+    def get_policies(self, scope) -> PolicyTable:
+        """The policy table of the application, compiled on the first call."""
+        if self._policies is None:
+            self._policies = PolicyTable.from_app(scope.get("app") or self.app)
+        return self._policies
+
+    async def lifespan(self, scope, receive, send) -> None:
+        """
+        Compiles the policy table and starts the releaser of the delayed requests on startup (if
+        Kafka is enabled); on shutdown publishes the queued tasks, closes the Kafka clients of the
+        admission and waits for the detached requests.
+        """
+        if "app" in scope:
+            self.get_policies(scope)
+
+        async def receive_lifespan():
+            message = await receive()
+            if message["type"] == "lifespan.startup" and settings.KAFKA_ENABLED:
+                # the delayed requests of the workers that are gone are released as well
+                get_scheduled_releaser().start()
+            elif message["type"] == "lifespan.shutdown":
+                await get_scheduled_releaser().stop()
+                await flush_batch_publisher()
+                await close_admission_snapshot()
+                # the detached requests are finished, not cancelled
+                await asyncio.gather(*self._detached, return_exceptions=True)
+            return message
+
+        await self.app(scope, receive_lifespan, send)
 
     async def __call__(self, scope, receive, send) -> None:
-        if scope.get("type") != "http":
+        # the fast path of the requests that are not background ones: no objects are built
+        if scope["type"] == "lifespan":
+            await self.lifespan(scope, receive, send)
+            return
+        if scope["type"] != "http":
             await self.app(scope, receive, send)
             return
-
-        if self._no_bg_prefixes is None:
-            scope_app = scope.get("app")
-            self._no_bg_prefixes = self._build_no_bg_prefixes(scope_app or self.app)
-
-        path = scope.get("path", "")
-        if self._no_bg_prefixes and any(path.startswith(prefix) for prefix in self._no_bg_prefixes):
+        background, internal = scan_background_headers(scope["headers"])
+        if internal:
             await self.app(scope, receive, send)
             return
+        policies = self._policies or self.get_policies(scope)
+        if background is None and not policies.has_forced:
+            if WAIT_PARAM not in scope["query_string"]:
+                await self.app(scope, receive, send)
+                return
 
-        headers = Headers(scope=scope)
-        if (
-            headers.get("X-Async-Background-Internal", "").lower() == "true"
-            or "X-Async-Background" not in headers
-        ):
+        policy = policies.match(scope["method"], scope["path"])
+        if background is None:
+            if policy.results:
+                await self.wait_for_result(scope)
+            if policy.mode != BackgroundMode.FORCE:
+                await self.app(scope, receive, send)
+                return
+        elif policy.mode == BackgroundMode.EXEMPT:
             await self.app(scope, receive, send)
             return
+        elif background == AUTO_VALUE and policy.mode in INLINE_MODES:
+            # the route is known to be slow: background, otherwise inline (and measured)
+            key = route_key(scope["method"], policy.path)
+            if policy.mode == BackgroundMode.NEVER or not await is_slow_route(key):
+                await self.run_inline(scope, receive, send, key)
+                return
+        elif background == DEFER_VALUE and policy.mode == BackgroundMode.ALLOW:
+            await self.run_deferrable(scope, receive, send)
+            return
+        elif policy.mode == BackgroundMode.NEVER:
+            detail = "This endpoint is not available via async request."
+            await respond(scope, receive, send, 409, detail)
+            return
 
         if not settings.KAFKA_ENABLED:
             logger.warning(
@@ -77,27 +231,235 @@ class AsyncRequestMiddleware:
             await self.app(scope, receive, send)
             return
 
+        await self.run_in_background(scope, receive, send, policy)
+
+    @staticmethod
+    async def wait_for_result(scope) -> None:
+        """
+        Holds a request of the results route with `?wait=<seconds>` until the task finishes or
+        the time is out (at most ASYNC_REQUEST_MAX_WAIT_SEC); then the route responds as usual.
+        Only the client that owns the task waits: the route answers the others at once.
+        """
+        values = parse_qs(scope["query_string"].decode("latin-1")).get("wait")
+        try:
+            wait = min(float(values[-1]), settings.ASYNC_REQUEST_MAX_WAIT_SEC) if values else 0
+        except ValueError:
+            return
+        if wait <= 0:
+            return
+        try:
+            channel_name = await resolve_channel_name_async(Request(scope))
+        except ChannelNameError:
+            return
+        await wait_for_task(scope["path"].rstrip("/").rsplit("/", 1)[-1], wait, channel_name)
+
+    async def run_inline(self, scope, receive, send, key: str) -> None:
+        """Executes the request inline and adds its execution time to the route estimate."""
+        started = time.perf_counter()
+        await self.app(scope, receive, send)
+        record_latency_soon(key, (time.perf_counter() - started) * 1000)
+
+    async def run_deferrable(self, scope, receive, send) -> None:
+        """
+        Executes the request inline. Without a response within ASYNC_REQUEST_DEFER_BUDGET_MS the
+        client gets 202 and the execution goes on detached in this process: its result is stored
+        as the result of a background task. The request is executed only once.
+        """
         request = Request(scope, receive)
-        await request.body()
         try:
             channel_name = await resolve_channel_name_async(request)
         except ChannelNameError as err:
-            response = JSONResponse(status_code=401, content={'detail': str(err)})
-            await response(scope, receive, send)
-            return
-
-        payload = build_request_payload(request)
-        message = await enqueue_task_async(
-            topic_name=settings.KAFKA_TOPIC_ASYNC_BG,
-            channel_name=channel_name,
-            payload=payload,
-            partition_marker=(
-                payload.body.get("data", {}).get("id") if isinstance(payload.body, dict) else None
-            ),
+            await respond(scope, receive, send, 401, str(err))
+            return
+        # the body is read up front: the client connection may be closed once the execution
+        # is detached
+        body = await request.body()
+        body_sent = False
+
+        async def receive_body():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # a detached request outlives its connection: it is never told of a disconnect
+            await asyncio.Future()
+
+        collector = ResponseCollector()
+        execution = asyncio.create_task(self.app(scope, receive_body, collector))
+        responded = asyncio.create_task(collector.complete.wait())
+        await asyncio.wait(
+            (execution, responded),
+            timeout=settings.ASYNC_REQUEST_DEFER_BUDGET_MS / 1000,
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+        if collector.complete.is_set() or execution.done():
+            responded.cancel()
+            for message in collector.messages:
+                await send(message)
+            # the rest of the execution (e.g. background tasks of the response) as usual
+            await execution
+            return
+        responded.cancel()
+
+        task_id = str(uuid4())
+        await set_and_publish_status_async(
+            task_id=task_id, channel_name=channel_name, status=TaskStatus.PROCESSING
+        )
+        finishing = asyncio.create_task(
+            self._finish_detached(execution, collector, task_id, channel_name, scope["path"])
         )
+        self._detached.add(finishing)
+        finishing.add_done_callback(self._detached.discard)
+        await accepted(scope, receive, send, task_id)
+
+    @staticmethod
+    async def _finish_detached(
+        execution: asyncio.Task,
+        collector: ResponseCollector,
+        task_id: str,
+        channel_name: str,
+        path: str,
+    ) -> None:
+        try:
+            await execution
+        except Exception as err:
+            cancelled = await is_cancelled(task_id)
+            if not cancelled:
+                logger.exception("Failed to process the detached task_id=%s", task_id)
+            await set_and_publish_status_async(
+                task_id=task_id,
+                channel_name=channel_name,
+                status=AsyncRequestStatus.CANCELLED if cancelled else TaskStatus.FAILED,
+                response={"error": str(err)},
+            )
+        else:
+            # the client may have cancelled the task after its 202: the response is dropped
+            cancelled = await is_cancelled(task_id)
+            await set_and_publish_status_async(
+                task_id=task_id,
+                channel_name=channel_name,
+                status=AsyncRequestStatus.CANCELLED if cancelled else TaskStatus.COMPLETED,
+                response=collector.result(task_id, path),
+            )
+
+    async def run_in_background(self, scope, receive, send, policy: RoutePolicy) -> None:
+        """Enqueues the request and responds with 202 and the id of its task."""
+        if settings.ASYNC_REQUEST_MAX_LAG is not None or (
+            settings.ASYNC_REQUEST_MAX_REDIS_MEMORY_RATIO is not None
+        ):
+            if reason := get_admission_snapshot().overload():
+                await self.shed(scope, receive, send, policy, reason)
+                return
+
+        request = Request(scope, receive)
+        too_large = f"The request body exceeds {policy.max_body_size} bytes."
+        if exceeds_content_length(request, policy.max_body_size):
+            await respond(scope, receive, send, 413, too_large)
+            return
+
+        try:
+            topic = resolve_topic(request, policy)
+            not_before = parse_not_before(request.headers)
+            deadline = parse_deadline(request.headers, policy.ttl, not_before)
+        except ValueError as err:
+            await respond(scope, receive, send, 400, str(err))
+            return
 
-        response = JSONResponse(
-            status_code=202,
-            content={"data": None, "meta": {"async_request_id": message.task_id}},
+        try:
+            channel_name = await resolve_channel_name_async(request)
+        except ChannelNameError as err:
+            await respond(scope, receive, send, 401, str(err))
+            return
+
+        key = request.headers.get("idempotency-key")
+        if key is not None and not 0 < len(key) <= IDEMPOTENCY_KEY_MAX_LENGTH:
+            detail = f"Idempotency-Key must be 1 to {IDEMPOTENCY_KEY_MAX_LENGTH} characters."
+            await respond(scope, receive, send, 400, detail)
+            return
+
+        # (redis key, ttl, response headers of a request that finds the key taken)
+        reservations: list[tuple[str, int, dict | None]] = []
+        if key is not None:
+            reservations.append((
+                idempotency_key(channel_name, key),
+                settings.ASYNC_REQUEST_IDEMPOTENCY_TTL_SEC,
+                {"Idempotent-Replayed": "true"},
+            ))
+        coalesced_key = None
+        if request.method in settings.ASYNC_REQUEST_COALESCE_METHODS:
+            coalesced_key = inflight_key(request, channel_name)
+            reservations.append((coalesced_key, settings.ASYNC_REQUEST_COALESCE_TTL_SEC, None))
+
+        task_id = str(uuid4())
+        reserved: list[str] = []
+        admitted = False
+        body_ref = None
+        try:
+            for redis_key, ttl, headers in reservations:
+                if existing_task_id := await reserve_task_id(redis_key, task_id, ttl):
+                    # a retry or an identical request in flight: it gets the existing task
+                    await release_task_ids(*reserved)
+                    await accepted(scope, receive, send, existing_task_id, headers=headers)
+                    return
+                reserved.append(redis_key)
+
+            if not await admit_channel_task(channel_name, task_id):
+                await release_task_ids(*reserved)
+                await self.shed(scope, receive, send, policy, OVERLOAD_CHANNEL_QUOTA, channel_name)
+                return
+            admitted = True
+
+            body_ref = await read_request_body(request, max_size=policy.max_body_size)
+            payload = build_request_payload(
+                request,
+                body_ref=body_ref,
+                inflight_key=coalesced_key,
+                route_key=route_key(request.method, policy.path) if policy.path else None,
+                deadline=deadline,
+                cpu_bound=policy.cpu_bound,
+                processing_status=policy.processing_status,
+            )
+            await enqueue_request_async(
+                topic_name=topic,
+                channel_name=channel_name,
+                payload=payload,
+                partition_marker=await resolve_partition_marker(
+                    policy.partition_key, request, payload, channel_name, policy.path
+                ),
+                task_id=task_id,
+                not_before=not_before,
+                reserved_keys=reserved,
+            )
+        except BaseException as err:
+            await abandon_task(task_id, channel_name, reserved, admitted, body_ref)
+            if isinstance(err, RequestBodyTooLargeError):
+                await respond(scope, receive, send, 413, too_large)
+                return
+            raise
+
+        await accepted(scope, receive, send, task_id)
+
+    async def shed(
+        self,
+        scope,
+        receive,
+        send,
+        policy: RoutePolicy,
+        reason: str,
+        channel_name: str | None = None,
+    ) -> None:
+        """
+        Handles a background request that is not admitted: executed inline if its route allows
+        it and ASYNC_REQUEST_OVERLOAD_INLINE is set, rejected with 429 otherwise.
+        """
+        inline = settings.ASYNC_REQUEST_OVERLOAD_INLINE and policy.mode == BackgroundMode.ALLOW
+        logger.warning("Background request to %s shed (%s).", scope["path"], reason)
+        request_shed.send(
+            sender=AsyncRequestMiddleware, reason=reason, channel_name=channel_name, inline=inline
         )
-        await response(scope, receive, send)
+        if inline:
+            await self.app(scope, receive, send)
+            return
+        headers = {"Retry-After": str(settings.ASYNC_REQUEST_RETRY_AFTER_SEC)}
+        detail = "Too many background requests, retry later."
+        await respond(scope, receive, send, 429, detail, headers=headers)
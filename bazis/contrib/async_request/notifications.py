@@ -0,0 +1,190 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+The status notifications of background tasks in the web process. `set_and_publish_status_async`
+publishes every status change to the channel of the task; a listener per event loop holds one
+Redis pubsub connection for all the waiting requests and subscribes to a channel while someone
+listens to it.
+"""
+
+import asyncio
+import json
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from bazis.contrib.async_background.schemas import TaskStatus
+from bazis.contrib.async_background.utils import get_redis_async, get_task_data_async
+from bazis.contrib.ws.utils import drop_closed_loops
+
+from .schemas import AsyncRequestStatus
+
+
+logger = logging.getLogger(__name__)
+
+#: the statuses after which a task does not change any more
+FINAL_STATUSES = frozenset({
+    TaskStatus.COMPLETED.value,
+    TaskStatus.FAILED.value,
+    AsyncRequestStatus.EXPIRED.value,
+    AsyncRequestStatus.CANCELLED.value,
+})
+
+#: the notifications a slow listener may fall behind by; older ones are dropped
+QUEUE_SIZE = 100
+
+SUBSCRIBE_TIMEOUT_SEC = 5
+
+
+class _Channel:
+    def __init__(self) -> None:
+        self.queues: set[asyncio.Queue] = set()
+        self.subscribed = asyncio.Event()
+
+
+class StatusListener:
+    """
+    Multiplexes the task notifications of the channels over one pubsub connection. A reader
+    task runs while any channel is listened to.
+    """
+
+    def __init__(self) -> None:
+        self.pubsub = None
+        self.channels: dict[str, _Channel] = {}
+        self.reader: asyncio.Task | None = None
+        self.lock = asyncio.Lock()
+
+    @asynccontextmanager
+    async def listen(self, channel_name: str) -> AsyncIterator[asyncio.Queue]:
+        """
+        A queue of the task notifications of the channel ({"status", "task_id", "action"}),
+        filled from the moment Redis confirmed the subscription.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        async with self.lock:
+            if self.pubsub is None:
+                self.pubsub = get_redis_async().pubsub()
+            channel = self.channels.get(channel_name)
+            if channel is None:
+                channel = self.channels[channel_name] = _Channel()
+                await self.pubsub.subscribe(channel_name)
+            channel.queues.add(queue)
+            if self.reader is None or self.reader.done():
+                self.reader = asyncio.create_task(self._read())
+        try:
+            await asyncio.wait_for(channel.subscribed.wait(), SUBSCRIBE_TIMEOUT_SEC)
+            yield queue
+        finally:
+            async with self.lock:
+                channel.queues.discard(queue)
+                if not channel.queues and self.channels.get(channel_name) is channel:
+                    del self.channels[channel_name]
+                    try:
+                        await self.pubsub.unsubscribe(channel_name)
+                    except Exception:
+                        logger.warning(
+                            "Failed to unsubscribe from %s.", channel_name, exc_info=True
+                        )
+
+    async def _read(self) -> None:
+        while self.channels:
+            try:
+                message = await self.pubsub.get_message(timeout=1.0)
+            except Exception:
+                logger.exception("The task notifications connection failed, reconnecting.")
+                await self._reconnect()
+                continue
+            if message is None:
+                continue
+            channel_name = message["channel"]
+            if isinstance(channel_name, bytes):
+                channel_name = channel_name.decode()
+            if (channel := self.channels.get(channel_name)) is None:
+                continue
+            if message["type"] == "subscribe":
+                channel.subscribed.set()
+            elif message["type"] == "message":
+                self._dispatch(channel, message["data"])
+
+    @staticmethod
+    def _dispatch(channel: _Channel, data) -> None:
+        try:
+            notification = json.loads(data)
+        except ValueError:
+            return
+        # the channel also carries the other messages of the client (see bazis-ws)
+        if not isinstance(notification, dict) or notification.get("action") != "async_bg":
+            return
+        for queue in channel.queues:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(notification)
+
+    async def _reconnect(self) -> None:
+        await asyncio.sleep(1)
+        async with self.lock:
+            try:
+                await self.pubsub.reset()
+            except Exception:
+                logger.debug("Failed to close the task notifications connection.", exc_info=True)
+            self.pubsub = get_redis_async().pubsub()
+            if self.channels:
+                try:
+                    await self.pubsub.subscribe(*self.channels)
+                except Exception:
+                    logger.exception("Failed to resubscribe to the task notifications.")
+
+
+_listeners_by_loop: dict[asyncio.AbstractEventLoop, StatusListener] = {}
+
+
+def get_status_listener() -> StatusListener:
+    """Returns the status listener of the running event loop."""
+    loop = asyncio.get_running_loop()
+    listener = _listeners_by_loop.get(loop)
+    if listener is None:
+        drop_closed_loops(_listeners_by_loop)
+        listener = _listeners_by_loop[loop] = StatusListener()
+    return listener
+
+
+async def wait_for_task(task_id: str, timeout: float, channel_name: str) -> None:
+    """
+    Waits until the task of the channel has a final status, at most `timeout` seconds. The task
+    of another channel is not waited for.
+    """
+    task_data = await get_task_data_async(task_id)
+    if (
+        not task_data
+        or task_data.get("channel_name") != channel_name
+        or task_data.get("status") in FINAL_STATUSES
+    ):
+        return
+    try:
+        async with asyncio.timeout(timeout):
+            async with get_status_listener().listen(channel_name) as queue:
+                # the status may have changed before the subscription
+                task_data = await get_task_data_async(task_id)
+                if not task_data or task_data.get("status") in FINAL_STATUSES:
+                    return
+                while True:
+                    notification = await queue.get()
+                    if (
+                        notification.get("task_id") == task_id
+                        and notification.get("status") in FINAL_STATUSES
+                    ):
+                        return
+    except TimeoutError:
+        return
@@ -0,0 +1,129 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Partition keys of background requests. The tasks with one key go to one Kafka partition and
+keep their order; tasks with different keys spread over all the partitions. The key of a route
+is declared with `AsyncPolicy(partition_key=...)` (ASYNC_REQUEST_PARTITION_KEY by default):
+
+- ``"object"`` — the id of the JSON:API object of the body (``data.id``)
+- ``"path:<name>"`` — a parameter of the route path, e.g. ``"path:item_id"``
+- ``"body:<pointer>"`` — a JSON pointer into the JSON body, e.g. ``"body:/data/attributes/order"``
+- ``"user"`` — the channel of the client: the tasks of a user keep their order
+- ``"none"`` — no key: the tasks are spread over the partitions
+- a callable ``(request, payload) -> str | None``, sync or async
+
+The key of a claim-checked body is read from its first ASYNC_REQUEST_CLAIM_CHECK_THRESHOLD
+bytes, the part read before it was moved to the blob store; a key further in is not found.
+"""
+
+import inspect
+from collections.abc import Callable
+from functools import cache
+
+from django.conf import settings
+
+from fastapi import Request
+
+from starlette.routing import compile_path
+
+from .schemas import AsyncRequestPayload
+from .utils import BODY_PREFIX_SCOPE_KEY, OBJECT_ID_POINTER, resolve_raw_pointer
+
+
+PartitionKeySpec = str | Callable
+
+PARTITION_KEY_OBJECT = "object"
+PARTITION_KEY_USER = "user"
+PARTITION_KEY_NONE = "none"
+PATH_PREFIX = "path:"
+BODY_PREFIX = "body:"
+
+
+def validate_partition_key(spec: PartitionKeySpec | None) -> None:
+    """Raises ValueError for a spec that is neither a known key nor a callable."""
+    if spec is None or callable(spec):
+        return
+    if spec in (PARTITION_KEY_OBJECT, PARTITION_KEY_USER, PARTITION_KEY_NONE):
+        return
+    if spec.startswith(PATH_PREFIX) and spec.removeprefix(PATH_PREFIX):
+        return
+    if spec.startswith(BODY_PREFIX) and spec.removeprefix(BODY_PREFIX).startswith("/"):
+        return
+    raise ValueError(f"Invalid partition key: {spec!r}")
+
+
+@cache
+def _path_regex(path: str):
+    regex, _, _ = compile_path(path)
+    return regex
+
+
+def _path_param(request: Request, path: str, name: str) -> str | None:
+    if not path or (match := _path_regex(path).match(request.scope["path"])) is None:
+        return None
+    return match.groupdict().get(name)
+
+
+def _body_value(request: Request, payload: AsyncRequestPayload, pointer: str):
+    if payload.raw_body is not None:
+        return resolve_raw_pointer(payload.raw_body, pointer)
+    if payload.body_ref is not None:
+        # a claim-checked body: the prefix read before it was moved to the blob store
+        return resolve_raw_pointer(b"".join(request.scope.get(BODY_PREFIX_SCOPE_KEY, ())), pointer)
+    return resolve_pointer(payload.body, pointer)
+
+
+def resolve_pointer(document, pointer: str):
+    """The value at the JSON pointer (RFC 6901), None if there is none."""
+    value = document
+    for token in pointer.split("/")[1:]:
+        token = token.replace("~1", "/").replace("~0", "~")
+        if isinstance(value, dict):
+            value = value.get(token)
+        elif isinstance(value, list) and token.isdigit() and int(token) < len(value):
+            value = value[int(token)]
+        else:
+            return None
+    return value
+
+
+async def resolve_partition_marker(
+    spec: PartitionKeySpec | None,
+    request: Request,
+    payload: AsyncRequestPayload,
+    channel_name: str,
+    path: str = "",
+) -> str | None:
+    """The partition marker of a background request by the spec of its route (`path`)."""
+    if spec is None:
+        spec = settings.ASYNC_REQUEST_PARTITION_KEY
+    if callable(spec):
+        marker = spec(request, payload)
+        if inspect.isawaitable(marker):
+            marker = await marker
+    elif spec == PARTITION_KEY_OBJECT:
+        marker = _body_value(request, payload, OBJECT_ID_POINTER)
+    elif spec == PARTITION_KEY_USER:
+        marker = channel_name
+    elif spec.startswith(PATH_PREFIX):
+        marker = _path_param(request, path, spec.removeprefix(PATH_PREFIX))
+    elif spec.startswith(BODY_PREFIX):
+        marker = _body_value(request, payload, spec.removeprefix(BODY_PREFIX))
+    else:
+        marker = None
+    # a number or a string; an object or a list is not a key
+    if isinstance(marker, bool) or not isinstance(marker, str | int | float):
+        return None
+    return str(marker)
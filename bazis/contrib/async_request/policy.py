@@ -0,0 +1,230 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Per-route background policy. The policy of a route is declared with the `AsyncPolicy`
+dependency; the middleware compiles the routes of the application into a table once and
+decides on a request by its method and path, before the body is read.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from enum import StrEnum
+
+from fastapi import HTTPException, Request, status
+from fastapi.dependencies.models import Dependant
+from fastapi.routing import APIRoute, RouteContext, iter_route_contexts
+
+from .partition import PartitionKeySpec, validate_partition_key
+
+
+class BackgroundMode(StrEnum):
+    """How a route treats background requests."""
+
+    EXEMPT = "exempt"  # X-Async-Background is ignored, the request is always executed inline
+    NEVER = "never"  # a background request is rejected with 409
+    ALLOW = "allow"  # executed in the background on X-Async-Background (the default)
+    REQUIRED = "required"  # a request without X-Async-Background is rejected with 409
+    FORCE = "force"  # always executed in the background, with or without the header
+
+
+@dataclass(frozen=True, slots=True)
+class RoutePolicy:
+    """The policy of a route: the mode, the Kafka topic or lane and the body size limit."""
+
+    mode: BackgroundMode = BackgroundMode.ALLOW
+    topic: str | None = None  # KAFKA_TOPIC_ASYNC_BG if None
+    priority: str | None = None  # the lane of a request without X-Async-Priority
+    ttl: float | None = None  # seconds after which an unexecuted task expires
+    partition_key: PartitionKeySpec | None = None  # ASYNC_REQUEST_PARTITION_KEY if None
+    max_body_size: int | None = None  # bytes
+    cpu_bound: bool = False  # executed in the process pool of the consumer
+    processing_status: bool = True  # the processing status is written (and published)
+    path: str = ""  # the path template of the route
+    results: bool = False  # the results route of bazis-async-background
+
+
+DEFAULT_POLICY = RoutePolicy()
+
+
+class AsyncPolicy:
+    """
+    Dependency that declares the background policy of a route:
+
+        @router.post("/report/", dependencies=[Depends(AsyncPolicy(BackgroundMode.FORCE))])
+
+    It is read by the middleware when the policy table is compiled. In the route itself it
+    only rejects the requests the middleware would have rejected, for applications without
+    the middleware.
+    """
+
+    def __init__(
+        self,
+        mode: BackgroundMode = BackgroundMode.ALLOW,
+        *,
+        topic: str | None = None,
+        priority: str | None = None,
+        ttl: float | None = None,
+        partition_key: PartitionKeySpec | None = None,
+        max_body_size: int | None = None,
+        cpu_bound: bool = False,
+        processing_status: bool = True,
+    ):
+        validate_partition_key(partition_key)
+        self.mode = BackgroundMode(mode)
+        self.topic = topic
+        self.priority = priority
+        self.ttl = ttl
+        self.partition_key = partition_key
+        self.max_body_size = max_body_size
+        self.cpu_bound = cpu_bound
+        self.processing_status = processing_status
+
+    async def __call__(self, request: Request) -> None:
+        if request.headers.get("X-Async-Background-Internal", "").lower() == "true":
+            if self.mode == BackgroundMode.NEVER:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="This endpoint is not available via async request.",
+                )
+            return
+        if self.mode == BackgroundMode.FORCE or (
+            self.mode == BackgroundMode.REQUIRED and "X-Async-Background" not in request.headers
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="This endpoint is available only via async request.",
+            )
+
+    def __repr__(self) -> str:
+        return (
+            f"AsyncPolicy({self.mode!r}, topic={self.topic!r}, priority={self.priority!r}, "
+            f"ttl={self.ttl!r}, partition_key={self.partition_key!r}, "
+            f"max_body_size={self.max_body_size!r}, cpu_bound={self.cpu_bound!r}, "
+            f"processing_status={self.processing_status!r})"
+        )
+
+
+def _iter_calls(dependant: Dependant) -> Iterable:
+    for dependency in dependant.dependencies:
+        yield dependency.call
+        yield from _iter_calls(dependency)
+
+
+def get_route_policy(route: APIRoute | RouteContext) -> RoutePolicy:
+    """The policy declared by the dependencies of the route."""
+    from bazis.contrib.async_background.routes import get_async_background_response
+
+    from .utils import require_async
+
+    if route.endpoint is get_async_background_response:
+        return RoutePolicy(mode=BackgroundMode.EXEMPT, path=route.path, results=True)
+    for call in _iter_calls(route.dependant):
+        if isinstance(call, AsyncPolicy):
+            return RoutePolicy(
+                mode=call.mode,
+                topic=call.topic,
+                priority=call.priority,
+                ttl=call.ttl,
+                partition_key=call.partition_key,
+                max_body_size=call.max_body_size,
+                cpu_bound=call.cpu_bound,
+                processing_status=call.processing_status,
+                path=route.path,
+            )
+        if call is require_async:
+            return RoutePolicy(mode=BackgroundMode.REQUIRED, path=route.path)
+    return RoutePolicy(path=route.path)
+
+
+def _split_path(path: str) -> list[str]:
+    return path.strip("/").split("/")
+
+
+class _Node:
+    __slots__ = ("children", "param", "tail", "policies")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _Node] = {}
+        self.param: _Node | None = None  # a "{name}" segment
+        self.tail: dict[str, RoutePolicy] | None = None  # a "{name:path}" segment: the rest
+        self.policies: dict[str, RoutePolicy] | None = None  # by method
+
+
+class PolicyTable:
+    """
+    Segment trie of the route policies: a lookup takes O(path length). Literal segments win
+    over path parameters, as in the route order of a typical application.
+    """
+
+    def __init__(self) -> None:
+        self.root = _Node()
+        self.has_forced = False
+        self.has_cpu_bound = False
+
+    def add(self, path: str, methods: Iterable[str], policy: RoutePolicy) -> None:
+        node = self.root
+        for segment in _split_path(path):
+            if segment.startswith("{") and segment.endswith("}"):
+                if segment.endswith(":path}"):
+                    node.tail = node.tail or {}
+                    for method in methods:
+                        node.tail.setdefault(method, policy)
+                    break
+                node.param = node.param or _Node()
+                node = node.param
+            else:
+                node = node.children.setdefault(segment, _Node())
+        else:
+            node.policies = node.policies or {}
+            for method in methods:
+                # the first route wins, as in the routing of the application
+                node.policies.setdefault(method, policy)
+        self.has_forced = self.has_forced or policy.mode == BackgroundMode.FORCE
+        self.has_cpu_bound = self.has_cpu_bound or policy.cpu_bound
+
+    def match(self, method: str, path: str) -> RoutePolicy:
+        """The policy of the request; DEFAULT_POLICY for an unknown route."""
+        return self._match(self.root, _split_path(path), 0, method) or DEFAULT_POLICY
+
+    def _match(
+        self, node: _Node, segments: list[str], index: int, method: str
+    ) -> RoutePolicy | None:
+        if index == len(segments):
+            return node.policies.get(method) if node.policies else None
+        segment = segments[index]
+        if (child := node.children.get(segment)) is not None:
+            if (policy := self._match(child, segments, index + 1, method)) is not None:
+                return policy
+        if node.param is not None and segment:
+            if (policy := self._match(node.param, segments, index + 1, method)) is not None:
+                return policy
+        if node.tail is not None:
+            return node.tail.get(method)
+        return None
+
+    @classmethod
+    def from_app(cls, app) -> PolicyTable:
+        """
+        Compiles the policies of the FastAPI routes of the application. Every route is added,
+        so that a route without a policy is not matched by the path parameter of another one.
+        The routes of the included routers are taken with their prefixes and dependencies.
+        """
+        table = cls()
+        for route in iter_route_contexts(getattr(app, "routes", ())):
+            if isinstance(route.original_route, APIRoute):
+                table.add(route.path, route.methods, get_route_policy(route))
+        return table
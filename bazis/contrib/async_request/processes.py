@@ -0,0 +1,101 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Process pool of a consumer for the CPU-bound routes (`AsyncPolicy(cpu_bound=True)`): their
+requests run in worker processes, so that they neither hold the GIL of the consumer nor stall
+its event loop. The pool is started and warmed when the consumer joins its group (see
+`tasks.ConsumerStartup`) and shut down when the consumer process exits. The workers are spawned
+once, set Django up in their initializer and keep an event loop of their own. A request crosses the process boundary as the Kafka message it came
+in (already encoded bytes), the result comes back as its dict.
+"""
+
+import asyncio
+import atexit
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+_pool: ProcessPoolExecutor | None = None
+_worker_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _init_worker() -> None:
+    import django
+
+    django.setup()
+    from bazis.core.app import app  # noqa: F401
+
+    global _worker_loop
+    _worker_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_worker_loop)
+
+
+def _ping() -> None:
+    """Nothing: submitted once per worker to start the workers ahead of the first request."""
+
+
+def _execute(data: bytes) -> dict:
+    from .codec import decode_task
+    from .tasks import execute_internal_request
+
+    return _worker_loop.run_until_complete(execute_internal_request(decode_task(data)))
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    The process pool of the consumer. Unless started, it is started with
+    ASYNC_REQUEST_PROCESS_POOL_SIZE workers and warmed: every worker is spawned and sets Django
+    up ahead of the requests.
+    """
+    global _pool
+    if _pool is None:
+        workers = settings.ASYNC_REQUEST_PROCESS_POOL_SIZE or os.cpu_count() or 1
+        _pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=get_context("spawn"), initializer=_init_worker
+        )
+        for _ in range(workers):
+            _pool.submit(_ping)
+    return _pool
+
+
+@atexit.register
+def stop_process_pool() -> None:
+    """Shuts the process pool down: the running requests finish, the queued ones are cancelled."""
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+async def execute_in_process(data: bytes) -> dict:
+    """Executes the background request of the Kafka message in a worker of the process pool."""
+    global _pool
+    pool = get_process_pool()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, _execute, data)
+    except BrokenProcessPool:
+        # a worker died (e.g. killed for its memory): the next request starts a new pool
+        logger.error("The process pool of the consumer is broken, it is restarted.")
+        if _pool is pool:
+            _pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
@@ -0,0 +1,251 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable, Sequence
+from uuid import uuid4
+
+from django.conf import settings
+
+from bazis.contrib.async_background.broker import get_started_broker_for_async
+from bazis.contrib.async_background.schemas import KafkaTask, TaskStatus
+from bazis.contrib.async_background.utils import set_and_publish_status_async
+from bazis.contrib.ws.utils import drop_closed_loops
+
+from .admission import release_channel_task
+from .codec import encode_headers, encode_task
+from .scheduling import schedule_encoded
+from .schemas import AsyncRequestPayload
+from .utils import drop_body, release_task_id
+
+
+logger = logging.getLogger(__name__)
+
+
+async def publish_encoded(
+    topic_name: str,
+    data: bytes,
+    partition_marker: str | None = None,
+    headers: dict[str, str] | None = None,
+) -> None:
+    """Publishes an encoded message to Kafka."""
+    broker = await get_started_broker_for_async()
+    await broker.publish(
+        data,
+        topic_name,
+        key=partition_marker.encode("utf-8") if partition_marker else None,
+        headers=headers,
+    )
+
+
+# the topic, the message, the partition marker, the headers and the future of the publication
+_Publication = tuple[str, bytes, str | None, dict[str, str] | None, asyncio.Future]
+
+
+class BatchPublisher:
+    """
+    Micro-batching of the publications of an event loop. A flusher publishes the queued
+    messages concurrently in batches of up to ASYNC_REQUEST_PRODUCER_BATCH_SIZE, after
+    ASYNC_REQUEST_PRODUCER_LINGER_MS at most: the Kafka producer sends the messages of a batch
+    in one request per partition. A batch is dispatched without waiting for the ack of the
+    previous one; the messages queued or awaiting their ack are bounded by
+    ASYNC_REQUEST_PRODUCER_QUEUE_SIZE (beyond it the callers wait).
+    """
+
+    def __init__(self, publish: Callable[..., Awaitable[None]] = publish_encoded) -> None:
+        self.publish = publish
+        self.queue: asyncio.Queue[_Publication] = asyncio.Queue()
+        self.slots = asyncio.Semaphore(settings.ASYNC_REQUEST_PRODUCER_QUEUE_SIZE)
+        self.flusher: asyncio.Task | None = None
+        #: the batches awaiting their ack (the loop keeps weak refs)
+        self.in_flight: set[asyncio.Task] = set()
+
+    async def submit(
+        self,
+        topic_name: str,
+        data: bytes,
+        partition_marker: str | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> asyncio.Future:
+        """Queues the message; the returned future is resolved when Kafka acknowledges it."""
+        if self.flusher is None or self.flusher.done():
+            self.flusher = asyncio.create_task(self._flush_forever())
+        await self.slots.acquire()
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((topic_name, data, partition_marker, headers, future))
+        return future
+
+    async def join(self) -> None:
+        """Waits until every queued message is published."""
+        await self.queue.join()
+
+    async def _flush_forever(self) -> None:
+        batch_size = settings.ASYNC_REQUEST_PRODUCER_BATCH_SIZE
+        linger = settings.ASYNC_REQUEST_PRODUCER_LINGER_MS / 1000
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + linger
+            while len(batch) < batch_size:
+                if not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                    continue
+                if (timeout := deadline - loop.time()) <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except TimeoutError:
+                    break
+            task = asyncio.create_task(self._publish(batch))
+            self.in_flight.add(task)
+            task.add_done_callback(self.in_flight.discard)
+
+    async def _publish(self, batch: list[_Publication]) -> None:
+        results = await asyncio.gather(
+            *(self.publish(*publication) for *publication, _ in batch),
+            return_exceptions=True,
+        )
+        for (*_, future), result in zip(batch, results, strict=True):
+            if not future.done():
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(None)
+            self.slots.release()
+            self.queue.task_done()
+
+
+_publishers_by_loop: dict[asyncio.AbstractEventLoop, BatchPublisher] = {}
+
+
+def get_batch_publisher() -> BatchPublisher:
+    """Returns the batch publisher of the running event loop."""
+    loop = asyncio.get_running_loop()
+    publisher = _publishers_by_loop.get(loop)
+    if publisher is None:
+        drop_closed_loops(_publishers_by_loop)
+        publisher = _publishers_by_loop[loop] = BatchPublisher()
+    return publisher
+
+
+async def flush_batch_publisher() -> None:
+    """Publishes the queued messages of the running event loop (e.g. before a shutdown)."""
+    if (publisher := _publishers_by_loop.get(asyncio.get_running_loop())) is not None:
+        await publisher.join()
+
+
+#: the tasks that watch the fire-and-forget publications (the loop keeps weak refs)
+_status_tasks: set[asyncio.Task] = set()
+
+
+async def enqueue_request_async(
+    *,
+    topic_name: str,
+    channel_name: str,
+    payload: AsyncRequestPayload,
+    partition_marker: str | None = None,
+    task_id: str | None = None,
+    not_before: float | None = None,
+    reserved_keys: Sequence[str] = (),
+) -> KafkaTask[AsyncRequestPayload]:
+    """
+    The `enqueue_task_async` of bazis-async-background for background requests: the message
+    is encoded in ASYNC_REQUEST_WIRE_FORMAT. The task id is generated unless given (it may be
+    reserved before the task is enqueued). A task with `not_before` (a Unix time) is kept by the
+    scheduled store and published when due; it stays CREATED until then.
+
+    With ASYNC_REQUEST_PRODUCER_BATCHING the message goes through the batch publisher; without
+    ASYNC_REQUEST_PRODUCER_ACK it returns once the message is queued; a failed publication then
+    sets the FAILED status and drops the `reserved_keys` (idempotency, in-flight) of the task,
+    its place in the channel quota and its claim-checked body, which the caller can no longer
+    release.
+    """
+    task_id = task_id or str(uuid4())
+    message = KafkaTask[AsyncRequestPayload](
+        task_id=task_id,
+        channel_name=channel_name,
+        payload=payload,
+    )
+
+    # the status is pending before the publication: a consumer may process the task and store
+    # its result before the publication returns, which a later status would overwrite
+    await set_and_publish_status_async(
+        task_id=task_id,
+        channel_name=channel_name,
+        status=TaskStatus.CREATED if not_before is not None else TaskStatus.PENDING,
+    )
+
+    data = encode_task(message)
+    headers = encode_headers(message)
+    if not_before is not None:
+        await schedule_encoded(
+            task_id=task_id,
+            channel_name=channel_name,
+            topic_name=topic_name,
+            data=data,
+            partition_marker=partition_marker,
+            headers=headers,
+            not_before=not_before,
+        )
+        return message
+    if not settings.ASYNC_REQUEST_PRODUCER_BATCHING:
+        await _fail_unpublished(
+            message, publish_encoded(topic_name, data, partition_marker, headers)
+        )
+        return message
+
+    future = await get_batch_publisher().submit(topic_name, data, partition_marker, headers)
+    if settings.ASYNC_REQUEST_PRODUCER_ACK:
+        await _fail_unpublished(message, future)
+    else:
+        task = asyncio.create_task(_fail_detached(message, future, reserved_keys))
+        _status_tasks.add(task)
+        task.add_done_callback(_status_tasks.discard)
+    return message
+
+
+async def _fail_unpublished(
+    message: KafkaTask[AsyncRequestPayload], publication: Awaitable
+) -> None:
+    try:
+        await publication
+    except Exception as err:
+        # after a timeout the message may still have been delivered: a consumer can then
+        # process the task and replace this status
+        logger.exception("Kafka publish failed for task_id=%s", message.task_id)
+        await set_and_publish_status_async(
+            task_id=message.task_id,
+            channel_name=message.channel_name,
+            status=TaskStatus.FAILED,
+            response={"error": str(err)},
+        )
+        raise
+
+
+async def _fail_detached(
+    message: KafkaTask[AsyncRequestPayload], publication: Awaitable, reserved_keys: Sequence[str]
+) -> None:
+    try:
+        await _fail_unpublished(message, publication)
+    except Exception:
+        # the client got its 202: a retry must not be bound to the failed task
+        try:
+            for redis_key in reserved_keys:
+                await release_task_id(redis_key, message.task_id)
+            await release_channel_task(message.channel_name, message.task_id)
+        except Exception:
+            logger.exception("Failed to release the reservations of task_id=%s", message.task_id)
+        if message.payload.body_ref:
+            await drop_body(message.task_id, message.payload.body_ref)
@@ -0,0 +1,138 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import json
+from collections.abc import AsyncIterator
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+
+from fastapi import Depends, Request
+from fastapi.responses import StreamingResponse
+
+from bazis.contrib.async_background.utils import (
+    ChannelNameError,
+    get_task_data_async,
+    resolve_channel_name_async,
+)
+from bazis.core.errors import JsonApi401Exception, JsonApi403Exception, JsonApiHttpException
+from bazis.core.routing import BazisRouter
+
+from .cancellation import request_cancellation
+from .notifications import FINAL_STATUSES, get_status_listener
+from .policy import AsyncPolicy, BackgroundMode
+from .scheduling import expedite
+
+
+router = BazisRouter(
+    tags=[_('Async requests')],
+    dependencies=[Depends(AsyncPolicy(BackgroundMode.EXEMPT))],
+)
+
+
+def _event(notification: dict) -> str:
+    return f'event: status\ndata: {json.dumps(notification, ensure_ascii=False)}\n\n'
+
+
+async def _stream(channel_name: str, task_id: str | None = None) -> AsyncIterator[str]:
+    """
+    The status notifications of the channel (of one task if `task_id` is given) as server-sent
+    events. The stream of a task starts with its current status and ends with a final one.
+    """
+    async with get_status_listener().listen(channel_name) as queue:
+        if task_id is not None:
+            # read after the subscription: a later change is in the queue
+            task_data = await get_task_data_async(task_id) or {}
+            status = task_data.get('status')
+            yield _event({'status': status, 'task_id': task_id, 'action': 'async_bg'})
+            if status in FINAL_STATUSES:
+                return
+        while True:
+            try:
+                notification = await asyncio.wait_for(
+                    queue.get(), settings.ASYNC_REQUEST_SSE_KEEPALIVE_SEC
+                )
+            except TimeoutError:
+                # a comment keeps the proxies from closing an idle stream
+                yield ': keepalive\n\n'
+                continue
+            if task_id is not None and notification.get('task_id') != task_id:
+                continue
+            yield _event(notification)
+            if task_id is not None and notification.get('status') in FINAL_STATUSES:
+                return
+
+
+def _event_stream(events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+async def _channel_name(request: Request) -> str:
+    try:
+        return await resolve_channel_name_async(request)
+    except ChannelNameError as err:
+        raise JsonApi401Exception from err
+
+
+@router.get('/async_request/events/')
+async def get_async_request_events(request: Request) -> StreamingResponse:
+    """
+    Streams the status changes of all the background tasks of the client as server-sent events.
+    """
+    return _event_stream(_stream(await _channel_name(request)))
+
+
+async def _own_task(request: Request, task_id: str) -> tuple[str, dict]:
+    """The channel of the client and the data of its task (404 if unknown, 403 if not its own)."""
+    channel_name = await _channel_name(request)
+
+    task_data = await get_task_data_async(task_id)
+    if not task_data:
+        raise JsonApiHttpException(404, detail=_('Unknown task ID'), code='ERR_TASK_NOT_FOUND')
+    if channel_name != task_data.get('channel_name'):
+        raise JsonApi403Exception
+    return channel_name, task_data
+
+
+@router.get('/async_request/events/{task_id}/')
+async def get_async_request_task_events(request: Request, task_id: str) -> StreamingResponse:
+    """
+    Streams the status changes of a background task of the client as server-sent events, up to
+    its final status.
+    """
+    channel_name, _task_data = await _own_task(request, task_id)
+    return _event_stream(_stream(channel_name, task_id))
+
+
+@router.delete('/async_background_response/{task_id}/', status_code=202)
+async def cancel_async_background_task(request: Request, task_id: str) -> dict:
+    """
+    Cancels a background task of the client. A task that has not started is not executed; a
+    running one is asked to stop (see TaskCancellation). Either ends with the cancelled status.
+    """
+    _channel, task_data = await _own_task(request, task_id)
+    if task_data.get('status') in FINAL_STATUSES:
+        raise JsonApiHttpException(
+            409, detail=_('The task is already finished'), code='ERR_TASK_FINISHED'
+        )
+
+    await request_cancellation(task_id)
+    # a delayed task is released at once to be cancelled by the releaser
+    await expedite(task_id)
+    return {'data': None, 'meta': {'async_request_id': task_id}}
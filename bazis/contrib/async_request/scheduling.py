@@ -0,0 +1,306 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Delayed execution: a background request with `X-Async-Not-Before` or `X-Async-Delay` is kept
+in Redis (a sorted set of the task ids by the due time and a hash of the encoded messages)
+instead of Kafka, so that it occupies no consumer until it is due. A releaser of each web
+worker sleeps until the next due request and publishes the due ones in batches. The time
+headers of the deadline of a request (after which the consumer expires it) are parsed here too.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+
+from django.conf import settings
+
+from bazis.contrib.async_background.schemas import TaskStatus
+from bazis.contrib.async_background.utils import get_redis_async, set_and_publish_status_async
+from bazis.contrib.ws.utils import drop_closed_loops
+
+from .cancellation import cancelled_task_ids
+from .codec import HEADER_BODY_REF, HEADER_INFLIGHT_KEY
+from .schemas import AsyncRequestStatus
+from .utils import skip_task
+
+
+logger = logging.getLogger(__name__)
+
+SCHEDULED_KEY = "async_request:scheduled"
+SCHEDULED_MESSAGES_KEY = "async_request:scheduled:messages"
+
+#: the time a claimed request is hidden from the other releasers: if its releaser dies before
+#: the request is published, it is released again after that time
+CLAIM_LEASE_SEC = 60
+
+# claims up to ARGV[2] requests due by ARGV[1]: they get the lease (ARGV[3]) as the due time
+_CLAIM_DUE = """
+local ids = redis.call("zrangebyscore", KEYS[1], "-inf", ARGV[1], "limit", 0, ARGV[2])
+local claimed = {}
+for _, id in ipairs(ids) do
+    redis.call("zadd", KEYS[1], ARGV[3], id)
+    claimed[#claimed + 1] = id
+    claimed[#claimed + 1] = redis.call("hget", KEYS[2], id) or ""
+end
+return claimed
+"""
+
+
+def _parse_time(value: str, header: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        moment = None
+    if moment is None or moment.tzinfo is None:
+        raise ValueError(f"{header} must be a Unix timestamp or an ISO 8601 time with an offset.")
+    return moment.timestamp()
+
+
+def parse_not_before(headers) -> float | None:
+    """
+    The Unix time before which the request must not execute: X-Async-Not-Before (a Unix
+    timestamp or an ISO 8601 time with an offset) or X-Async-Delay (seconds). None if the
+    request is not delayed or already due; ValueError for an invalid or too distant time.
+    """
+    not_before = headers.get("x-async-not-before")
+    delay = headers.get("x-async-delay")
+    if not_before is None and delay is None:
+        return None
+    now = time.time()
+    if not_before is not None:
+        due = _parse_time(not_before, "X-Async-Not-Before")
+    else:
+        try:
+            due = now + float(delay)
+        except ValueError:
+            raise ValueError("X-Async-Delay must be a number of seconds.") from None
+    # NaN fails the comparison as well
+    if not due - now <= settings.ASYNC_REQUEST_MAX_DELAY_SEC:
+        raise ValueError(
+            f"A request may be delayed by {settings.ASYNC_REQUEST_MAX_DELAY_SEC} seconds at most."
+        )
+    return due if due > now else None
+
+
+def parse_deadline(headers, ttl: float | None, not_before: float | None = None) -> float | None:
+    """
+    The Unix time after which the task is expired instead of executed: X-Async-Deadline (in
+    the formats of X-Async-Not-Before) or the TTL of the route counted from the time the
+    request is due, whichever is earlier. ValueError for an invalid deadline or one that
+    passes before the request is due.
+    """
+    start = not_before or time.time()
+    deadlines = []
+    if (value := headers.get("x-async-deadline")) is not None:
+        deadlines.append(_parse_time(value, "X-Async-Deadline"))
+    if ttl is not None:
+        deadlines.append(start + ttl)
+    if not deadlines:
+        return None
+    deadline = min(deadlines)
+    if not deadline > start:
+        raise ValueError("The deadline of the request passes before it is due.")
+    return deadline
+
+
+def _pack(
+    task_id: str,
+    channel_name: str,
+    topic_name: str,
+    data: bytes,
+    partition_marker: str | None,
+    headers: dict[str, str] | None,
+) -> bytes:
+    # a JSON line of the envelope followed by the encoded message
+    envelope = json.dumps([task_id, channel_name, topic_name, partition_marker, headers])
+    return envelope.encode() + b"\n" + data
+
+
+def _unpack(record: bytes) -> tuple[str, str, str, bytes, str | None, dict[str, str] | None]:
+    envelope, data = record.split(b"\n", 1)
+    task_id, channel_name, topic_name, partition_marker, headers = json.loads(envelope)
+    return task_id, channel_name, topic_name, data, partition_marker, headers
+
+
+async def schedule_encoded(
+    *,
+    task_id: str,
+    channel_name: str,
+    topic_name: str,
+    data: bytes,
+    partition_marker: str | None,
+    headers: dict[str, str] | None,
+    not_before: float,
+) -> None:
+    """Keeps the encoded message until `not_before`, then the releaser publishes it."""
+    async with get_redis_async().pipeline(transaction=True) as pipe:
+        pipe.hset(
+            SCHEDULED_MESSAGES_KEY,
+            task_id,
+            _pack(task_id, channel_name, topic_name, data, partition_marker, headers),
+        )
+        pipe.zadd(SCHEDULED_KEY, {task_id: not_before})
+        await pipe.execute()
+    get_scheduled_releaser().notify(not_before)
+
+
+async def expedite(task_id: str) -> bool:
+    """Makes a scheduled request due now (e.g. to cancel it at once); False if it is not one."""
+    now = time.time()
+    if not await get_redis_async().zadd(SCHEDULED_KEY, {task_id: now}, xx=True, ch=True):
+        return False
+    get_scheduled_releaser().notify(now)
+    return True
+
+
+class ScheduledReleaser:
+    """
+    Publishes the due requests of all workers. Between the batches it sleeps until the next due
+    request, at most ASYNC_REQUEST_SCHEDULER_POLL_SEC (the requests scheduled by the other
+    workers are seen within it); a request scheduled earlier by this worker wakes it up.
+    """
+
+    def __init__(self) -> None:
+        self.task: asyncio.Task | None = None
+        self.wakeup = asyncio.Event()
+        self.next_due: float | None = None
+
+    def start(self) -> None:
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._release_forever())
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    def notify(self, due: float) -> None:
+        """A request was scheduled by this worker."""
+        self.start()
+        if self.next_due is None or due < self.next_due:
+            self.wakeup.set()
+
+    async def _release_forever(self) -> None:
+        batch_size = settings.ASYNC_REQUEST_SCHEDULER_BATCH_SIZE
+        while True:
+            self.wakeup.clear()
+            try:
+                if await self.release_due(batch_size) == batch_size:
+                    continue
+                timeout = await self._time_to_next_due()
+            except Exception:
+                logger.exception("Failed to release the scheduled requests")
+                timeout = settings.ASYNC_REQUEST_SCHEDULER_POLL_SEC
+            try:
+                async with asyncio.timeout(timeout):
+                    await self.wakeup.wait()
+            except TimeoutError:
+                pass
+
+    async def _time_to_next_due(self) -> float:
+        poll = settings.ASYNC_REQUEST_SCHEDULER_POLL_SEC
+        first = await get_redis_async().zrange(SCHEDULED_KEY, 0, 0, withscores=True)
+        self.next_due = first[0][1] if first else None
+        if self.next_due is None:
+            return poll
+        return min(max(self.next_due - time.time(), 0), poll)
+
+    async def release_due(self, batch_size: int) -> int:
+        """Publishes up to `batch_size` due requests; returns the number of claimed ones."""
+        from .producer import publish_encoded
+
+        client = get_redis_async()
+        now = time.time()
+        claimed = await client.eval(
+            _CLAIM_DUE,
+            2,
+            SCHEDULED_KEY,
+            SCHEDULED_MESSAGES_KEY,
+            now,
+            batch_size,
+            now + CLAIM_LEASE_SEC,
+        )
+        pairs = list(zip(claimed[::2], claimed[1::2], strict=True))
+        records = [_unpack(record) for _, record in pairs if record]
+        # the ids without a message (dropped meanwhile) are removed as well
+        done = [task_id.decode() for task_id, record in pairs if not record]
+
+        cancelled = await cancelled_task_ids(record[0] for record in records)
+        for task_id, channel_name, *_, headers in records:
+            if task_id in cancelled:
+                await skip_task(
+                    task_id,
+                    channel_name,
+                    AsyncRequestStatus.CANCELLED,
+                    inflight_key=(headers or {}).get(HEADER_INFLIGHT_KEY),
+                    body_ref=(headers or {}).get(HEADER_BODY_REF),
+                )
+                done.append(task_id)
+        records = [record for record in records if record[0] not in cancelled]
+
+        # the status is pending before the publication: a consumer may store the result of
+        # the task before the publication returns
+        await asyncio.gather(
+            *(
+                set_and_publish_status_async(
+                    task_id=task_id, channel_name=channel_name, status=TaskStatus.PENDING
+                )
+                for task_id, channel_name, *_ in records
+            )
+        )
+        results = await asyncio.gather(
+            *(
+                publish_encoded(topic_name, data, partition_marker, headers)
+                for _, _, topic_name, data, partition_marker, headers in records
+            ),
+            return_exceptions=True,
+        )
+        for (task_id, channel_name, *_), result in zip(records, results, strict=True):
+            if isinstance(result, BaseException):
+                # it stays claimed: the lease expires and the request is released again
+                logger.error("Failed to release task_id=%s: %s", task_id, result)
+                await set_and_publish_status_async(
+                    task_id=task_id, channel_name=channel_name, status=TaskStatus.CREATED
+                )
+                continue
+            done.append(task_id)
+        if done:
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.zrem(SCHEDULED_KEY, *done)
+                pipe.hdel(SCHEDULED_MESSAGES_KEY, *done)
+                await pipe.execute()
+        if pairs:
+            logger.debug("Released %s of %s scheduled requests.", len(done), len(pairs))
+        return len(pairs)
+
+
+_releasers_by_loop: dict[asyncio.AbstractEventLoop, ScheduledReleaser] = {}
+
+
+def get_scheduled_releaser() -> ScheduledReleaser:
+    """The releaser of the running event loop."""
+    loop = asyncio.get_running_loop()
+    releaser = _releasers_by_loop.get(loop)
+    if releaser is None:
+        drop_closed_loops(_releasers_by_loop)
+        releaser = _releasers_by_loop[loop] = ScheduledReleaser()
+    return releaser
@@ -12,8 +12,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import base64
+from enum import StrEnum
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_serializer, field_validator
+
+
+class AsyncRequestStatus(StrEnum):
+    """Statuses of background requests in addition to the TaskStatus of bazis-async-background."""
+
+    EXPIRED = "expired"  # The deadline passed before the task was executed
+    CANCELLED = "cancelled"  # The client cancelled the task
 
 
 class AsyncRequestPayload(BaseModel):
@@ -30,6 +39,39 @@ class AsyncRequestPayload(BaseModel):
     http_version: str = Field(..., description="HTTP version")
     scheme: str = Field(..., description="Request scheme")
     body: dict | list[dict] = Field(default_factory=dict, description="Request body")
+    raw_body: bytes | None = Field(
+        None, description="Original request body bytes (ASYNC_REQUEST_RAW_BODY)"
+    )
+    body_ref: str | None = Field(
+        None, description="Key of the request body in the blob store (claim check)"
+    )
+    inflight_key: str | None = Field(
+        None, description="Redis key that attaches identical requests to the task while it runs"
+    )
+    route_key: str | None = Field(
+        None, description="Method and path template of the route (its latency estimate)"
+    )
+    deadline: float | None = Field(
+        None, description="Unix time after which the task is expired instead of executed"
+    )
+    cpu_bound: bool = Field(
+        False, description="Execute the request in the process pool of the consumer"
+    )
+    processing_status: bool = Field(
+        True, description="Write the processing status before the final one"
+    )
+
+    @field_serializer("raw_body", when_used="json")
+    def serialize_raw_body(self, value: bytes | None) -> str | None:
+        # a JSON message cannot hold arbitrary bytes; msgpack stores them as they are
+        return base64.b64encode(value).decode("ascii") if value is not None else None
+
+    @field_validator("raw_body", mode="before")
+    @classmethod
+    def validate_raw_body(cls, value):
+        if isinstance(value, str):
+            return base64.b64decode(value)
+        return value
 
     class Config:
         json_encoders = {bytes: lambda v: v.decode("utf-8")}
@@ -0,0 +1,42 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Instrumentation hooks of background requests. Receivers are connected as to any Django
+signal; a signal without receivers costs nothing::
+
+    from bazis.contrib.async_request.signals import headers_filtered
+
+    @receiver(headers_filtered)
+    def count_header_bytes(sender, kept_bytes, dropped_bytes, **kwargs):
+        metrics.counter("async_request_header_bytes_dropped").inc(dropped_bytes)
+"""
+
+from django.dispatch import Signal
+
+
+#: the header policy was applied to a payload: kept_bytes, dropped_bytes, dropped_count
+headers_filtered = Signal()
+
+#: a background request was not admitted: reason (lag, redis_memory or channel_quota),
+#: channel_name (None before it is resolved), inline (executed inline instead of 429)
+request_shed = Signal()
+
+#: a consumer took a background request for execution: lane, task_id, queue_wait_ms (the time
+#: since the request was published, the wait for an execution slot included)
+task_dequeued = Signal()
+
+#: a consumer took a background request for execution, with the threads of its sync endpoints:
+#: total, borrowed, waiting (tasks waiting for a thread) and saturation (borrowed / total)
+threads_used = Signal()
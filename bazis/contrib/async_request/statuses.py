@@ -0,0 +1,99 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Pipelined status writes of a consumer. `set_and_publish_status_async` takes two round trips
+(SET, then PUBLISH) per status; the writer queues the statuses of the concurrent tasks and
+writes all that are queued in one pipeline, while the next ones queue behind it. The records
+and messages are built by the helpers of bazis-async-background.
+"""
+
+import asyncio
+import logging
+from enum import StrEnum
+
+from django.conf import settings
+
+from bazis.contrib.async_background.utils import (
+    StatusStorageError,
+    _status_data,
+    _status_message,
+    get_redis_async,
+    task_key,
+)
+from bazis.contrib.ws.utils import drop_closed_loops
+
+
+logger = logging.getLogger(__name__)
+
+_Write = tuple[str, str, str, str, asyncio.Future]  # key, record, channel, message, future
+
+
+class StatusWriter:
+    """Writes the statuses queued since the last round trip to Redis in one pipeline."""
+
+    def __init__(self) -> None:
+        self.pending: list[_Write] = []
+        self.flusher: asyncio.Task | None = None
+
+    async def write(
+        self, task_id: str, channel_name: str, status: StrEnum, response: dict | None = None
+    ) -> None:
+        """Stores the status of the task and publishes it to the channel (StatusStorageError)."""
+        record = _status_data(channel_name, status, response)
+        message = _status_message(task_id, status)
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((task_key(task_id), record, channel_name, message, future))
+        if self.flusher is None or self.flusher.done():
+            self.flusher = asyncio.create_task(self._flush())
+        await future
+
+    async def _flush(self) -> None:
+        while self.pending:
+            writes, self.pending = self.pending, []
+            try:
+                async with get_redis_async().pipeline(transaction=False) as pipe:
+                    for key, record, channel_name, message, _ in writes:
+                        pipe.set(key, record, ex=settings.KAFKA_RESPONSE_HOLD_SEC)
+                        pipe.publish(channel_name, message)
+                    await pipe.execute()
+            except Exception as err:
+                logger.exception("Failed to write %s task statuses to Redis", len(writes))
+                for *_, future in writes:
+                    if not future.done():
+                        future.set_exception(StatusStorageError(f"Redis pipeline failed: {err}"))
+            else:
+                for *_, future in writes:
+                    if not future.done():
+                        future.set_result(None)
+
+
+_writers_by_loop: dict[asyncio.AbstractEventLoop, StatusWriter] = {}
+
+
+def get_status_writer() -> StatusWriter:
+    """The status writer of the running event loop."""
+    loop = asyncio.get_running_loop()
+    writer = _writers_by_loop.get(loop)
+    if writer is None:
+        drop_closed_loops(_writers_by_loop)
+        writer = _writers_by_loop[loop] = StatusWriter()
+    return writer
+
+
+async def write_status(
+    task_id: str, channel_name: str, status: StrEnum, response: dict | None = None
+) -> None:
+    """`set_and_publish_status_async` through the status writer of the running loop."""
+    await get_status_writer().write(task_id, channel_name, status, response)
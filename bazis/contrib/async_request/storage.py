@@ -0,0 +1,172 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Blob stores of the claim check: a request body above ASYNC_REQUEST_CLAIM_CHECK_THRESHOLD
+is streamed to the store by the middleware, only its key travels through Kafka, and the
+consumer streams the body back into the internal request.
+"""
+
+import asyncio
+import logging
+import os
+from collections.abc import AsyncIterable, AsyncIterator
+from functools import cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+from bazis.contrib.async_background.utils import get_redis_async
+
+
+logger = logging.getLogger(__name__)
+
+
+class BlobNotFoundError(Exception):
+    """The body was not found in the blob store (expired or already consumed)."""
+
+
+async def rechunk(chunks: AsyncIterable[bytes], chunk_size: int) -> AsyncIterator[bytes]:
+    """Regroups a byte stream into chunks of `chunk_size` bytes (the last one may be shorter)."""
+    buffer = bytearray()
+    async for chunk in chunks:
+        buffer += chunk
+        while len(buffer) >= chunk_size:
+            yield bytes(buffer[:chunk_size])
+            del buffer[:chunk_size]
+    if buffer:
+        yield bytes(buffer)
+
+
+class BlobStore:
+    """Base class of the blob stores."""
+
+    def __init__(self) -> None:
+        self.chunk_size = settings.ASYNC_REQUEST_BLOB_CHUNK_SIZE
+
+    async def write(self, key: str, chunks: AsyncIterable[bytes]) -> int:
+        """Stores the stream under the key and returns its size."""
+        raise NotImplementedError
+
+    def read(self, key: str) -> AsyncIterator[bytes]:
+        """Streams the stored body; raises BlobNotFoundError for an unknown key."""
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        """Drops the stored body (an unknown key is ignored)."""
+        raise NotImplementedError
+
+
+class RedisBlobStore(BlobStore):
+    """
+    Stores a body as a Redis list of chunks, so that neither side holds more than one chunk
+    of the body in a command. The list expires after ASYNC_REQUEST_BLOB_TTL_SEC.
+    """
+
+    key_prefix = "async_request:blob:"
+
+    def _key(self, key: str) -> str:
+        return f"{self.key_prefix}{key}"
+
+    async def write(self, key: str, chunks: AsyncIterable[bytes]) -> int:
+        client = get_redis_async()
+        redis_key = self._key(key)
+        size = 0
+        try:
+            async for chunk in rechunk(chunks, self.chunk_size):
+                await client.rpush(redis_key, chunk)
+                if not size:
+                    await client.expire(redis_key, settings.ASYNC_REQUEST_BLOB_TTL_SEC)
+                size += len(chunk)
+        except BaseException:
+            await client.delete(redis_key)
+            raise
+        return size
+
+    async def read(self, key: str) -> AsyncIterator[bytes]:
+        client = get_redis_async()
+        redis_key = self._key(key)
+        if not await client.exists(redis_key):
+            raise BlobNotFoundError(key)
+        index = 0
+        while (chunk := await client.lindex(redis_key, index)) is not None:
+            yield chunk
+            index += 1
+
+    async def delete(self, key: str) -> None:
+        await get_redis_async().delete(self._key(key))
+
+
+class FileSystemBlobStore(BlobStore):
+    """
+    Stores a body as a file in ASYNC_REQUEST_BLOB_STORE_PATH. The directory must be shared by
+    the API and the consumers; bodies that were never consumed are not cleaned up.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        if not settings.ASYNC_REQUEST_BLOB_STORE_PATH:
+            raise ImproperlyConfigured(
+                "FileSystemBlobStore requires ASYNC_REQUEST_BLOB_STORE_PATH."
+            )
+        self.root = settings.ASYNC_REQUEST_BLOB_STORE_PATH
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        # the key comes from the Kafka message: it must not leave the root directory
+        if not key or os.path.basename(key) != key or key.startswith("."):
+            raise ValueError(f"Invalid blob key: {key!r}")
+        return os.path.join(self.root, key)
+
+    async def write(self, key: str, chunks: AsyncIterable[bytes]) -> int:
+        path = self._path(key)
+        tmp_path = f"{path}.part"
+        size = 0
+        file = await asyncio.to_thread(open, tmp_path, "wb")
+        try:
+            async for chunk in rechunk(chunks, self.chunk_size):
+                await asyncio.to_thread(file.write, chunk)
+                size += len(chunk)
+        except BaseException:
+            await asyncio.to_thread(file.close)
+            await asyncio.to_thread(os.remove, tmp_path)
+            raise
+        await asyncio.to_thread(file.close)
+        await asyncio.to_thread(os.replace, tmp_path, path)
+        return size
+
+    async def read(self, key: str) -> AsyncIterator[bytes]:
+        path = self._path(key)
+        try:
+            file = await asyncio.to_thread(open, path, "rb")
+        except FileNotFoundError as err:
+            raise BlobNotFoundError(key) from err
+        try:
+            while chunk := await asyncio.to_thread(file.read, self.chunk_size):
+                yield chunk
+        finally:
+            await asyncio.to_thread(file.close)
+
+    async def delete(self, key: str) -> None:
+        try:
+            await asyncio.to_thread(os.remove, self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+@cache
+def get_blob_store() -> BlobStore:
+    """Returns the blob store configured by ASYNC_REQUEST_BLOB_STORE."""
+    return import_string(settings.ASYNC_REQUEST_BLOB_STORE)()
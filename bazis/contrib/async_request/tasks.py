@@ -12,58 +12,285 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
 import json
 import logging
+import time
+from collections.abc import Mapping
+from functools import partial
 from urllib.parse import urlparse
 
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 
-from bazis.contrib.async_background.broker import get_broker_for_consumer
+from aiokafka import ConsumerRebalanceListener
+from faststream import AckPolicy, Context
+from faststream.kafka import KafkaMessage
+
+from bazis.contrib.async_background.broker import get_broker_for_consumer, subscriber_kwargs
 from bazis.contrib.async_background.schemas import KafkaTask, TaskStatus
-from bazis.contrib.async_background.utils import set_and_publish_status_async
-from bazis.contrib.async_request.schemas import AsyncRequestPayload
+from bazis.contrib.async_request.cancellation import TASK_ID_HEADER, is_cancelled
+from bazis.contrib.async_request.codec import (
+    HEADER_BODY_REF,
+    HEADER_CHANNEL,
+    HEADER_DEADLINE,
+    HEADER_INFLIGHT_KEY,
+    HEADER_TASK_ID,
+    WireFormatError,
+    decode_task,
+)
+from bazis.contrib.async_request.executor import get_ordered_executor
+from bazis.contrib.async_request.lanes import DEFAULT_LANE, get_lane_scheduler, get_lane_topics
+from bazis.contrib.async_request.latency import record_latency
+from bazis.contrib.async_request.policy import PolicyTable
+from bazis.contrib.async_request.processes import execute_in_process, get_process_pool
+from bazis.contrib.async_request.schemas import AsyncRequestPayload, AsyncRequestStatus
+from bazis.contrib.async_request.signals import task_dequeued, threads_used
+from bazis.contrib.async_request.statuses import write_status
+from bazis.contrib.async_request.storage import get_blob_store
+from bazis.contrib.async_request.threads import configure_consumer_threads, thread_usage
+from bazis.contrib.async_request.utils import (
+    ResponseCollector,
+    drop_body,
+    is_expired,
+    release_task_slots,
+    skip_task,
+)
 
 
 logger = logging.getLogger(__name__)
 
 
-_subscriber_kwargs: dict[str, object] = {
-    "auto_offset_reset": settings.KAFKA_AUTO_OFFSET_RESET,
-    "auto_commit": settings.KAFKA_ENABLE_AUTO_COMMIT,
-    "auto_commit_interval_ms": settings.KAFKA_AUTO_COMMIT_INTERVAL_MS,
-}
+class ConsumerStartup(ConsumerRebalanceListener):
+    """
+    Prepares the consumer when it joins its group (KAFKA_GROUP_ID), before it fetches a
+    message: FastStream brokers have no startup hook. The process pool of the CPU-bound routes
+    is started and warmed here, so that no request waits for its workers to spawn; without a
+    group the first CPU-bound request starts it.
+    """
+
+    async def on_partitions_revoked(self, revoked) -> None:
+        pass
+
+    async def on_partitions_assigned(self, assigned) -> None:
+        from bazis.core.app import app
+
+        if PolicyTable.from_app(app).has_cpu_bound:
+            get_process_pool()
+
+
+# with the ordered executor the offsets are committed once the requests are done
+BATCH_MODE = bool(settings.ASYNC_REQUEST_CONSUMER_BATCH_SIZE)
+EXECUTOR_MODE = BATCH_MODE or settings.ASYNC_REQUEST_CONSUMER_SLOTS > 1
+_subscriber_kwargs = (
+    subscriber_kwargs(ack_policy=AckPolicy.MANUAL) if EXECUTOR_MODE else subscriber_kwargs()
+)
 if settings.KAFKA_GROUP_ID:
-    _subscriber_kwargs["group_id"] = settings.KAFKA_GROUP_ID
+    _subscriber_kwargs["listener"] = ConsumerStartup()
+if BATCH_MODE:
+    _subscriber_kwargs.update(
+        batch=True,
+        max_records=settings.ASYNC_REQUEST_CONSUMER_BATCH_SIZE,
+        batch_timeout_ms=settings.ASYNC_REQUEST_CONSUMER_BATCH_TIMEOUT_MS,
+    )
+
+
+async def raw_message_decoder(message: KafkaMessage) -> bytes:
+    """Keeps the message undecoded: `decode_task` detects the wire format of each message."""
+    return message.body
+
+
+async def consume_message(lane: str, body: bytes, message: KafkaMessage) -> None:
+    """
+    Executes a background HTTP request of the lane, or with ASYNC_REQUEST_CONSUMER_SLOTS above
+    one hands it to the ordered executor of the lane and returns.
+    """
+    configure_consumer_threads()
+    record = message.raw_message
+    if EXECUTOR_MODE:
+        await get_ordered_executor(lane).submit(
+            record,
+            message.consumer,
+            partial(handle_message, lane, body, message.headers, record.timestamp),
+        )
+    else:
+        await handle_message(lane, body, message.headers, record.timestamp)
+
+
+async def consume_batch(lane: str, message: KafkaMessage) -> None:
+    """
+    Hands the background requests of a batch (up to ASYNC_REQUEST_CONSUMER_BATCH_SIZE messages)
+    to the ordered executor of the lane. A full executor holds the next batch back.
+    """
+    configure_consumer_threads()
+    executor = get_ordered_executor(lane)
+    for record in message.raw_message:
+        headers = {key: value.decode() for key, value in record.headers or ()}
+        await executor.submit(
+            record,
+            message.consumer,
+            partial(handle_message, lane, record.value, headers, record.timestamp),
+        )
+
+
+async def handle_message(
+    lane: str, body: bytes, headers: Mapping[str, str], timestamp: int
+) -> None:
+    """
+    Executes a background HTTP request of the lane in a slot of the lane scheduler. The headers
+    and the timestamp (ms) are those of its Kafka message.
+    """
+    if HEADER_TASK_ID in headers and is_expired(headers.get(HEADER_DEADLINE)):
+        # the task is expired by its headers: the message is not even decoded
+        await skip_task(
+            headers[HEADER_TASK_ID],
+            headers.get(HEADER_CHANNEL, ""),
+            AsyncRequestStatus.EXPIRED,
+            inflight_key=headers.get(HEADER_INFLIGHT_KEY),
+            body_ref=headers.get(HEADER_BODY_REF),
+        )
+        return
+
+    try:
+        task = decode_task(body)
+    except (WireFormatError, ValueError, ImproperlyConfigured) as err:
+        # ImproperlyConfigured: a msgpack message reached a consumer without msgpack
+        logger.exception("Skipped a message that could not be decoded.")
+        if HEADER_TASK_ID in headers:
+            # the client would wait for the pending task forever
+            await skip_task(
+                headers[HEADER_TASK_ID],
+                headers.get(HEADER_CHANNEL, ""),
+                TaskStatus.FAILED,
+                inflight_key=headers.get(HEADER_INFLIGHT_KEY),
+                body_ref=headers.get(HEADER_BODY_REF),
+                response={"error": str(err)},
+            )
+        return
+
+    async with get_lane_scheduler().slot(lane):
+        # the time since the producer created the message, the wait for the slot included
+        queue_wait_ms = max(0.0, time.time() * 1000 - timestamp)
+        logger.debug("Task_id=%s waited %.0f ms in lane %s.", task.task_id, queue_wait_ms, lane)
+        task_dequeued.send(
+            sender=AsyncRequestPayload, lane=lane, task_id=task.task_id, queue_wait_ms=queue_wait_ms
+        )
+        threads_used.send(sender=AsyncRequestPayload, **thread_usage())
+        await process_task(task, body)
 
 
-@get_broker_for_consumer().subscriber(settings.KAFKA_TOPIC_ASYNC_BG, **_subscriber_kwargs)
-async def consumer_async_requests(task: KafkaTask[AsyncRequestPayload]):
-    """Executes a background HTTP request from Kafka."""
+def lane_consumer(lane: str, topics: list[str]):
+    """Subscribes a consumer of the lane to its topics."""
 
-    await set_and_publish_status_async(
-        task_id=task.task_id,
-        channel_name=task.channel_name,
-        status=TaskStatus.PROCESSING,
+    subscriber = get_broker_for_consumer().subscriber(
+        *topics, decoder=raw_message_decoder, title=f"async_request:{lane}", **_subscriber_kwargs
     )
+    if BATCH_MODE:
+
+        @subscriber
+        async def consumer_async_requests_batch(
+            bodies: list[bytes], message: KafkaMessage = Context()
+        ):
+            """Executes a batch of background HTTP requests from Kafka."""
+            await consume_batch(lane, message)
 
+        return consumer_async_requests_batch
+
+    @subscriber
+    async def consumer_async_requests(body: bytes, message: KafkaMessage = Context()):
+        """Executes a background HTTP request from Kafka."""
+        await consume_message(lane, body, message)
+
+    return consumer_async_requests
+
+
+lane_consumers = {lane: lane_consumer(lane, topics) for lane, topics in get_lane_topics().items()}
+consumer_async_requests = lane_consumers[DEFAULT_LANE]
+
+
+async def process_task(task: KafkaTask[AsyncRequestPayload], data: bytes | None = None) -> None:
+    """
+    Executes the task and stores its status and result. A CPU-bound task is executed in the
+    process pool if its Kafka message `data` is given.
+    """
+    payload = task.payload
+    if is_expired(payload.deadline):
+        # the deadline may have passed while the task waited for a slot
+        await skip_task(
+            task.task_id,
+            task.channel_name,
+            AsyncRequestStatus.EXPIRED,
+            inflight_key=payload.inflight_key,
+            body_ref=payload.body_ref,
+        )
+        return
+    if await is_cancelled(task.task_id):
+        await skip_task(
+            task.task_id,
+            task.channel_name,
+            AsyncRequestStatus.CANCELLED,
+            inflight_key=payload.inflight_key,
+            body_ref=payload.body_ref,
+        )
+        return
+
+    processing = None
+    if payload.processing_status:
+        if delay_ms := settings.ASYNC_REQUEST_PROCESSING_STATUS_DELAY_MS:
+            processing = asyncio.create_task(_report_processing(task, delay_ms / 1000))
+        else:
+            await write_status(task.task_id, task.channel_name, TaskStatus.PROCESSING)
+
+    started = time.perf_counter()
     try:
-        response = await execute_internal_request(task)
+        try:
+            if payload.cpu_bound and data is not None:
+                response = await execute_in_process(data)
+            else:
+                response = await execute_internal_request(task)
+        finally:
+            if processing is not None:
+                # a task that finished within the delay goes straight to its final status
+                processing.cancel()
     except Exception as err:
-        logger.exception("Failed to process task_id=%s", task.task_id)
-        await set_and_publish_status_async(
-            task_id=task.task_id,
-            channel_name=task.channel_name,
-            status=TaskStatus.FAILED,
-            response={"error": str(err)},
+        cancelled = await is_cancelled(task.task_id)
+        if not cancelled:
+            logger.exception("Failed to process task_id=%s", task.task_id)
+        await release_task_slots(task.task_id, task.channel_name, payload.inflight_key)
+        await write_status(
+            task.task_id,
+            task.channel_name,
+            AsyncRequestStatus.CANCELLED if cancelled else TaskStatus.FAILED,
+            {"error": str(err)},
         )
     else:
+        elapsed_ms = (time.perf_counter() - started) * 1000
         logger.info("Processed task_id=%s with status=%s.", task.task_id, response.get("status"))
-        await set_and_publish_status_async(
-            task_id=task.task_id,
-            channel_name=task.channel_name,
-            status=TaskStatus.COMPLETED,
-            response=response,
+        await release_task_slots(task.task_id, task.channel_name, payload.inflight_key)
+        # a task cancelled while it ran is cancelled even if the endpoint did not stop
+        cancelled = await is_cancelled(task.task_id)
+        await write_status(
+            task.task_id,
+            task.channel_name,
+            AsyncRequestStatus.CANCELLED if cancelled else TaskStatus.COMPLETED,
+            response,
         )
+        if payload.route_key:
+            try:
+                await record_latency(payload.route_key, elapsed_ms)
+            except Exception:
+                logger.warning("Failed to record the latency of task_id=%s", task.task_id)
+
+    if payload.body_ref:
+        await drop_body(task.task_id, payload.body_ref)
+
+
+async def _report_processing(task: KafkaTask[AsyncRequestPayload], delay: float) -> None:
+    await asyncio.sleep(delay)
+    try:
+        await write_status(task.task_id, task.channel_name, TaskStatus.PROCESSING)
+    except Exception:
+        logger.warning("Failed to write the processing status of task_id=%s", task.task_id)
 
 
 async def execute_internal_request(task: KafkaTask[AsyncRequestPayload]) -> dict:
@@ -72,7 +299,7 @@ async def execute_internal_request(task: KafkaTask[AsyncRequestPayload]) -> dict
 
     url = urlparse(request.path)
 
-    headers = []
+    headers = [(TASK_ID_HEADER.encode(), task.task_id.encode())]
     for key, value in request.headers:
         key_bytes = key if isinstance(key, bytes) else str(key).encode("utf-8")
         value_bytes = value if isinstance(value, bytes) else str(value).encode("utf-8")
@@ -90,38 +317,30 @@ async def execute_internal_request(task: KafkaTask[AsyncRequestPayload]) -> dict
         "client": request.request_client,
     }
 
-    result = {
-        "task_id": task.task_id,
-        "endpoint": request.path,
-        "status": None,
-        "headers": [],
-        "response": None,
-    }
+    if request.body_ref:
+        # the claim-checked body is streamed from the blob store chunk by chunk
+        chunks = get_blob_store().read(request.body_ref)
 
-    async def receive():
-        return {
-            "type": "http.request",
-            "body": json.dumps(request.body).encode("utf-8"),
-        }
-
-    async def send(message):
-        if message["type"] == "http.response.start":
-            result["status"] = message["status"]
-            decoded_headers = []
-            for key, value in message.get("headers", []):
-                key_str = key.decode("latin-1") if isinstance(key, (bytes, bytearray)) else str(key)
-                value_str = (
-                    value.decode("latin-1") if isinstance(value, (bytes, bytearray)) else str(value)
-                )
-                decoded_headers.append([key_str, value_str])
-            result["headers"] = decoded_headers
-        elif message["type"] == "http.response.body":
-            body = message.get("body", b"")
+        async def receive():
             try:
-                result["response"] = json.loads(body)
-            except Exception:
-                result["response"] = body.decode("utf-8", errors="replace")
+                chunk = await anext(chunks)
+            except StopAsyncIteration:
+                return {"type": "http.request", "body": b"", "more_body": False}
+            return {"type": "http.request", "body": chunk, "more_body": True}
+
+    else:
+        # the raw body is passed verbatim; a legacy payload carries the parsed JSON body
+        body = (
+            request.raw_body
+            if request.raw_body is not None
+            else json.dumps(request.body).encode("utf-8")
+        )
+
+        async def receive():
+            return {"type": "http.request", "body": body}
+
+    collector = ResponseCollector()
 
     from bazis.core.app import app
-    await app(scope, receive, send)
-    return result
\ No newline at end of file
+    await app(scope, receive, collector)
+    return collector.result(task.task_id, request.path)
@@ -0,0 +1,80 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Threads of a consumer. The sync endpoints and dependencies of the background requests run in
+the worker threads of anyio (Starlette's threadpool), the `asyncio.to_thread` calls in the
+default executor of the loop. A consumer bounds both with ASYNC_REQUEST_CONSUMER_THREADS, or
+with the size of the connection pool of the database, so that its threads never wait for a
+connection.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+import anyio.to_thread
+
+from bazis.contrib.ws.utils import drop_closed_loops
+
+
+_configured_loops: dict[asyncio.AbstractEventLoop, int | None] = {}
+
+
+def consumer_thread_count() -> int | None:
+    """
+    ASYNC_REQUEST_CONSUMER_THREADS, or the max_size of the connection pool of the default
+    database (`OPTIONS["pool"]`), or None to keep the defaults.
+    """
+    if settings.ASYNC_REQUEST_CONSUMER_THREADS:
+        return settings.ASYNC_REQUEST_CONSUMER_THREADS
+    pool = settings.DATABASES.get("default", {}).get("OPTIONS", {}).get("pool")
+    if isinstance(pool, dict) and pool.get("max_size"):
+        return int(pool["max_size"])
+    return None
+
+
+def configure_consumer_threads() -> None:
+    """
+    Sizes the thread limiter of anyio and the default executor of the running loop by
+    `consumer_thread_count`, once per loop: a consumer calls it before it takes a request.
+    """
+    loop = asyncio.get_running_loop()
+    if loop in _configured_loops:
+        return
+    drop_closed_loops(_configured_loops)
+    threads = _configured_loops[loop] = consumer_thread_count()
+    if threads:
+        anyio.to_thread.current_default_thread_limiter().total_tokens = threads
+        loop.set_default_executor(
+            ThreadPoolExecutor(max_workers=threads, thread_name_prefix="async_request")
+        )
+
+
+def get_thread_limiter() -> anyio.CapacityLimiter:
+    """The thread limiter of the running event loop (the default limiter of anyio)."""
+    return anyio.to_thread.current_default_thread_limiter()
+
+
+def thread_usage() -> dict[str, float]:
+    """The threads of the running loop: total, borrowed, waiting and saturation (borrowed/total)."""
+    limiter = get_thread_limiter()
+    stats = limiter.statistics()
+    return {
+        "total": limiter.total_tokens,
+        "borrowed": stats.borrowed_tokens,
+        "waiting": stats.tasks_waiting,
+        "saturation": stats.borrowed_tokens / limiter.total_tokens,
+    }
@@ -12,33 +12,182 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import codecs
+import hashlib
 import json
 import logging
+import re
+import time
+from enum import StrEnum
+from functools import cache
+from json.decoder import scanstring
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 
 from fastapi import HTTPException, Request, status
 
+from bazis.contrib.async_background.utils import get_redis_async
+
+from .admission import release_channel_task
 from .schemas import AsyncRequestPayload
+from .signals import headers_filtered
+from .statuses import write_status
+from .storage import get_blob_store
 
 
 logger = logging.getLogger(__name__)
 
+IDEMPOTENCY_KEY_PREFIX = "async_request:idempotency:"
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+INFLIGHT_KEY_PREFIX = "async_request:inflight:"
+
+
+class ResponseCollector:
+    """ASGI `send` that keeps the response of a request executed in the background."""
+
+    def __init__(self) -> None:
+        self.messages: list[dict] = []
+        self.complete = asyncio.Event()
+
+    async def __call__(self, message: dict) -> None:
+        self.messages.append(message)
+        if message["type"] == "http.response.body" and not message.get("more_body", False):
+            self.complete.set()
+
+    def result(self, task_id: str, endpoint: str) -> dict:
+        """The result of the task: the status, the headers and the (JSON) body."""
+        result = {
+            "task_id": task_id,
+            "endpoint": endpoint,
+            "status": None,
+            "headers": [],
+            "response": None,
+        }
+        body = b""
+        for message in self.messages:
+            if message["type"] == "http.response.start":
+                result["status"] = message["status"]
+                result["headers"] = [
+                    [key.decode("latin-1"), value.decode("latin-1")]
+                    for key, value in message.get("headers", [])
+                ]
+            elif message["type"] == "http.response.body":
+                body += message.get("body", b"")
+        try:
+            result["response"] = json.loads(body)
+        except Exception:
+            result["response"] = body.decode("utf-8", errors="replace")
+        return result
+
+
+class RequestBodyTooLargeError(Exception):
+    """The request body exceeds the size limit of the route."""
+
+
+async def read_request_body(request: Request, max_size: int | None = None) -> str | None:
+    """
+    Reads the request body. A body above ASYNC_REQUEST_CLAIM_CHECK_THRESHOLD is streamed to
+    the blob store as it arrives, and its key is returned instead of buffering it (the chunks
+    read up to the threshold are kept in the scope). A body above `max_size` raises
+    RequestBodyTooLargeError (nothing is left in the blob store).
+    """
+    threshold = settings.ASYNC_REQUEST_CLAIM_CHECK_THRESHOLD
+    stream = request.stream()
+    buffered: list[bytes] = []
+    size = 0
+    async for chunk in stream:
+        buffered.append(chunk)
+        size += len(chunk)
+        if max_size is not None and size > max_size:
+            raise RequestBodyTooLargeError(max_size)
+        if threshold is not None and size > threshold:
+            break
+    else:
+        request._body = b"".join(buffered)
+        return None
+
+    async def chunks():
+        streamed = size
+        for chunk in buffered:
+            yield chunk
+        async for chunk in stream:
+            streamed += len(chunk)
+            if max_size is not None and streamed > max_size:
+                raise RequestBodyTooLargeError(max_size)
+            yield chunk
+
+    body_ref = str(uuid4())
+    size = await get_blob_store().write(body_ref, chunks())
+    logger.debug("Request body of %s bytes moved to the blob store as %s", size, body_ref)
+    request._body = b""
+    # the partition key of the body is resolved from what was read before the spill
+    request.scope[BODY_PREFIX_SCOPE_KEY] = tuple(buffered)
+    return body_ref
+
 
-def build_request_payload(request: Request) -> AsyncRequestPayload:
+@cache
+def get_header_policy() -> tuple[frozenset[bytes] | None, frozenset[bytes]]:
+    """The allowed (None for any) and denied header names as the bytes of ASGI headers."""
+    allow = settings.ASYNC_REQUEST_HEADERS_ALLOW
+    deny = {"x-async-background", *settings.ASYNC_REQUEST_HEADERS_DENY}
+    return (
+        frozenset(name.lower().encode("latin-1") for name in allow) if allow is not None else None,
+        frozenset(name.lower().encode("latin-1") for name in deny),
+    )
+
+
+@receiver(setting_changed)
+def _reset_header_policy(*, setting, **kwargs):
+    if setting in ("ASYNC_REQUEST_HEADERS_ALLOW", "ASYNC_REQUEST_HEADERS_DENY"):
+        get_header_policy.cache_clear()
+
+
+def build_request_payload(
+    request: Request,
+    body_ref: str | None = None,
+    inflight_key: str | None = None,
+    route_key: str | None = None,
+    deadline: float | None = None,
+    cpu_bound: bool = False,
+    processing_status: bool = True,
+) -> AsyncRequestPayload:
     """Creates a payload for sending to Kafka."""
     body_raw: bytes = request.scope.get("_cached_body") or getattr(request, "_body", b"")
-    try:
-        body: dict = json.loads(body_raw.decode("utf-8")) if body_raw else {}
-    except json.JSONDecodeError:
-        body = {}
+    raw_body: bytes | None = None
+    body: dict = {}
+    if body_ref is None and settings.ASYNC_REQUEST_RAW_BODY:
+        raw_body = body_raw
+    elif body_ref is None and body_raw:
+        try:
+            body = json.loads(body_raw.decode("utf-8"))
+        except json.JSONDecodeError:
+            body = {}
 
+    allow, deny = get_header_policy()
     headers: list[tuple[str, str]] = []
+    kept_bytes = dropped_bytes = dropped_count = 0
     for k, v in request.scope.get("headers", []):
+        # the policy is checked on the raw names: dropped headers are never decoded
+        name = k.lower()
+        if name in deny or (allow is not None and name not in allow):
+            dropped_bytes += len(k) + len(v)
+            dropped_count += 1
+            continue
         try:
-            k_val, v_val = k.decode(), v.decode()
-            if k_val.lower() not in ("x-async-background",):
-                headers.append((k_val, v_val))
+            headers.append((k.decode(), v.decode()))
+            kept_bytes += len(k) + len(v)
         except Exception as e:
             logger.exception("Error decoding header: %s", e)
+    headers_filtered.send(
+        sender=AsyncRequestPayload,
+        kept_bytes=kept_bytes,
+        dropped_bytes=dropped_bytes,
+        dropped_count=dropped_count,
+    )
 
     headers.append(("x-async-background-internal", "true"))
 
@@ -52,9 +201,198 @@ def build_request_payload(request: Request) -> AsyncRequestPayload:
         http_version=request.scope["http_version"],
         scheme=request.scope["scheme"],
         body=body,
+        raw_body=raw_body,
+        body_ref=body_ref,
+        inflight_key=inflight_key,
+        route_key=route_key,
+        deadline=deadline,
+        cpu_bound=cpu_bound,
+        processing_status=processing_status,
     )
 
 
+def idempotency_key(channel_name: str, key: str) -> str:
+    return f"{IDEMPOTENCY_KEY_PREFIX}{channel_name}:{key}"
+
+
+def inflight_key(request: Request, channel_name: str) -> str:
+    """
+    The key of the in-flight task of identical requests: the method, the path, the query, the
+    channel of the client (the results are not shared between clients) and the headers of
+    ASYNC_REQUEST_COALESCE_HEADERS.
+    """
+    names = {name.lower().encode("latin-1") for name in settings.ASYNC_REQUEST_COALESCE_HEADERS}
+    parts = [
+        request.method.encode(),
+        request.scope["path"].encode(),
+        request.scope["query_string"],
+        channel_name.encode(),
+        *sorted(b"%s:%s" % (k, v) for k, v in request.scope["headers"] if k in names),
+    ]
+    fingerprint = hashlib.sha256(b"\n".join(parts)).hexdigest()
+    return f"{INFLIGHT_KEY_PREFIX}{fingerprint}"
+
+
+async def reserve_task_id(redis_key: str, task_id: str, ttl: int) -> str | None:
+    """
+    Atomically binds the key to the task for `ttl` seconds. Returns None if the key is now
+    reserved for `task_id`, or the id of the task the key was reserved for earlier.
+    """
+    client = get_redis_async()
+    while True:
+        if await client.set(redis_key, task_id, nx=True, ex=ttl):
+            return None
+        # the reservation may expire between the two commands: then it is taken again
+        if (existing := await client.get(redis_key)) is not None:
+            return existing.decode()
+
+
+async def release_task_ids(*redis_keys: str) -> None:
+    """Drops reservations, e.g. of a request that was not enqueued, so that a retry can pass."""
+    if redis_keys:
+        await get_redis_async().delete(*redis_keys)
+
+
+_RELEASE_OWN_KEY = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+async def release_task_id(redis_key: str, task_id: str) -> None:
+    """Drops the reservation if it still belongs to the task (it may have expired meanwhile)."""
+    await get_redis_async().eval(_RELEASE_OWN_KEY, 1, redis_key, task_id)
+
+
+def is_expired(deadline: float | str | None) -> bool:
+    """Whether the deadline (a Unix time, also as the string of a Kafka header) has passed."""
+    try:
+        return deadline is not None and float(deadline) < time.time()
+    except ValueError:
+        return False
+
+
+async def skip_task(
+    task_id: str,
+    channel_name: str,
+    status: StrEnum,
+    *,
+    inflight_key: str | None = None,
+    body_ref: str | None = None,
+    response: dict | None = None,
+) -> None:
+    """Ends a task that is not executed (expired, cancelled or undecodable) with the status."""
+    logger.info("Skipped task_id=%s: %s.", task_id, status)
+    await release_task_slots(task_id, channel_name, inflight_key)
+    await write_status(task_id, channel_name, status, response)
+    if body_ref:
+        await drop_body(task_id, body_ref)
+
+
+async def drop_body(task_id: str, body_ref: str) -> None:
+    """Drops the claim-checked body of a finished task."""
+    try:
+        await get_blob_store().delete(body_ref)
+    except Exception:
+        logger.exception("Failed to drop the body of task_id=%s", task_id)
+
+
+async def release_task_slots(task_id: str, channel_name: str, inflight_key: str | None) -> None:
+    """
+    Before the final status: ends the coalescing of the task (an identical request that comes
+    later gets a new task, one attached before gets the final status of this one) and frees
+    its place in the quota of the channel.
+    """
+    try:
+        if inflight_key:
+            await release_task_id(inflight_key, task_id)
+        await release_channel_task(channel_name, task_id)
+    except Exception:
+        logger.exception("Failed to release the reservations of task_id=%s", task_id)
+
+
+#: the scope key of the prefix of a claim-checked body: the chunks read before it was spilled
+BODY_PREFIX_SCOPE_KEY = "async_request.body_prefix"
+
+#: the JSON pointer of the id of the JSON:API object of a body
+OBJECT_ID_POINTER = "/data/id"
+
+_json_decoder = json.JSONDecoder()
+_JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def _skip_whitespace(text: str, index: int) -> int:
+    return _JSON_WHITESPACE.match(text, index).end()
+
+
+def _child_index(text: str, index: int, token: str) -> int | None:
+    """
+    The index of the member `token` of the JSON object, or of the element of the array, that
+    starts at `index`; None if there is none. Only the members or elements before it are parsed.
+    """
+    if text.startswith("{", index):
+        close, is_array = "}", False
+    elif text.startswith("[", index) and token.isdigit():
+        close, is_array, position = "]", True, int(token)
+    else:
+        return None
+    index = _skip_whitespace(text, index + 1)
+    while not text.startswith(close, index):
+        if is_array:
+            if position == 0:
+                return index
+            position -= 1
+        else:
+            if not text.startswith('"', index):
+                return None
+            key, index = scanstring(text, index + 1)
+            index = _skip_whitespace(text, index)
+            if not text.startswith(":", index):
+                return None
+            index = _skip_whitespace(text, index + 1)
+            if key == token:
+                return index
+        _, index = _json_decoder.raw_decode(text, index)
+        index = _skip_whitespace(text, index)
+        if text.startswith(",", index):
+            index = _skip_whitespace(text, index + 1)
+        elif not text.startswith(close, index):
+            return None
+    return None
+
+
+def resolve_raw_pointer(raw: bytes, pointer: str):
+    """
+    The value at the JSON pointer (RFC 6901) of a JSON document given as bytes, None if there
+    is none. The document is parsed only up to the value, so it may be the prefix of a body.
+    """
+    try:
+        # a prefix may end within a character
+        text = codecs.getincrementaldecoder("utf-8")().decode(raw)
+        index = _skip_whitespace(text, 0)
+        for token in pointer.split("/")[1:]:
+            token = token.replace("~1", "/").replace("~0", "~")
+            if (index := _child_index(text, index, token)) is None:
+                return None
+        return _json_decoder.raw_decode(text, index)[0]
+    except ValueError:
+        return None
+
+
+def get_partition_marker(payload: AsyncRequestPayload) -> str | None:
+    """
+    The id of the JSON:API object of the body: the tasks of one object go to one partition
+    and keep their order. A raw body is parsed only up to the id.
+    """
+    if payload.raw_body:
+        return resolve_raw_pointer(payload.raw_body, OBJECT_ID_POINTER)
+    body = payload.body
+    data = body.get("data") if isinstance(body, dict) else None
+    return data.get("id") if isinstance(data, dict) else None
+
+
 async def require_async(request: Request) -> None:
     """Allow only async-request or internal async-request requests."""
     if request.headers.get("X-Async-Background-Internal", "").lower() == "true":
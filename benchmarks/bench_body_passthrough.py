@@ -0,0 +1,123 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+CPU time per background request spent on the body: building the payload, resolving its
+partition marker (the "object" key), encoding the Kafka message, decoding it in the consumer and
+handing the body to the endpoint. Compares the legacy JSON body (ASYNC_REQUEST_RAW_BODY=false)
+with the raw body.
+
+Run from the sample project:
+
+    cd sample && uv run python ../benchmarks/bench_body_passthrough.py
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+
+sys.path.insert(0, os.getcwd())
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "sample.settings")
+
+import django  # noqa: E402
+
+
+django.setup()
+
+from django.test import override_settings  # noqa: E402
+
+from starlette.requests import Request  # noqa: E402
+
+from bazis.contrib.async_background.schemas import KafkaTask  # noqa: E402
+from bazis.contrib.async_request.codec import decode_task, encode_task  # noqa: E402
+from bazis.contrib.async_request.schemas import AsyncRequestPayload  # noqa: E402
+from bazis.contrib.async_request.utils import (  # noqa: E402
+    build_request_payload,
+    get_partition_marker,
+)
+
+
+SIZES = {"10 KB": 10 * 1024, "1 MB": 1024 * 1024, "10 MB": 10 * 1024 * 1024}
+
+
+def make_body(size: int) -> bytes:
+    """A JSON:API body of one object of about `size` bytes (its id goes first)."""
+    line = {"sku": "x" * 160, "quantity": 1}
+    lines = [line] * max(1, size // (len(json.dumps(line)) + 2))
+    item = {"type": "fast_start.order", "id": "42", "attributes": {"lines": lines}}
+    return json.dumps({"data": item}).encode("utf-8")
+
+
+def make_request(body: bytes) -> Request:
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "PATCH",
+        "scheme": "http",
+        "path": "/api/v1/fast_start/order/",
+        "raw_path": b"/api/v1/fast_start/order/",
+        "query_string": b"",
+        "headers": [
+            (b"host", b"testserver"),
+            (b"content-type", b"application/vnd.api+json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "client": ("127.0.0.1", 5000),
+        "server": ("testserver", 80),
+    }
+    request = Request(scope)
+    request._body = body
+    return request
+
+
+def round_trip(body: bytes) -> bytes:
+    """The passes a body goes through from the middleware to the endpoint."""
+    payload = build_request_payload(make_request(body))
+    assert get_partition_marker(payload) == "42"
+    task = KafkaTask[AsyncRequestPayload](task_id="task", channel_name="channel", payload=payload)
+    received = decode_task(encode_task(task))  # producer, consumer
+    if received.payload.raw_body is not None:
+        return received.payload.raw_body
+    return json.dumps(received.payload.body).encode("utf-8")  # receive()
+
+
+def measure(body: bytes, raw_body: bool, repeat: int) -> float:
+    with override_settings(ASYNC_REQUEST_RAW_BODY=raw_body):
+        round_trip(body)
+        started = time.process_time()
+        for _ in range(repeat):
+            round_trip(body)
+        return (time.process_time() - started) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20, help="Requests per measurement.")
+    args = parser.parse_args()
+
+    print(f"{'body':>8} {'json, ms':>10} {'raw, ms':>10} {'speedup':>8}")
+    for label, size in SIZES.items():
+        body = make_body(size)
+        # fewer rounds for the largest body: the total stays within a few hundred MB
+        repeat = max(3, min(args.repeat, args.repeat * SIZES["1 MB"] // size))
+        json_cpu = measure(body, raw_body=False, repeat=repeat)
+        raw_cpu = measure(body, raw_body=True, repeat=repeat)
+        print(f"{label:>8} {json_cpu * 1000:>10.3f} {raw_cpu * 1000:>10.3f} {json_cpu / raw_cpu:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
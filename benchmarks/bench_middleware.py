@@ -0,0 +1,130 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Latency added by AsyncRequestMiddleware to the requests it does not move to the background,
+measured against the bare ASGI application. With --max-overhead-us the script exits with 1
+when the overhead exceeds the limit, so it can guard against regressions in CI.
+
+Run from the sample project:
+
+    cd sample && uv run python ../benchmarks/bench_middleware.py --max-overhead-us 2
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+
+sys.path.insert(0, os.getcwd())
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "sample.settings")
+
+import django  # noqa: E402
+
+
+django.setup()
+
+from bazis.contrib.async_request.middleware import AsyncRequestMiddleware  # noqa: E402
+
+
+HEADERS = [
+    (b"host", b"api.example.com"),
+    (b"authorization", b"Bearer " + b"x" * 420),
+    (b"content-type", b"application/vnd.api+json"),
+    (b"accept", b"application/vnd.api+json"),
+    (b"accept-language", b"en-US,en;q=0.9"),
+    (b"accept-encoding", b"gzip, deflate, br"),
+    (b"user-agent", b"Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 Chrome/126.0"),
+    (b"cookie", b"csrftoken=" + b"c" * 64),
+    (b"origin", b"https://app.example.com"),
+    (b"referer", b"https://app.example.com/orders/"),
+    (b"x-request-id", b"6f1c8a5e-4a40-4c1f-9a3e-5d2f0f8c7b21"),
+    (b"traceparent", b"00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"),
+]
+
+SCOPES = {
+    "plain": {"headers": HEADERS},
+    "internal": {"headers": [*HEADERS, (b"x-async-background-internal", b"true")]},
+    "websocket": {"type": "websocket", "headers": HEADERS},
+}
+
+
+async def bare_app(scope, receive, send) -> None:
+    pass
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message) -> None:
+    pass
+
+
+async def measure(app, scope: dict, number: int) -> float:
+    """Seconds per request."""
+    started = time.perf_counter()
+    for _ in range(number):
+        await app(scope, receive, send)
+    return (time.perf_counter() - started) / number
+
+
+async def run(number: int, rounds: int) -> dict[str, float]:
+    from sample.main import app
+
+    middleware = AsyncRequestMiddleware(bare_app)
+    overheads = {}
+    for name, scope_fields in SCOPES.items():
+        # the routes are those of the sample application, as the scope of Starlette carries it
+        scope = {
+            "app": app,
+            "type": "http",
+            "method": "GET",
+            "path": "/api/v1/fast_start/order/",
+            "query_string": b"",
+            **scope_fields,
+        }
+        samples = []
+        for _ in range(rounds):
+            bare = await measure(bare_app, scope, number)
+            wrapped = await measure(middleware, scope, number)
+            samples.append(wrapped - bare)
+        overheads[name] = statistics.median(samples)
+    return overheads
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=100000, help="Requests per round.")
+    parser.add_argument("--rounds", type=int, default=7, help="Rounds (the median is reported).")
+    parser.add_argument(
+        "--max-overhead-us", type=float, default=None, help="Fail above this overhead per request."
+    )
+    args = parser.parse_args()
+
+    overheads = asyncio.run(run(args.number, args.rounds))
+    failed = False
+    for name, overhead in overheads.items():
+        overhead_us = overhead * 1e6
+        exceeded = args.max_overhead_us is not None and overhead_us > args.max_overhead_us
+        failed = failed or exceeded
+        print(f"{name:>10}: {overhead_us:7.3f} us per request{'  (over the limit)' if exceeded else ''}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
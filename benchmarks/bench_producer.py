@@ -0,0 +1,169 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Background requests accepted per second by one worker (one event loop): the enqueue step of
+the 202 path (statuses in Redis and the Kafka publication) with and without micro-batching.
+Needs the Kafka and Redis of the sample environment; with --broker-latency-ms the Kafka
+publication is replaced by a sleep of that long (an acknowledgement without a broker), and
+--publish-only measures the publication alone, without the statuses.
+
+Run from the sample project:
+
+    cd sample && uv run python ../benchmarks/bench_producer.py --concurrency 200
+    cd sample && uv run python ../benchmarks/bench_producer.py --broker-latency-ms 10
+    cd sample && uv run python ../benchmarks/bench_producer.py --broker-latency-ms 10 \
+        --publish-only
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+
+sys.path.insert(0, os.getcwd())
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "sample.settings")
+
+import django  # noqa: E402
+
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.test import override_settings  # noqa: E402
+
+from bazis.contrib.async_background.schemas import KafkaTask  # noqa: E402
+from bazis.contrib.async_request import producer  # noqa: E402
+from bazis.contrib.async_request.codec import encode_task  # noqa: E402
+from bazis.contrib.async_request.producer import (  # noqa: E402
+    enqueue_request_async,
+    flush_batch_publisher,
+    get_batch_publisher,
+)
+from bazis.contrib.async_request.schemas import AsyncRequestPayload  # noqa: E402
+
+
+MODES = {
+    "unbatched": {"ASYNC_REQUEST_PRODUCER_BATCHING": False},
+    "batched, ack": {"ASYNC_REQUEST_PRODUCER_BATCHING": True, "ASYNC_REQUEST_PRODUCER_ACK": True},
+    "batched, no ack": {
+        "ASYNC_REQUEST_PRODUCER_BATCHING": True,
+        "ASYNC_REQUEST_PRODUCER_ACK": False,
+    },
+}
+
+
+def make_payload(index: int) -> AsyncRequestPayload:
+    return AsyncRequestPayload(
+        path=f"/api/v1/fast_start/order/{index}/",
+        query_string="",
+        headers=[("content-type", "application/vnd.api+json"), ("authorization", "Bearer x")],
+        request_client=("127.0.0.1", 50000),
+        method="PATCH",
+        type="http",
+        http_version="1.1",
+        scheme="http",
+        body={"data": {"id": str(index), "type": "fast_start.order", "attributes": {"amount": 1}}},
+    )
+
+
+async def publish(index: int) -> None:
+    """The publication step of enqueue_request_async alone."""
+    task = KafkaTask[AsyncRequestPayload](
+        task_id=str(index), channel_name="bench", payload=make_payload(index)
+    )
+    data = encode_task(task)
+    if not settings.ASYNC_REQUEST_PRODUCER_BATCHING:
+        await producer.publish_encoded(settings.KAFKA_TOPIC_ASYNC_BG, data, str(index))
+        return
+    future = await get_batch_publisher().submit(settings.KAFKA_TOPIC_ASYNC_BG, data, str(index))
+    if settings.ASYNC_REQUEST_PRODUCER_ACK:
+        await future
+
+
+async def enqueue(index: int) -> None:
+    await enqueue_request_async(
+        topic_name=settings.KAFKA_TOPIC_ASYNC_BG,
+        channel_name="bench",
+        payload=make_payload(index),
+        partition_marker=str(index),
+    )
+
+
+async def accept(number: int, concurrency: int, step) -> tuple[float, list[float]]:
+    """Requests per second and the latencies of the enqueue step."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def one(index: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await step(index)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(number)))
+    elapsed = time.perf_counter() - started
+    await flush_batch_publisher()
+    return number / elapsed, sorted(latencies)
+
+
+def simulate_broker(latency_ms: float) -> None:
+    """Replaces the Kafka publication with an acknowledgement after `latency_ms`."""
+
+    async def acknowledge(topic_name, data, partition_marker=None, headers=None):
+        await asyncio.sleep(latency_ms / 1000)
+
+    producer.publish_encoded = acknowledge
+    get_batch_publisher().publish = acknowledge
+
+
+async def run(
+    number: int, concurrency: int, broker_latency_ms: float | None, publish_only: bool
+) -> None:
+    if broker_latency_ms is not None:
+        simulate_broker(broker_latency_ms)
+    step = publish if publish_only else enqueue
+    # warm up the connections
+    await accept(min(number, 100), concurrency, step)
+    print(f"{'mode':>16} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, overrides in MODES.items():
+        with override_settings(**overrides):
+            rate, latencies = await accept(number, concurrency, step)
+        p50 = latencies[len(latencies) // 2] * 1000
+        p99 = latencies[int(len(latencies) * 0.99)] * 1000
+        print(f"{name:>16} {rate:10.0f} {p50:8.2f} {p99:8.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=5000, help="Requests per mode.")
+    parser.add_argument("--concurrency", type=int, default=200, help="Requests in flight.")
+    parser.add_argument(
+        "--broker-latency-ms",
+        type=float,
+        default=None,
+        help="Simulate the Kafka acknowledgement with a sleep instead of publishing.",
+    )
+    parser.add_argument(
+        "--publish-only", action="store_true", help="Measure the Kafka publication alone."
+    )
+    args = parser.parse_args()
+    asyncio.run(run(args.number, args.concurrency, args.broker_latency_ms, args.publish_only))
+
+
+if __name__ == "__main__":
+    main()
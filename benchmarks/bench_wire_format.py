@@ -0,0 +1,151 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Encode/decode cost and message size of the wire formats on realistic JSON:API requests.
+
+Run from the sample project:
+
+    cd sample && uv run python ../benchmarks/bench_wire_format.py
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+
+sys.path.insert(0, os.getcwd())
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "sample.settings")
+
+import django  # noqa: E402
+
+
+django.setup()
+
+from pydantic_core import to_jsonable_python  # noqa: E402
+
+from bazis.contrib.async_background.schemas import KafkaTask  # noqa: E402
+from bazis.contrib.async_request.codec import decode_task, encode_task  # noqa: E402
+from bazis.contrib.async_request.schemas import AsyncRequestPayload  # noqa: E402
+
+
+BROWSER_HEADERS = [
+    ("host", "api.example.com"),
+    ("authorization", "Bearer " + "x" * 420),
+    ("content-type", "application/vnd.api+json"),
+    ("accept", "application/vnd.api+json, application/json;q=0.9, */*;q=0.8"),
+    ("accept-language", "en-US,en;q=0.9,ru;q=0.8"),
+    ("accept-encoding", "gzip, deflate, br"),
+    ("user-agent", "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 Chrome/126.0 Safari/537.36"),
+    ("cookie", "csrftoken=" + "c" * 64 + "; sessionid=" + "s" * 32 + "; _ga=GA1.1.1234567890"),
+    ("origin", "https://app.example.com"),
+    ("referer", "https://app.example.com/orders/"),
+    ("x-request-id", "6f1c8a5e-4a40-4c1f-9a3e-5d2f0f8c7b21"),
+    ("x-forwarded-for", "203.0.113.10, 10.0.0.1"),
+    ("x-forwarded-proto", "https"),
+    ("traceparent", "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"),
+    ("x-async-background-internal", "true"),
+]
+
+
+def order_patch(raw: bool) -> KafkaTask[AsyncRequestPayload]:
+    body = {
+        "data": {
+            "id": "e7cc4c8c-3ed1-4576-96ad-b3fd7c0b2a5a",
+            "type": "fast_start.order",
+            "bs:action": "change",
+            "attributes": {"description": "Order for the warehouse " * 8, "status": "supplied"},
+            "relationships": {
+                "delivery_company": {
+                    "data": {"id": "0030451c-7f5c-4b94-944d-d8428d559415", "type": "fast_start.deliverycompany"}
+                }
+            },
+        }
+    }
+    return make_task(f"/api/v1/fast_start/order/{body['data']['id']}/", "PATCH", body, raw)
+
+
+def order_bulk(raw: bool) -> KafkaTask[AsyncRequestPayload]:
+    body = {
+        "data": [
+            {
+                "type": "fast_start.order",
+                "attributes": {"description": f"Order {i}", "status": "draft"},
+            }
+            for i in range(200)
+        ]
+    }
+    return make_task("/api/v1/fast_start/order/", "POST", body, raw)
+
+
+def order_list(raw: bool) -> KafkaTask[AsyncRequestPayload]:
+    return make_task("/api/v1/fast_start/order/", "GET", None, raw, "filter=status%3Dsupplied&page%5Blimit%5D=20")
+
+
+def make_task(path, method, body, raw, query_string="") -> KafkaTask[AsyncRequestPayload]:
+    body_fields = {}
+    if body is not None and raw:
+        body_fields["raw_body"] = json.dumps(body).encode("utf-8")
+    elif body is not None:
+        body_fields["body"] = body
+    payload = AsyncRequestPayload(
+        path=path,
+        query_string=query_string,
+        headers=BROWSER_HEADERS,
+        request_client=("203.0.113.10", 52144),
+        method=method,
+        type="http",
+        http_version="1.1",
+        scheme="https",
+        **body_fields,
+    )
+    return KafkaTask[AsyncRequestPayload](
+        task_id="371564b0-29a5-457a-aabb-9c43661148a7", channel_name="user_channel_42", payload=payload
+    )
+
+
+def legacy_encode(task) -> bytes:
+    """The encoding of bazis-async-background: model_dump and the JSON of FastStream."""
+    return json.dumps(to_jsonable_python(task.model_dump())).encode("utf-8")
+
+
+def legacy_decode(data: bytes):
+    return KafkaTask[AsyncRequestPayload].model_validate(json.loads(data))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=2000, help="Runs per measurement.")
+    args = parser.parse_args()
+
+    print(f"{'request':>12} {'format':>14} {'size, B':>9} {'encode, us':>11} {'decode, us':>11}")
+    for name, factory in (("PATCH", order_patch), ("bulk POST", order_bulk), ("GET list", order_list)):
+        cases = [
+            ("legacy json", factory(raw=False), legacy_encode, legacy_decode),
+            ("json", factory(raw=False), lambda t: encode_task(t, "json"), decode_task),
+            ("json, raw", factory(raw=True), lambda t: encode_task(t, "json"), decode_task),
+            ("msgpack, raw", factory(raw=True), lambda t: encode_task(t, "msgpack"), decode_task),
+        ]
+        for label, task, encode, decode in cases:
+            data = encode(task)
+            number = max(10, args.number // max(1, len(data) // 4096))
+            encode_us = timeit.timeit(lambda: encode(task), number=number) / number * 1e6  # noqa: B023
+            decode_us = timeit.timeit(lambda: decode(data), number=number) / number * 1e6  # noqa: B023
+            print(f"{name:>12} {label:>14} {len(data):>9} {encode_us:>11.1f} {decode_us:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,11 +12,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import hashlib
+import os
+
 from django.apps import apps
 from django.contrib.auth import get_user_model
 
 from fastapi import Depends, Request
 
+from bazis.contrib.async_request.cancellation import TaskCancellation
+from bazis.contrib.async_request.policy import AsyncPolicy, BackgroundMode
 from bazis.contrib.async_request.utils import require_async
 from bazis.contrib.author.routes_abstract import AuthorRouteBase
 from bazis.contrib.permit.routes_abstract import PermitRouteBase
@@ -94,3 +100,69 @@ def some_sync_endpoint(some_str: str, request: Request, user: User = Depends(get
         'some_dict': {'some_float': 1.2}
     }]
     return results
+
+
+async def echo_body(request: Request) -> dict:
+    body = await request.body()
+    return {
+        'size': len(body),
+        'sha256': hashlib.sha256(body).hexdigest(),
+        'content_type': request.headers.get('content-type'),
+    }
+
+
+@router.post('/some-echo-endpoint/', response_model=dict)
+async def some_echo_endpoint(request: Request, user: User = Depends(get_user_from_token)):
+    return await echo_body(request)
+
+
+@router.post(
+    '/some-forced-echo-endpoint/',
+    response_model=dict,
+    dependencies=[Depends(AsyncPolicy(BackgroundMode.FORCE, max_body_size=1024))],
+)
+async def some_forced_echo_endpoint(request: Request, user: User = Depends(get_user_from_token)):
+    return await echo_body(request)
+
+
+@router.post(
+    '/some-inline-echo-endpoint/',
+    response_model=dict,
+    dependencies=[Depends(AsyncPolicy(BackgroundMode.NEVER))],
+)
+async def some_inline_echo_endpoint(request: Request, user: User = Depends(get_user_from_token)):
+    return await echo_body(request)
+
+
+@router.get('/some-slow-endpoint/', response_model=dict)
+async def some_slow_endpoint(
+    delay: float,
+    user: User = Depends(get_user_from_token),
+    cancellation: TaskCancellation = Depends(),
+):
+    # the sleep stops early when the background task is cancelled
+    loop = asyncio.get_running_loop()
+    until = loop.time() + delay
+    while (remaining := until - loop.time()) > 0:
+        await cancellation.raise_if_requested()
+        await asyncio.sleep(min(remaining, 0.1))
+    return {'delay': delay}
+
+
+@router.get(
+    '/some-cpu-endpoint/',
+    response_model=dict,
+    dependencies=[Depends(AsyncPolicy(cpu_bound=True))],
+)
+def some_cpu_endpoint(rounds: int, user: User = Depends(get_user_from_token)):
+    # executed in the process pool of the consumer
+    digest = b''
+    for _ in range(rounds):
+        digest = hashlib.sha256(digest).digest()
+    return {'rounds': rounds, 'digest': digest.hex(), 'pid': os.getpid()}
+
+
+@router.get('/some-pid-endpoint/', response_model=dict)
+async def some_pid_endpoint(user: User = Depends(get_user_from_token)):
+    # executed by the consumer itself
+    return {'pid': os.getpid()}
@@ -21,3 +21,4 @@ router.register("fast_start.router")
 router.register("bazis.contrib.permit.router")
 router.register("bazis.contrib.users.router")
 router.register("bazis.contrib.async_background.router")
+router.register("bazis.contrib.async_request.router")
@@ -157,12 +157,13 @@ def fast_start_setup_groups_and_roles(db):
 
 @pytest.fixture
 def process_async_response():
+    from bazis.contrib.async_background.utils import task_key
     from bazis.contrib.ws.models_abstract import redis
 
     def _run(task_id: str, timeout: int = 45) -> dict:
         # Wait for status "completed" (processed by external consumer)
         for _ in range(timeout):
-            if redis_data := redis.get(task_id):
+            if redis_data := redis.get(task_key(task_id)):
                 data_dict = json.loads(redis_data.decode("utf-8"))
                 if data_dict.get("status") == "completed":
                     return redis_data
@@ -0,0 +1,120 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Admission control: load shedding by the cached lag and Redis memory, per-channel quotas.
+"""
+
+import asyncio
+import time
+
+from django.test import override_settings
+
+import pytest
+from bazis_test_utils.utils import get_api_client
+
+from bazis.contrib.async_request import admission
+from bazis.contrib.async_request.admission import (
+    OVERLOAD_LAG,
+    OVERLOAD_REDIS_MEMORY,
+    AdmissionSnapshot,
+    channel_tasks_key,
+)
+
+
+@override_settings(ASYNC_REQUEST_MAX_LAG=1000, ASYNC_REQUEST_MAX_REDIS_MEMORY_RATIO=0.9)
+def test_admission_snapshot_overload():
+    snapshot = AdmissionSnapshot()
+    snapshot.refreshed_at = time.monotonic()
+
+    assert snapshot.overload() is None
+    snapshot.lag = 1001
+    assert snapshot.overload() == OVERLOAD_LAG
+    snapshot.lag = 10
+    snapshot.redis_memory_ratio = 0.95
+    assert snapshot.overload() == OVERLOAD_REDIS_MEMORY
+
+
+@override_settings(
+    KAFKA_GROUP_ID="admission-test", ASYNC_REQUEST_MAX_LAG=1000, ASYNC_REQUEST_MAX_REDIS_MEMORY_RATIO=None
+)
+def test_lag_clients_reused(monkeypatch):
+    events = []
+
+    class Client:
+        def __init__(self, **kwargs):
+            self.name = type(self).__name__
+
+        async def start(self):
+            events.append(f"{self.name} started")
+
+        async def close(self):
+            events.append(f"{self.name} closed")
+
+        async def stop(self):
+            events.append(f"{self.name} closed")
+
+    class Admin(Client):
+        pass
+
+    class Consumer(Client):
+        pass
+
+    async def get_consumer_lag(admin, consumer):
+        assert isinstance(admin, Admin) and isinstance(consumer, Consumer)
+        return 5
+
+    monkeypatch.setattr(admission, "AIOKafkaAdminClient", Admin)
+    monkeypatch.setattr(admission, "AIOKafkaConsumer", Consumer)
+    monkeypatch.setattr(admission, "get_consumer_lag", get_consumer_lag)
+
+    async def scenario():
+        snapshot = AdmissionSnapshot()
+        await snapshot.refresh()
+        await snapshot.refresh()
+        assert snapshot.lag == 5
+        await snapshot.close()
+
+    asyncio.run(scenario())
+    # the clients are started by the first read only and closed with the snapshot
+    assert events == ["Admin started", "Consumer started", "Consumer closed", "Admin closed"]
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(ASYNC_REQUEST_CHANNEL_QUOTA=1)
+def test_channel_quota(create_test_data, sample_app):
+    from bazis.contrib.ws.models_abstract import redis
+
+    _, manager, _, _, _ = create_test_data
+    client = get_api_client(sample_app, manager.jwt_build())
+    redis.delete(channel_tasks_key(manager.user_channel))
+
+    def post(path: str, body: bytes):
+        return client.post(
+            path, content=body, headers={"X-Async-Background": "true", "Content-Type": "text/plain"}
+        )
+
+    try:
+        assert post("/api/v1/some-echo-endpoint/", b"first").status_code == 202
+
+        # the quota is used up: a forced route is rejected, an allowing route runs inline
+        response = post("/api/v1/some-forced-echo-endpoint/", b"second")
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "30"
+
+        response = post("/api/v1/some-echo-endpoint/", b"third")
+        assert response.status_code == 200
+        assert response.json()["size"] == len(b"third")
+    finally:
+        redis.delete(channel_tasks_key(manager.user_channel))
@@ -0,0 +1,113 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Per-route background policy: the policy table and its enforcement by the middleware.
+"""
+
+import hashlib
+import json
+
+from django.test import override_settings
+
+import pytest
+from bazis_test_utils.utils import get_api_client
+
+from bazis.contrib.async_request.policy import (
+    DEFAULT_POLICY,
+    BackgroundMode,
+    PolicyTable,
+    RoutePolicy,
+)
+
+
+def test_policy_table_match():
+    forced = RoutePolicy(mode=BackgroundMode.FORCE, path="/shop/{item_id}/")
+    never = RoutePolicy(mode=BackgroundMode.NEVER, path="/shop/count/")
+    files = RoutePolicy(mode=BackgroundMode.REQUIRED, path="/files/{file_path:path}")
+
+    table = PolicyTable()
+    table.add("/shop/{item_id}/", {"PATCH"}, forced)
+    table.add("/shop/count/", {"GET", "HEAD"}, never)
+    table.add("/files/{file_path:path}", {"PUT"}, files)
+
+    assert table.has_forced
+    assert table.match("PATCH", "/shop/42/") is forced
+    assert table.match("GET", "/shop/42/") is DEFAULT_POLICY
+    assert table.match("GET", "/shop/count/") is never
+    # the literal segment wins, the parameter is the fallback for the other methods
+    assert table.match("PATCH", "/shop/count/") is forced
+    assert table.match("PUT", "/files/a/b/c.txt") is files
+    assert table.match("GET", "/unknown/") is DEFAULT_POLICY
+
+
+def test_policy_table_from_app(sample_app):
+    table = PolicyTable.from_app(sample_app)
+
+    policy = table.match("POST", "/api/v1/some-forced-echo-endpoint/")
+    assert policy.mode == BackgroundMode.FORCE
+    assert policy.max_body_size == 1024
+    assert table.match("POST", "/api/v1/some-inline-echo-endpoint/").mode == BackgroundMode.NEVER
+    assert table.match("GET", "/api/v1/async_background_response/abc/").mode == BackgroundMode.EXEMPT
+    assert table.match("GET", "/api/v1/some-async-endpoint/").mode == BackgroundMode.ALLOW
+
+
+@pytest.mark.run_with_consumer
+@pytest.mark.django_db(transaction=True)
+@override_settings(ASYNC_REQUEST_RAW_BODY=True)
+def test_forced_route_without_header(create_test_data, sample_app, process_async_response):
+    _, manager, _, _, _ = create_test_data
+    body = b"id;description\n1;Order 1\n"
+
+    response = get_api_client(sample_app, manager.jwt_build()).post(
+        "/api/v1/some-forced-echo-endpoint/", content=body, headers={"Content-Type": "text/csv"}
+    )
+    assert response.status_code == 202
+    task_id = response.json()["meta"]["async_request_id"]
+
+    result_in_redis = process_async_response(task_id)
+    response_data = json.loads(result_in_redis.decode("utf-8"))["response"]
+    assert response_data["status"] == 200
+    assert response_data["response"]["sha256"] == hashlib.sha256(body).hexdigest()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_forced_route_body_too_large(create_test_data, sample_app):
+    _, manager, _, _, _ = create_test_data
+
+    response = get_api_client(sample_app, manager.jwt_build()).post(
+        "/api/v1/some-forced-echo-endpoint/",
+        content=b"x" * 2048,
+        headers={"Content-Type": "application/octet-stream"},
+    )
+    assert response.status_code == 413
+
+
+@pytest.mark.django_db(transaction=True)
+def test_never_route(create_test_data, sample_app):
+    _, manager, _, _, _ = create_test_data
+    client = get_api_client(sample_app, manager.jwt_build())
+
+    response = client.post(
+        "/api/v1/some-inline-echo-endpoint/",
+        content=b"1",
+        headers={"X-Async-Background": "true", "Content-Type": "text/plain"},
+    )
+    assert response.status_code == 409
+
+    response = client.post(
+        "/api/v1/some-inline-echo-endpoint/", content=b"1", headers={"Content-Type": "text/plain"}
+    )
+    assert response.status_code == 200
+    assert response.json()["size"] == 1
@@ -0,0 +1,51 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+`X-Async-Background: auto`: background only for the routes that are known to be slow.
+"""
+
+import pytest
+from bazis_test_utils.utils import get_api_client
+
+from bazis.contrib.async_request.latency import LATENCY_KEY, route_key
+
+
+FAST_ROUTE = route_key("POST", "/api/v1/some-echo-endpoint/")
+SLOW_ROUTE = route_key("GET", "/api/v1/some-async-endpoint/")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_auto_mode_follows_route_latency(create_test_data, sample_app):
+    from bazis.contrib.ws.models_abstract import redis
+
+    _, manager, _, _, _ = create_test_data
+    client = get_api_client(sample_app, manager.jwt_build())
+    headers = {"X-Async-Background": "auto"}
+
+    redis.hset(LATENCY_KEY, mapping={FAST_ROUTE: 10, SLOW_ROUTE: 60000})
+    try:
+        response = client.post(
+            "/api/v1/some-echo-endpoint/",
+            content=b"payload",
+            headers={**headers, "Content-Type": "text/plain"},
+        )
+        assert response.status_code == 200
+        assert response.json()["size"] == len(b"payload")
+
+        response = client.get("/api/v1/some-async-endpoint/?some_str=auto", headers=headers)
+        assert response.status_code == 202
+        assert response.json()["meta"]["async_request_id"]
+    finally:
+        redis.hdel(LATENCY_KEY, FAST_ROUTE, SLOW_ROUTE)
@@ -0,0 +1,129 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Cancellation of background tasks: DELETE /async_background_response/{task_id}/.
+"""
+
+import asyncio
+import json
+import time
+
+from starlette.testclient import TestClient
+
+import pytest
+from bazis_test_utils.utils import get_api_client
+
+from bazis.contrib.async_background.schemas import TaskStatus
+from bazis.contrib.async_background.utils import set_and_publish_status, task_key
+from bazis.contrib.async_request import cancellation
+from bazis.contrib.async_request.cancellation import is_cancelled, request_cancellation
+
+
+def parse_statuses(text: str) -> list[str]:
+    return [
+        json.loads(line.removeprefix("data: "))["status"]
+        for line in text.splitlines()
+        if line.startswith("data: ")
+    ]
+
+
+def test_concurrent_checks_share_one_read(monkeypatch):
+    reads = []
+    read = cancellation.cancelled_task_ids
+
+    async def cancelled_task_ids(task_ids):
+        reads.append(set(task_ids))
+        return await read(task_ids)
+
+    monkeypatch.setattr(cancellation, "cancelled_task_ids", cancelled_task_ids)
+    task_ids = [f"cancel-read-test-{i}" for i in range(3)]
+
+    async def scenario():
+        await request_cancellation(task_ids[1])
+        return await asyncio.gather(*(is_cancelled(task_id) for task_id in task_ids))
+
+    assert asyncio.run(scenario()) == [False, True, False]
+    assert reads == [set(task_ids)]
+
+
+def test_failed_check_is_not_cancelled(monkeypatch):
+    async def cancelled_task_ids(task_ids):
+        raise ConnectionError("Redis is down")
+
+    monkeypatch.setattr(cancellation, "cancelled_task_ids", cancelled_task_ids)
+    assert asyncio.run(is_cancelled("cancel-failed-read-test")) is False
+
+
+@pytest.mark.django_db(transaction=True)
+def test_cancel_checks(create_test_data, sample_app):
+    _, manager, buyer_1, _, _ = create_test_data
+    client = get_api_client(sample_app, manager.jwt_build())
+    set_and_publish_status("cancel-foreign-test", buyer_1.user_channel, TaskStatus.PENDING)
+    set_and_publish_status("cancel-finished-test", manager.user_channel, TaskStatus.COMPLETED)
+
+    assert client.delete("/api/v1/async_background_response/cancel-unknown-test/").status_code == 404
+    assert client.delete("/api/v1/async_background_response/cancel-foreign-test/").status_code == 403
+    assert client.delete("/api/v1/async_background_response/cancel-finished-test/").status_code == 409
+
+
+@pytest.mark.django_db(transaction=True)
+def test_cancel_delayed_task(create_test_data, sample_app):
+    _, manager, _, _, _ = create_test_data
+    headers = {"Authorization": f"Bearer {manager.jwt_build()}"}
+
+    # the releaser that cancels the delayed task runs in the event loop of the client
+    with TestClient(sample_app) as client:
+        response = client.post(
+            "/api/v1/some-echo-endpoint/",
+            content=b"{}",
+            headers={**headers, "X-Async-Background": "true", "X-Async-Delay": "600"},
+        )
+        assert response.status_code == 202
+        task_id = response.json()["meta"]["async_request_id"]
+
+        response = client.delete(f"/api/v1/async_background_response/{task_id}/", headers=headers)
+        assert response.status_code == 202
+        assert response.json()["meta"]["async_request_id"] == task_id
+
+        response = client.get(f"/api/v1/async_request/events/{task_id}/", headers=headers)
+    assert parse_statuses(response.text)[-1] == "cancelled"
+
+
+@pytest.mark.run_with_consumer
+@pytest.mark.django_db(transaction=True)
+def test_cancel_running_task(create_test_data, sample_app):
+    from bazis.contrib.ws.models_abstract import redis
+
+    _, manager, _, _, _ = create_test_data
+    client = get_api_client(sample_app, manager.jwt_build())
+
+    response = client.get(
+        "/api/v1/some-slow-endpoint/?delay=30", headers={"X-Async-Background": "true"}
+    )
+    task_id = response.json()["meta"]["async_request_id"]
+    for _ in range(50):
+        data = redis.get(task_key(task_id))
+        if data and json.loads(data)["status"] == TaskStatus.PROCESSING:
+            break
+        time.sleep(0.2)
+
+    started = time.time()
+    response = client.delete(f"/api/v1/async_background_response/{task_id}/")
+    assert response.status_code == 202
+
+    # the endpoint stops at its next check instead of sleeping for 30 seconds
+    response = client.get(f"/api/v1/async_request/events/{task_id}/")
+    assert parse_statuses(response.text)[-1] == "cancelled"
+    assert time.time() - started < 10
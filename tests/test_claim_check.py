@@ -0,0 +1,121 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Claim check: a body above ASYNC_REQUEST_CLAIM_CHECK_THRESHOLD travels through the blob store
+instead of the Kafka message and reaches the endpoint byte for byte.
+"""
+
+import asyncio
+import hashlib
+import json
+
+from django.conf import settings
+from django.test import override_settings
+
+import pytest
+from bazis_test_utils.utils import get_api_client
+
+from bazis.contrib.async_background.utils import get_redis_async
+from bazis.contrib.async_request import producer
+from bazis.contrib.async_request.producer import BatchPublisher, enqueue_request_async
+from bazis.contrib.async_request.schemas import AsyncRequestPayload
+from bazis.contrib.async_request.storage import RedisBlobStore, get_blob_store
+
+
+async def broker_down(*args, **kwargs):
+    raise ConnectionError("the broker is down")
+
+
+async def stored_blobs() -> set[bytes]:
+    return {key async for key in get_redis_async().scan_iter(f"{RedisBlobStore.key_prefix}*")}
+
+
+@pytest.mark.run_with_consumer
+@pytest.mark.django_db(transaction=True)
+def test_large_body_claim_check(create_test_data, sample_app, process_async_response):
+    _, manager, _, _, _ = create_test_data
+
+    items = [{"id": i, "description": f"Order {i} " + "x" * 200} for i in range(10000)]
+    body = json.dumps({"data": items}).encode("utf-8")
+    assert len(body) > settings.ASYNC_REQUEST_CLAIM_CHECK_THRESHOLD
+
+    response = get_api_client(sample_app, manager.jwt_build()).post(
+        "/api/v1/some-echo-endpoint/",
+        content=body,
+        headers={"X-Async-Background": "true"},
+    )
+    assert response.status_code == 202
+    task_id = response.json()["meta"]["async_request_id"]
+
+    result_in_redis = process_async_response(task_id)
+    response_data = json.loads(result_in_redis.decode("utf-8"))["response"]
+    assert response_data["status"] == 200
+    assert response_data["response"]["size"] == len(body)
+    assert response_data["response"]["sha256"] == hashlib.sha256(body).hexdigest()
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(ASYNC_REQUEST_CLAIM_CHECK_THRESHOLD=1024, ASYNC_REQUEST_PRODUCER_BATCHING=False)
+def test_failed_publication_drops_body(create_test_data, sample_app, monkeypatch):
+    _, manager, _, _, _ = create_test_data
+    monkeypatch.setattr(producer, "publish_encoded", broker_down)
+    before = asyncio.run(stored_blobs())
+
+    with pytest.raises(ConnectionError):
+        get_api_client(sample_app, manager.jwt_build()).post(
+            "/api/v1/some-echo-endpoint/",
+            content=b"x" * 10000,
+            headers={"X-Async-Background": "true", "Content-Type": "text/plain"},
+        )
+
+    assert asyncio.run(stored_blobs()) <= before
+
+
+@override_settings(
+    ASYNC_REQUEST_PRODUCER_BATCHING=True,
+    ASYNC_REQUEST_PRODUCER_ACK=False,
+    ASYNC_REQUEST_PRODUCER_LINGER_MS=0,
+)
+def test_detached_failure_drops_body():
+    task_id = "detached-failure-body-test"
+    body_ref = "detached-failure-body"
+    payload = AsyncRequestPayload(
+        path="/api/v1/some-echo-endpoint/",
+        query_string="",
+        headers=[],
+        request_client=None,
+        method="POST",
+        type="http",
+        http_version="1.1",
+        scheme="http",
+        body_ref=body_ref,
+    )
+
+    async def chunks():
+        yield b"x" * 10000
+
+    async def scenario():
+        store = get_blob_store()
+        await store.write(body_ref, chunks())
+        producer._publishers_by_loop[asyncio.get_running_loop()] = BatchPublisher(broker_down)
+
+        await enqueue_request_async(
+            topic_name="t", channel_name="detached-failure-channel", payload=payload, task_id=task_id
+        )
+        await asyncio.gather(*producer._status_tasks)
+
+        assert not await get_redis_async().exists(f"{RedisBlobStore.key_prefix}{body_ref}")
+
+    asyncio.run(scenario())
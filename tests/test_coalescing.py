@@ -0,0 +1,48 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Coalescing: identical background GET requests of a channel share the task in flight.
+"""
+
+import json
+
+import pytest
+from bazis_test_utils.utils import get_api_client
+
+
+@pytest.mark.run_with_consumer
+@pytest.mark.django_db(transaction=True)
+def test_identical_get_requests_share_task(create_test_data, sample_app, process_async_response):
+    _, manager, _, _, _ = create_test_data
+    client = get_api_client(sample_app, manager.jwt_build())
+
+    def get(some_str: str):
+        response = client.get(
+            f"/api/v1/some-async-endpoint/?some_str={some_str}",
+            headers={"X-Async-Background": "true"},
+        )
+        assert response.status_code == 202
+        return response.json()["meta"]["async_request_id"]
+
+    task_id = get("dashboard")
+    assert get("dashboard") == task_id
+    assert get("other") != task_id
+
+    result_in_redis = process_async_response(task_id)
+    response_data = json.loads(result_in_redis.decode("utf-8"))["response"]
+    assert response_data["response"][0]["some_str"] == "dashboard"
+
+    # the completed task no longer attaches identical requests
+    assert get("dashboard") != task_id
@@ -0,0 +1,161 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Wire formats of the Kafka messages: every format and compression round-trips the task, and
+the JSON of bazis-async-background (the messages already in the topic) is still decoded.
+"""
+
+import asyncio
+import json
+import time
+
+from django.test import override_settings
+
+import pytest
+
+from bazis.contrib.async_background.schemas import KafkaTask
+from bazis.contrib.async_background.utils import get_task_data_async
+from bazis.contrib.async_request import codec
+from bazis.contrib.async_request.codec import (
+    COMPRESSED_MAGIC,
+    COMPRESSION_GZIP,
+    COMPRESSION_ZSTD,
+    WIRE_MAGIC,
+    WIRE_VERSION,
+    WireFormatError,
+    decode_task,
+    encode_headers,
+    encode_task,
+)
+from bazis.contrib.async_request.lanes import DEFAULT_LANE
+from bazis.contrib.async_request.schemas import AsyncRequestPayload
+
+
+def make_task(**payload_fields) -> KafkaTask[AsyncRequestPayload]:
+    payload = AsyncRequestPayload(
+        path="/api/v1/fast_start/order/",
+        query_string="include=shop",
+        headers=[("authorization", "Bearer token"), ("content-type", "application/vnd.api+json")],
+        request_client=("127.0.0.1", 5000),
+        method="PATCH",
+        type="http",
+        http_version="1.1",
+        scheme="http",
+        **payload_fields,
+    )
+    return KafkaTask[AsyncRequestPayload](task_id="task", channel_name="channel", payload=payload)
+
+
+@pytest.mark.parametrize("wire_format", ["json", "msgpack"])
+@pytest.mark.parametrize(
+    "payload_fields",
+    [
+        {"body": {"data": {"id": "1", "type": "fast_start.order"}}},
+        {"raw_body": bytes(range(256))},
+        {"body_ref": "d1b5c1a4-5c0e-4a53-9d7a-1f4b1e8f8c9e"},
+    ],
+)
+def test_round_trip(wire_format, payload_fields):
+    if wire_format == "msgpack":
+        pytest.importorskip("msgpack")
+    task = make_task(**payload_fields)
+
+    data = encode_task(task, wire_format)
+
+    assert data.startswith(WIRE_MAGIC) == (wire_format == "msgpack")
+    assert decode_task(data) == task
+
+
+def test_legacy_json_message():
+    task = make_task(body={"data": {"id": "1", "type": "fast_start.order"}})
+    legacy = json.dumps(task.model_dump(mode="json")).encode("utf-8")
+
+    assert decode_task(legacy) == task
+
+
+def test_unknown_version():
+    with pytest.raises(WireFormatError):
+        decode_task(WIRE_MAGIC + b"\x7f")
+
+
+@pytest.mark.parametrize("compression", ["gzip", "zstd"])
+@pytest.mark.parametrize("wire_format", ["json", "msgpack"])
+def test_compression(wire_format, compression):
+    if wire_format == "msgpack":
+        pytest.importorskip("msgpack")
+    items = [{"type": "fast_start.order", "attributes": {"description": f"Order {i}"}} for i in range(500)]
+    task = make_task(body={"data": items})
+
+    plain = encode_task(task, wire_format)
+    with override_settings(ASYNC_REQUEST_COMPRESSION=compression, ASYNC_REQUEST_COMPRESSION_THRESHOLD=1024):
+        data = encode_task(task, wire_format)
+
+    assert data.startswith(COMPRESSED_MAGIC)
+    # zstd must not fall back to gzip: the sample installs the zstd extra
+    assert data[len(COMPRESSED_MAGIC)] == {"gzip": COMPRESSION_GZIP, "zstd": COMPRESSION_ZSTD}[compression]
+    assert len(data) < len(plain) / 5
+    assert decode_task(data) == task
+
+
+def test_compression_threshold():
+    task = make_task(body={"data": {"id": "1", "type": "fast_start.order"}})
+
+    with override_settings(ASYNC_REQUEST_COMPRESSION="gzip", ASYNC_REQUEST_COMPRESSION_THRESHOLD=1024 * 1024):
+        data = encode_task(task, "json")
+
+    assert not data.startswith(COMPRESSED_MAGIC)
+    assert decode_task(data) == task
+
+
+@pytest.mark.parametrize("corruption", ["block_type", "truncated"])
+def test_corrupt_compressed_message(corruption):
+    task = make_task(body={"data": [{"attributes": {"description": f"Order {i}"}} for i in range(500)]})
+    with override_settings(ASYNC_REQUEST_COMPRESSION="gzip", ASYNC_REQUEST_COMPRESSION_THRESHOLD=1024):
+        data = bytearray(encode_task(task, "json"))
+
+    if corruption == "block_type":
+        # an invalid deflate block raises zlib.error, which is not an OSError
+        deflate = len(COMPRESSED_MAGIC) + 1 + 10  # the frame header and the gzip header
+        data[deflate : deflate + 4] = b"\xff\xff\xff\xff"
+    else:
+        del data[len(data) // 2 :]
+
+    with pytest.raises(WireFormatError):
+        decode_task(bytes(data))
+
+
+@pytest.mark.parametrize("message", ["garbage", "msgpack_unavailable"])
+def test_undecodable_message_fails_task(message, monkeypatch):
+    from bazis.contrib.async_request.tasks import handle_message
+
+    task = KafkaTask[AsyncRequestPayload](
+        task_id=f"undecodable-message-test-{message}",
+        channel_name="channel",
+        payload=make_task().payload,
+    )
+    if message == "garbage":
+        body = b"not a background request"
+    else:
+        # a consumer without msgpack gets a msgpack message
+        monkeypatch.setattr(codec, "msgpack", None)
+        body = WIRE_MAGIC + bytes((WIRE_VERSION,)) + b"\x80"
+
+    async def scenario():
+        await handle_message(DEFAULT_LANE, body, encode_headers(task), int(time.time() * 1000))
+        return await get_task_data_async(task.task_id)
+
+    task_data = asyncio.run(scenario())
+    assert task_data["status"] == "failed"
+    assert task_data["response"]["error"]
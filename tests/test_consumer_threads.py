@@ -0,0 +1,50 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Threads of a consumer: sized by ASYNC_REQUEST_CONSUMER_THREADS, with their saturation.
+"""
+
+import asyncio
+import threading
+
+from django.test import override_settings
+
+from bazis.contrib.async_request.threads import (
+    configure_consumer_threads,
+    get_thread_limiter,
+    thread_usage,
+)
+
+
+@override_settings(ASYNC_REQUEST_CONSUMER_THREADS=2)
+def test_thread_limiter():
+    async def scenario():
+        # reading the usage does not size the threads
+        default_total = thread_usage()["total"]
+        assert default_total != 2
+
+        configure_consumer_threads()
+        limiter = get_thread_limiter()
+        assert limiter.total_tokens == 2
+        thread = await asyncio.to_thread(threading.current_thread)
+        assert thread.name.startswith("async_request")
+        configure_consumer_threads()
+        assert get_thread_limiter() is limiter
+
+        async with limiter:
+            usage = thread_usage()
+        assert usage == {"total": 2, "borrowed": 1, "waiting": 0, "saturation": 0.5}
+
+    asyncio.run(scenario())
@@ -0,0 +1,136 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Deadlines: a task past X-Async-Deadline or the TTL of its route is expired, not executed.
+"""
+
+import asyncio
+import json
+import time
+
+from django.test import override_settings
+
+import pytest
+from bazis_test_utils.utils import get_api_client
+
+from bazis.contrib.async_background.schemas import KafkaTask
+from bazis.contrib.async_background.utils import get_task_data_async, task_key
+from bazis.contrib.async_request.codec import (
+    HEADER_DEADLINE,
+    HEADER_TASK_ID,
+    encode_headers,
+    encode_task,
+)
+from bazis.contrib.async_request.lanes import DEFAULT_LANE
+from bazis.contrib.async_request.scheduling import parse_deadline
+from bazis.contrib.async_request.schemas import AsyncRequestPayload
+
+
+def test_parse_deadline():
+    now = time.time()
+    assert parse_deadline({}, None) is None
+    assert parse_deadline({"x-async-deadline": str(now + 60)}, None) == pytest.approx(now + 60)
+    # the earlier of the header and the TTL of the route
+    assert parse_deadline({"x-async-deadline": str(now + 60)}, 10) == pytest.approx(now + 10, abs=1)
+    # the TTL counts from the time a delayed request is due
+    assert parse_deadline({}, 10, not_before=now + 100) == pytest.approx(now + 110)
+
+    with pytest.raises(ValueError):
+        parse_deadline({"x-async-deadline": str(now - 1)}, None)
+    with pytest.raises(ValueError):
+        parse_deadline({"x-async-deadline": str(now + 60)}, None, not_before=now + 120)
+    with pytest.raises(ValueError):
+        parse_deadline({"x-async-deadline": "eventually"}, None)
+
+
+def make_task(task_id: str, deadline: float) -> KafkaTask[AsyncRequestPayload]:
+    payload = AsyncRequestPayload(
+        path="/api/v1/some-echo-endpoint/",
+        query_string="",
+        headers=[],
+        request_client=None,
+        method="POST",
+        type="http",
+        http_version="1.1",
+        scheme="http",
+        deadline=deadline,
+    )
+    return KafkaTask[AsyncRequestPayload](task_id=task_id, channel_name="c1", payload=payload)
+
+
+def test_deadline_in_kafka_headers():
+    task = make_task("t1", 1700000000.5)
+
+    headers = encode_headers(task)
+    assert headers[HEADER_TASK_ID] == "t1"
+    assert float(headers[HEADER_DEADLINE]) == 1700000000.5
+
+
+@pytest.mark.django_db(transaction=True)
+def test_passed_deadline(create_test_data, sample_app):
+    _, manager, _, _, _ = create_test_data
+
+    response = get_api_client(sample_app, manager.jwt_build()).post(
+        "/api/v1/some-echo-endpoint/",
+        content=b"1",
+        headers={"X-Async-Background": "true", "X-Async-Deadline": str(time.time() - 10)},
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("by_headers", [True, False])
+def test_expired_message(by_headers):
+    from bazis.contrib.async_request.tasks import handle_message
+
+    task = make_task(f"expired-message-test-{by_headers}", time.time() - 1)
+    # without the headers the deadline is found in the decoded task, e.g. after its slot wait
+    headers = encode_headers(task) if by_headers else {}
+
+    async def scenario():
+        await handle_message(DEFAULT_LANE, encode_task(task), headers, int(time.time() * 1000))
+        return (await get_task_data_async(task.task_id))["status"]
+
+    assert asyncio.run(scenario()) == "expired"
+
+
+@pytest.mark.run_with_consumer
+@pytest.mark.django_db(transaction=True)
+@override_settings(ASYNC_REQUEST_PARTITION_KEY="user")
+def test_expired_task(create_test_data, sample_app, process_async_response):
+    from bazis.contrib.ws.models_abstract import redis
+
+    _, manager, _, _, _ = create_test_data
+    client = get_api_client(sample_app, manager.jwt_build())
+
+    # the consumer is busy with the slow request while the deadline of the next one passes:
+    # the requests of the user share a partition, so one consumer takes them in order
+    slow = client.get("/api/v1/some-slow-endpoint/?delay=3", headers={"X-Async-Background": "true"})
+    assert slow.status_code == 202
+    response = client.post(
+        "/api/v1/some-echo-endpoint/",
+        content=b"{}",
+        headers={"X-Async-Background": "true", "X-Async-Deadline": str(time.time() + 1)},
+    )
+    assert response.status_code == 202
+    task_id = response.json()["meta"]["async_request_id"]
+
+    process_async_response(slow.json()["meta"]["async_request_id"])
+    for _ in range(10):
+        data = redis.get(task_key(task_id))
+        if data and json.loads(data)["status"] == "expired":
+            break
+        time.sleep(0.5)
+    else:
+        pytest.fail(f"Task {task_id} was not expired")
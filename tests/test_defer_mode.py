@@ -0,0 +1,82 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+`X-Async-Background: defer`: inline up to the budget, then detached to the background.
+"""
+
+import json
+
+from django.test import override_settings
+
+from starlette.testclient import TestClient
+
+import pytest
+from bazis_test_utils.utils import get_api_client
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(ASYNC_REQUEST_DEFER_BUDGET_MS=2000)
+def test_defer_within_budget(create_test_data, sample_app):
+    _, manager, _, _, _ = create_test_data
+
+    response = get_api_client(sample_app, manager.jwt_build()).get(
+        "/api/v1/some-slow-endpoint/?delay=0", headers={"X-Async-Background": "defer"}
+    )
+    assert response.status_code == 200
+    assert response.json() == {"delay": 0}
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(ASYNC_REQUEST_DEFER_BUDGET_MS=100)
+def test_defer_over_budget(create_test_data, sample_app, process_async_response):
+    _, manager, _, _, _ = create_test_data
+    headers = {"Authorization": f"Bearer {manager.jwt_build()}", "X-Async-Background": "defer"}
+
+    # the client keeps its event loop between the requests: the detached request goes on in it
+    with TestClient(sample_app) as client:
+        response = client.get("/api/v1/some-slow-endpoint/?delay=1", headers=headers)
+        assert response.status_code == 202
+        task_id = response.json()["meta"]["async_request_id"]
+
+        result_in_redis = process_async_response(task_id)
+    response_data = json.loads(result_in_redis.decode("utf-8"))["response"]
+    assert response_data["status"] == 200
+    assert response_data["response"] == {"delay": 1.0}
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(ASYNC_REQUEST_DEFER_BUDGET_MS=100)
+def test_cancel_deferred_task(create_test_data, sample_app):
+    _, manager, _, _, _ = create_test_data
+    headers = {"Authorization": f"Bearer {manager.jwt_build()}"}
+
+    with TestClient(sample_app) as client:
+        response = client.get(
+            "/api/v1/some-slow-endpoint/?delay=1",
+            headers={**headers, "X-Async-Background": "defer"},
+        )
+        assert response.status_code == 202
+        task_id = response.json()["meta"]["async_request_id"]
+        response = client.delete(f"/api/v1/async_background_response/{task_id}/", headers=headers)
+        assert response.status_code == 202
+
+        # the detached request runs to its end, but its response is dropped
+        response = client.get(f"/api/v1/async_request/events/{task_id}/", headers=headers)
+    statuses = [
+        json.loads(line.removeprefix("data: "))["status"]
+        for line in response.text.splitlines()
+        if line.startswith("data: ")
+    ]
+    assert statuses[-1] == "cancelled"
@@ -0,0 +1,97 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Header policy: only the allowed headers are copied into the background request, and the
+savings are reported through the headers_filtered signal.
+"""
+
+from django.test import override_settings
+
+from starlette.requests import Request
+
+from bazis.contrib.async_request.signals import headers_filtered
+from bazis.contrib.async_request.utils import build_request_payload
+
+
+HEADERS = [
+    (b"host", b"testserver"),
+    (b"authorization", b"Bearer token"),
+    (b"content-type", b"application/vnd.api+json"),
+    (b"accept-language", b"en"),
+    (b"cookie", b"sessionid=" + b"s" * 32),
+    (b"user-agent", b"Mozilla/5.0"),
+    (b"x-async-background", b"true"),
+]
+
+
+def make_request() -> Request:
+    request = Request(
+        {
+            "type": "http",
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": "/api/v1/fast_start/order/",
+            "query_string": b"",
+            "headers": HEADERS,
+            "client": ("127.0.0.1", 5000),
+        }
+    )
+    request._body = b""
+    return request
+
+
+def test_default_allowlist():
+    reported = []
+
+    def on_headers_filtered(sender, **kwargs):
+        reported.append(kwargs)
+
+    headers_filtered.connect(on_headers_filtered)
+    try:
+        payload = build_request_payload(make_request())
+    finally:
+        headers_filtered.disconnect(on_headers_filtered)
+
+    assert [name for name, _ in payload.headers] == [
+        "host",
+        "authorization",
+        "content-type",
+        "accept-language",
+        "x-async-background-internal",
+    ]
+    dropped = HEADERS[4:]
+    assert reported == [
+        {
+            "signal": headers_filtered,
+            "kept_bytes": sum(len(k) + len(v) for k, v in HEADERS[:4]),
+            "dropped_bytes": sum(len(k) + len(v) for k, v in dropped),
+            "dropped_count": len(dropped),
+        }
+    ]
+
+
+@override_settings(ASYNC_REQUEST_HEADERS_ALLOW=None, ASYNC_REQUEST_HEADERS_DENY=["cookie"])
+def test_denylist_only():
+    payload = build_request_payload(make_request())
+
+    assert [name for name, _ in payload.headers] == [
+        "host",
+        "authorization",
+        "content-type",
+        "accept-language",
+        "user-agent",
+        "x-async-background-internal",
+    ]
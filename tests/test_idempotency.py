@@ -0,0 +1,69 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Idempotency-Key: a retried background request gets the task of the original request.
+"""
+
+import json
+
+import pytest
+from bazis_test_utils.utils import get_api_client
+
+
+@pytest.mark.run_with_consumer
+@pytest.mark.django_db(transaction=True)
+def test_idempotency_key_reuses_task(create_test_data, sample_app, process_async_response):
+    _, manager, _, _, _ = create_test_data
+    client = get_api_client(sample_app, manager.jwt_build())
+
+    def post(key: str):
+        return client.post(
+            "/api/v1/some-echo-endpoint/",
+            content=b"payload",
+            headers={
+                "X-Async-Background": "true",
+                "Content-Type": "text/plain",
+                "Idempotency-Key": key,
+            },
+        )
+
+    response = post("order-1-submit")
+    assert response.status_code == 202
+    task_id = response.json()["meta"]["async_request_id"]
+    assert "Idempotent-Replayed" not in response.headers
+
+    retry = post("order-1-submit")
+    assert retry.status_code == 202
+    assert retry.json()["meta"]["async_request_id"] == task_id
+    assert retry.headers["Idempotent-Replayed"] == "true"
+
+    other = post("order-2-submit")
+    assert other.status_code == 202
+    assert other.json()["meta"]["async_request_id"] != task_id
+
+    result_in_redis = process_async_response(task_id)
+    assert json.loads(result_in_redis.decode("utf-8"))["response"]["status"] == 200
+
+
+@pytest.mark.django_db(transaction=True)
+def test_idempotency_key_too_long(create_test_data, sample_app):
+    _, manager, _, _, _ = create_test_data
+
+    response = get_api_client(sample_app, manager.jwt_build()).post(
+        "/api/v1/some-echo-endpoint/",
+        content=b"payload",
+        headers={"X-Async-Background": "true", "Idempotency-Key": "k" * 256},
+    )
+    assert response.status_code == 400
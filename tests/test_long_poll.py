@@ -0,0 +1,95 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+`?wait=` of the results route: the request is held until the task finishes.
+"""
+
+import asyncio
+import time
+
+import pytest
+from bazis_test_utils.utils import get_api_client
+
+
+@pytest.mark.run_with_consumer
+@pytest.mark.django_db(transaction=True)
+def test_wait_for_result(create_test_data, sample_app):
+    _, manager, _, _, _ = create_test_data
+    client = get_api_client(sample_app, manager.jwt_build())
+
+    response = client.get(
+        "/api/v1/some-async-endpoint/?some_str=wait", headers={"X-Async-Background": "true"}
+    )
+    assert response.status_code == 202
+    task_id = response.json()["meta"]["async_request_id"]
+
+    response = client.get(f"/api/v1/async_background_response/{task_id}/?wait=30")
+    assert response.status_code == 200
+    assert response.json()["status"] == 200
+    assert response.json()["response"][0]["some_str"] == "wait"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_wait_times_out(create_test_data, sample_app):
+    from bazis.contrib.async_background.schemas import TaskStatus
+    from bazis.contrib.async_background.utils import set_and_publish_status
+
+    _, manager, _, _, _ = create_test_data
+    client = get_api_client(sample_app, manager.jwt_build())
+    task_id = "long-poll-timeout-test"
+    set_and_publish_status(task_id, manager.user_channel, TaskStatus.PROCESSING)
+
+    started = time.monotonic()
+    response = client.get(f"/api/v1/async_background_response/{task_id}/?wait=1")
+    assert 1 <= time.monotonic() - started < 10
+    assert response.status_code == 200
+    assert response.json() == {"status": "not ready"}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_wait_for_other_channel(create_test_data, sample_app):
+    from bazis.contrib.async_background.schemas import TaskStatus
+    from bazis.contrib.async_background.utils import set_and_publish_status
+
+    _, manager, buyer_1, _, _ = create_test_data
+    client = get_api_client(sample_app, buyer_1.jwt_build())
+    task_id = "long-poll-other-channel-test"
+    set_and_publish_status(task_id, manager.user_channel, TaskStatus.PROCESSING)
+
+    # the task of another client is not waited for
+    started = time.monotonic()
+    response = client.get(f"/api/v1/async_background_response/{task_id}/?wait=10")
+    assert time.monotonic() - started < 5
+    assert response.status_code == 403
+
+
+def test_wait_for_task_of_other_channel():
+    from bazis.contrib.async_background.schemas import TaskStatus
+    from bazis.contrib.async_background.utils import set_and_publish_status
+    from bazis.contrib.async_request.notifications import wait_for_task
+
+    task_id = "long-poll-task-of-other-channel-test"
+    set_and_publish_status(task_id, "long-poll-owner", TaskStatus.PROCESSING)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await wait_for_task(task_id, 10, "long-poll-other")
+        assert loop.time() - started < 1
+        with pytest.raises(TimeoutError):
+            async with asyncio.timeout(0.5):
+                await wait_for_task(task_id, 10, "long-poll-owner")
+
+    asyncio.run(scenario())
@@ -23,6 +23,8 @@ from its partition queue in chronological order.
 On the other hand, this performs a general check of the mechanism itself in conditions as close to reality as possible,
 that is, that starting several consumers in several processes and their parallel processing of tasks from the Kafka
 topic is performed successfully without causing any errors.
+The test consumers run with ASYNC_REQUEST_CONSUMER_SLOTS=4 (docker-compose.test.yml): the patches
+of different orders run in parallel, those of one order still one after another.
 """
 
 import json
@@ -32,6 +34,7 @@ import pytest
 from bazis_test_utils.utils import get_api_client
 from fast_start.models import Order, OrderStatus
 
+from bazis.contrib.async_background.utils import task_key
 from bazis.contrib.ws.models_abstract import redis
 
 
@@ -78,7 +81,7 @@ def test_manager_patch_order_async(create_test_data, sample_app):
     for _ in range(180):
         processed = 0
         for order_i in range(0, 15):
-            if redis_data := redis.get(tasks[order_i]):
+            if redis_data := redis.get(task_key(tasks[order_i])):
                 data_dict = json.loads(redis_data.decode("utf-8"))
                 if data_dict["status"] == "completed":
                     processed += 1
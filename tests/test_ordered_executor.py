@@ -0,0 +1,183 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Ordered executor: the requests of a key keep their order, the others run in parallel, and an
+offset is committed only once the earlier messages of its partition are done (also in batches).
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from aiokafka import TopicPartition
+
+from bazis.contrib.async_request.executor import OffsetTracker, OrderedExecutor
+
+
+TP = TopicPartition("test_async_bg", 0)
+
+
+class FakeConsumer:
+    def __init__(self) -> None:
+        self.commits: list[dict] = []
+
+    async def commit(self, offsets: dict) -> None:
+        self.commits.append(dict(offsets))
+
+
+def make_record(offset: int, key: bytes | None):
+    return SimpleNamespace(topic=TP.topic, partition=TP.partition, offset=offset, key=key)
+
+
+def test_offset_tracker():
+    tracker = OffsetTracker()
+    for offset in (5, 6, 7):
+        tracker.add(TP, offset)
+    # 5 is still in flight: nothing after it may be committed
+    assert tracker.done(TP, 6) == 5
+    assert tracker.done(TP, 5) == 7
+    assert tracker.done(TP, 7) == 8
+
+
+def test_ordered_execution():
+    async def scenario():
+        consumer = FakeConsumer()
+        executor = OrderedExecutor(buffer=10)
+        started: list[int] = []
+        finished: list[int] = []
+        release_first = asyncio.Event()
+
+        def job(offset: int):
+            async def run():
+                started.append(offset)
+                if offset == 0:
+                    await release_first.wait()
+                finished.append(offset)
+
+            return run
+
+        keys = [b"a", b"a", b"b", None]
+        for offset, key in enumerate(keys):
+            await executor.submit(make_record(offset, key), consumer, job(offset))
+        await asyncio.sleep(0.01)
+
+        # "a" waits for its first request, "b" and the keyless request do not
+        assert sorted(started) == [0, 2, 3]
+        assert sorted(finished) == [2, 3]
+        # the first request holds the commit of the partition back: the position is
+        # committed once, not again with every request that finishes
+        assert consumer.commits == [{TP: 0}]
+
+        release_first.set()
+        await asyncio.gather(*executor.tasks)
+        if executor.committer:
+            await executor.committer
+
+        assert finished.index(0) < finished.index(1)
+        # every commit advances the partition
+        positions = [commit[TP] for commit in consumer.commits]
+        assert positions == sorted(set(positions))
+        assert positions[-1] == 4
+        assert not executor.chains
+
+    asyncio.run(scenario())
+
+
+def test_buffer_holds_back():
+    async def scenario():
+        consumer = FakeConsumer()
+        executor = OrderedExecutor(buffer=1)
+        gate = asyncio.Event()
+
+        async def blocked():
+            await gate.wait()
+
+        async def instant():
+            pass
+
+        await executor.submit(make_record(0, b"a"), consumer, blocked)
+        second = asyncio.create_task(executor.submit(make_record(1, b"b"), consumer, instant))
+        await asyncio.sleep(0.01)
+        # the buffer is full: the subscriber is held back
+        assert not second.done()
+
+        gate.set()
+        await asyncio.wait_for(second, 1)
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_job_not_committed():
+    async def scenario():
+        consumer = FakeConsumer()
+        executor = OrderedExecutor(buffer=3)
+        gate = asyncio.Event()
+
+        async def blocked():
+            await gate.wait()
+
+        async def instant():
+            pass
+
+        await executor.submit(make_record(0, b"a"), consumer, blocked)
+        await executor.submit(make_record(1, b"a"), consumer, instant)
+        await executor.submit(make_record(2, b"b"), consumer, instant)
+        await asyncio.sleep(0.01)
+
+        # e.g. a shutdown: the chain of "a" is cancelled in its first job
+        for task in list(executor.tasks):
+            task.cancel()
+        await asyncio.gather(*executor.tasks, return_exceptions=True)
+        if executor.committer is not None:
+            await executor.committer
+
+        # offsets 0 and 1 never finished: the partition is not committed past them
+        assert all(commit[TP] == 0 for commit in consumer.commits)
+        assert not executor.chains
+        # the buffer is free again: the redelivered messages are taken
+        for offset in range(3):
+            await asyncio.wait_for(
+                executor.submit(make_record(offset, b"a"), consumer, instant), 1
+            )
+
+    asyncio.run(scenario())
+
+
+def test_batch_commit():
+    from bazis.contrib.async_request.executor import get_ordered_executor
+    from bazis.contrib.async_request.tasks import consume_batch
+
+    async def scenario():
+        consumer = FakeConsumer()
+        records = tuple(
+            SimpleNamespace(
+                topic=TP.topic,
+                partition=TP.partition,
+                offset=offset,
+                key=None,
+                value=b"not a request",
+                headers=[],
+                timestamp=0,
+            )
+            for offset in range(3)
+        )
+        await consume_batch("default", SimpleNamespace(raw_message=records, consumer=consumer))
+
+        executor = get_ordered_executor("default")
+        await asyncio.gather(*executor.tasks)
+        await executor.committer
+        # the messages that are not requests are skipped and committed with the batch
+        assert consumer.commits[-1] == {TP: 3}
+
+    asyncio.run(scenario())
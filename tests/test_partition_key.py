@@ -0,0 +1,150 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Partition keys of background requests by the spec of the route.
+"""
+
+import asyncio
+import json
+
+from django.test import override_settings
+
+from fastapi import Request
+
+import pytest
+
+from bazis.contrib.async_request.partition import resolve_partition_marker, resolve_pointer
+from bazis.contrib.async_request.policy import AsyncPolicy
+from bazis.contrib.async_request.schemas import AsyncRequestPayload
+from bazis.contrib.async_request.utils import (
+    BODY_PREFIX_SCOPE_KEY,
+    get_partition_marker,
+    resolve_raw_pointer,
+)
+
+
+PATH = "/api/v1/shop/{shop_id}/order/{order_id}/submit/"
+
+
+def make_request(path: str = "/api/v1/shop/7/order/42/submit/") -> Request:
+    return Request({"type": "http", "method": "POST", "path": path, "headers": []})
+
+
+def make_payload(body, raw_body: bytes | None = None) -> AsyncRequestPayload:
+    return AsyncRequestPayload(
+        path="/api/v1/shop/7/order/42/submit/",
+        query_string="",
+        headers=[],
+        request_client=None,
+        method="POST",
+        type="http",
+        http_version="1.1",
+        scheme="http",
+        raw_body=raw_body if raw_body is not None else json.dumps(body).encode(),
+    )
+
+
+def resolve(spec, body=None, request=None, payload=None) -> str | None:
+    return asyncio.run(
+        resolve_partition_marker(
+            spec,
+            request or make_request(),
+            payload or make_payload(body or {}),
+            "user-channel",
+            PATH,
+        )
+    )
+
+
+def test_partition_key_specs():
+    body = {"data": {"id": 5, "attributes": {"lines": [{"sku": "a-1"}], "a/b": "x"}}}
+
+    assert resolve("object", body) == "5"
+    assert resolve("path:order_id") == "42"
+    assert resolve("path:missing") is None
+    assert resolve("path:order_id", request=make_request("/api/v1/other/")) is None
+    assert resolve("body:/data/attributes/lines/0/sku", body) == "a-1"
+    assert resolve("body:/data/attributes/a~1b", body) == "x"
+    assert resolve("body:/data/attributes", body) is None  # an object is not a key
+    assert resolve("user") == "user-channel"
+    assert resolve("none", body) is None
+
+
+@pytest.mark.parametrize(
+    "raw_body, marker",
+    [
+        (b'{"meta": {"id": 1}, "data" : {"type": "x", "id" : "a\\"b", "attributes": {}}}', 'a"b'),
+        (b'{"data": {"attributes": {"id": 3}, "id": 7}}', 7),
+        (b'{"data": {"id": "5", "attributes": {"lines": [}}', "5"),  # parsed up to the id
+        (b'{"data": [{"id": 1}]}', None),
+        (b'{"data": {"type": "x"}}', None),
+        (b'{"data": {"id": ', None),
+        (b"[1]", None),
+        (b"\xff", None),
+    ],
+)
+def test_object_partition_marker(raw_body, marker):
+    assert get_partition_marker(make_payload(None, raw_body)) == marker
+
+
+def test_resolve_raw_pointer():
+    raw = b'{"data": {"attributes": {"lines": [{"sku": "a-1"}, {"sku": "b-2"}], "a/b": [1]}}}'
+
+    assert resolve_raw_pointer(raw, "/data/attributes/lines/1/sku") == "b-2"
+    assert resolve_raw_pointer(raw, "/data/attributes/a~1b/0") == 1
+    assert resolve_raw_pointer(raw, "/data/attributes/lines/2") is None
+    assert resolve_raw_pointer(raw, "/data/attributes/lines/sku") is None
+    assert resolve_raw_pointer(raw[:30], "/data/attributes/lines/0/sku") is None
+
+
+def test_claim_checked_partition_key():
+    # the body was moved to the blob store after its first chunks
+    request = make_request()
+    request.scope[BODY_PREFIX_SCOPE_KEY] = (
+        b'{"data": {"id": 5, "attributes": {"order": "\xc3',
+        b'\xa9", "shop": "1',
+    )
+    payload = make_payload(None, b"")
+    payload.raw_body, payload.body_ref = None, "blob"
+
+    assert resolve("object", request=request, payload=payload) == "5"
+    assert resolve("body:/data/attributes/order", request=request, payload=payload) == "\u00e9"
+    assert resolve("body:/data/attributes/shop", request=request, payload=payload) is None
+    assert resolve("object", payload=payload) is None
+
+
+def test_partition_key_callable():
+    async def by_tenant(request, payload):
+        return f"tenant-{request.scope['path'].split('/')[4]}"
+
+    assert resolve(lambda request, payload: None) is None
+    assert resolve(by_tenant) == "tenant-7"
+
+
+@override_settings(ASYNC_REQUEST_PARTITION_KEY="user")
+def test_default_partition_key():
+    assert resolve(None, {"data": {"id": 5}}) == "user-channel"
+
+
+def test_resolve_pointer():
+    assert resolve_pointer({"a": [1, 2]}, "/a/1") == 2
+    assert resolve_pointer({"a": [1, 2]}, "/a/5") is None
+    assert resolve_pointer(None, "/a") is None
+
+
+@pytest.mark.parametrize("spec", ["path:", "body:data", "object_id"])
+def test_invalid_partition_key(spec):
+    with pytest.raises(ValueError):
+        AsyncPolicy(partition_key=spec)
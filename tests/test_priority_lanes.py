@@ -0,0 +1,90 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Priority lanes: the topic of a request and the weighted sharing of the consumer slots.
+"""
+
+import asyncio
+
+from django.test import override_settings
+
+import pytest
+from bazis_test_utils.utils import get_api_client
+
+from bazis.contrib.async_request.lanes import LaneScheduler, get_lane_topic, get_lane_topics
+
+
+LANES = {"high": "test_async_high", "low": "test_async_low"}
+
+
+@override_settings(ASYNC_REQUEST_PRIORITY_LANES=LANES, KAFKA_TOPIC_ASYNC_BG="test_async_bg")
+def test_lane_topics():
+    assert get_lane_topic("high") == "test_async_high"
+    assert get_lane_topic("default") == "test_async_bg"
+    assert get_lane_topic("unknown") is None
+    assert get_lane_topics()["low"] == ["test_async_low"]
+
+
+def test_scheduler_weights():
+    async def run() -> list[str]:
+        scheduler = LaneScheduler(1, {"high": 3, "low": 1})
+        order = []
+
+        async def work(lane: str) -> None:
+            async with scheduler.slot(lane):
+                order.append(lane)
+                await asyncio.sleep(0)
+
+        async with scheduler.slot("low"):
+            tasks = [asyncio.create_task(work("low")) for _ in range(4)]
+            tasks += [asyncio.create_task(work("high")) for _ in range(4)]
+            await asyncio.sleep(0.01)
+        await asyncio.gather(*tasks)
+        assert scheduler.free == 1
+        return order
+
+    # the low lane waited first, yet the high one gets three slots per round
+    assert asyncio.run(run()) == ["high", "high", "high", "low", "high", "low", "low", "low"]
+
+
+def test_scheduler_cancelled_waiter():
+    async def run() -> None:
+        scheduler = LaneScheduler(1, {"default": 1})
+        async with scheduler.slot("default"):
+            waiter = asyncio.create_task(scheduler.slot("default").__aenter__())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.sleep(0)
+        # the slot of the cancelled waiter is free again
+        assert scheduler.free == 1
+
+    asyncio.run(run())
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(ASYNC_REQUEST_PRIORITY_LANES=LANES)
+def test_unknown_priority(create_test_data, sample_app):
+    _, manager, _, _, _ = create_test_data
+
+    response = get_api_client(sample_app, manager.jwt_build()).post(
+        "/api/v1/some-echo-endpoint/",
+        content=b"1",
+        headers={
+            "X-Async-Background": "true",
+            "X-Async-Priority": "urgent",
+            "Content-Type": "text/plain",
+        },
+    )
+    assert response.status_code == 400
@@ -0,0 +1,82 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+CPU-bound routes: their background requests are executed in the process pool of the consumer.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+
+from django.test import override_settings
+
+import pytest
+from bazis_test_utils.utils import get_api_client
+
+from bazis.contrib.async_request import processes
+from bazis.contrib.async_request.policy import PolicyTable
+
+
+def test_cpu_bound_policy(sample_app):
+    table = PolicyTable.from_app(sample_app)
+    assert table.has_cpu_bound
+    assert table.match("GET", "/api/v1/some-cpu-endpoint/").cpu_bound
+    assert not table.match("GET", "/api/v1/some-slow-endpoint/").cpu_bound
+
+
+@override_settings(ASYNC_REQUEST_PROCESS_POOL_SIZE=1)
+def test_pool_started_on_assignment(sample_app):
+    from bazis.contrib.async_request.tasks import ConsumerStartup
+
+    asyncio.run(ConsumerStartup().on_partitions_assigned(set()))
+    try:
+        # the worker is spawned when the consumer joins its group, ahead of the requests
+        assert processes._pool is not None
+        assert processes._pool.submit(os.getpid).result(timeout=60) != os.getpid()
+    finally:
+        processes.stop_process_pool()
+    assert processes._pool is None
+
+
+@pytest.mark.run_with_consumer
+@pytest.mark.django_db(transaction=True)
+@override_settings(ASYNC_REQUEST_PARTITION_KEY="user")
+def test_cpu_bound_request(create_test_data, sample_app, process_async_response):
+    _, manager, _, _, _ = create_test_data
+    client = get_api_client(sample_app, manager.jwt_build())
+
+    # the requests of a user go to one partition, so to one consumer
+    response = client.get("/api/v1/some-pid-endpoint/", headers={"X-Async-Background": "true"})
+    assert response.status_code == 202
+    result = json.loads(process_async_response(response.json()["meta"]["async_request_id"]))
+    consumer_pid = result["response"]["response"]["pid"]
+
+    response = client.get(
+        "/api/v1/some-cpu-endpoint/?rounds=1000", headers={"X-Async-Background": "true"}
+    )
+    assert response.status_code == 202
+    task_id = response.json()["meta"]["async_request_id"]
+
+    digest = b""
+    for _ in range(1000):
+        digest = hashlib.sha256(digest).digest()
+    result = json.loads(process_async_response(task_id))
+    assert result["response"]["status"] == 200
+    response_data = result["response"]["response"]
+    assert response_data["rounds"] == 1000
+    assert response_data["digest"] == digest.hex()
+    # the work left the process of the consumer and its event loop
+    assert response_data["pid"] != consumer_pid
@@ -0,0 +1,212 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Micro-batched publication of the background requests.
+"""
+
+import asyncio
+import json
+
+from django.test import override_settings
+
+import pytest
+from bazis_test_utils.utils import get_api_client
+
+from bazis.contrib.async_background.utils import get_redis_async, get_task_data_async
+from bazis.contrib.async_request import producer
+from bazis.contrib.async_request.admission import admit_channel_task, channel_tasks_key
+from bazis.contrib.async_request.producer import BatchPublisher, enqueue_request_async
+from bazis.contrib.async_request.schemas import AsyncRequestPayload
+from bazis.contrib.async_request.utils import reserve_task_id
+
+
+class RecordingPublisher(BatchPublisher):
+    """Records the batches instead of publishing them to Kafka."""
+
+    def __init__(self, gate: asyncio.Event | None = None, fail: bytes | None = None) -> None:
+        super().__init__(self.publish_message)
+        self.batches: list[list[bytes]] = []
+        self.gate = gate
+        self.fail = fail
+
+    async def publish_message(self, topic_name, data, partition_marker=None, headers=None):
+        if self.gate is not None:
+            await self.gate.wait()
+        if data == self.fail:
+            raise ConnectionError("the broker is down")
+
+    async def _publish(self, batch):
+        self.batches.append([data for _, data, *_ in batch])
+        await super()._publish(batch)
+
+
+@override_settings(ASYNC_REQUEST_PRODUCER_BATCH_SIZE=3, ASYNC_REQUEST_PRODUCER_LINGER_MS=200)
+def test_batches_split_by_size():
+    async def scenario():
+        publisher = RecordingPublisher()
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        futures = await asyncio.gather(*(publisher.submit("t", b"%d" % i) for i in range(7)))
+
+        # the full batches are published at once, without the linger
+        await asyncio.gather(*futures[:6])
+        assert loop.time() - started < 0.1
+        await futures[6]
+        assert publisher.batches == [[b"0", b"1", b"2"], [b"3", b"4", b"5"], [b"6"]]
+
+    asyncio.run(scenario())
+
+
+@override_settings(ASYNC_REQUEST_PRODUCER_BATCH_SIZE=100, ASYNC_REQUEST_PRODUCER_LINGER_MS=50)
+def test_batches_split_by_linger():
+    async def scenario():
+        publisher = RecordingPublisher()
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        first = await asyncio.gather(publisher.submit("t", b"0"), publisher.submit("t", b"1"))
+        await asyncio.gather(*first)
+        # a batch that does not fill up waits for the linger
+        assert loop.time() - started >= 0.04
+        await (await publisher.submit("t", b"2"))
+        assert publisher.batches == [[b"0", b"1"], [b"2"]]
+
+    asyncio.run(scenario())
+
+
+@override_settings(ASYNC_REQUEST_PRODUCER_BATCH_SIZE=1, ASYNC_REQUEST_PRODUCER_LINGER_MS=0)
+def test_batches_do_not_wait_for_previous_ack():
+    async def scenario():
+        gate = asyncio.Event()
+        publisher = RecordingPublisher(gate=gate)
+        futures = [await publisher.submit("t", b"%d" % i) for i in range(3)]
+        await asyncio.sleep(0.01)
+        # every batch is dispatched while Kafka has acknowledged none
+        assert publisher.batches == [[b"0"], [b"1"], [b"2"]]
+        assert not any(future.done() for future in futures)
+
+        gate.set()
+        await asyncio.gather(*futures)
+
+    asyncio.run(scenario())
+
+
+@override_settings(
+    ASYNC_REQUEST_PRODUCER_QUEUE_SIZE=2,
+    ASYNC_REQUEST_PRODUCER_BATCH_SIZE=1,
+    ASYNC_REQUEST_PRODUCER_LINGER_MS=0,
+)
+def test_full_queue_holds_back():
+    async def scenario():
+        gate = asyncio.Event()
+        publisher = RecordingPublisher(gate=gate)
+        futures = [await publisher.submit("t", b"0"), await publisher.submit("t", b"1")]
+        await asyncio.sleep(0.01)  # both messages are published and wait for Kafka
+        third = asyncio.create_task(publisher.submit("t", b"2"))
+        await asyncio.sleep(0.01)
+        assert not third.done()
+
+        gate.set()
+        futures.append(await asyncio.wait_for(third, 1))
+        await asyncio.gather(*futures)
+        assert publisher.batches == [[b"0"], [b"1"], [b"2"]]
+
+    asyncio.run(scenario())
+
+
+@override_settings(ASYNC_REQUEST_PRODUCER_BATCH_SIZE=3, ASYNC_REQUEST_PRODUCER_LINGER_MS=5)
+def test_failed_message_fails_its_future():
+    async def scenario():
+        publisher = RecordingPublisher(fail=b"1")
+        futures = await asyncio.gather(*(publisher.submit("t", b"%d" % i) for i in range(3)))
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        assert results[0] is None and results[2] is None
+        assert isinstance(results[1], ConnectionError)
+
+    asyncio.run(scenario())
+
+
+@override_settings(
+    ASYNC_REQUEST_PRODUCER_BATCHING=True,
+    ASYNC_REQUEST_PRODUCER_ACK=False,
+    ASYNC_REQUEST_PRODUCER_LINGER_MS=0,
+    ASYNC_REQUEST_CHANNEL_QUOTA=5,
+)
+def test_detached_failure_releases_reservations():
+    task_id = "detached-failure-test"
+    channel_name = "detached-failure-channel"
+    reserved_keys = ["async_request:test:idempotency", "async_request:test:inflight"]
+    payload = AsyncRequestPayload(
+        path="/api/v1/some-echo-endpoint/",
+        query_string="",
+        headers=[],
+        request_client=None,
+        method="POST",
+        type="http",
+        http_version="1.1",
+        scheme="http",
+    )
+
+    async def fail(*args, **kwargs):
+        raise ConnectionError("the broker is down")
+
+    async def scenario():
+        for redis_key in reserved_keys:
+            assert await reserve_task_id(redis_key, task_id, 60) is None
+        assert await admit_channel_task(channel_name, task_id)
+        loop = asyncio.get_running_loop()
+        producer._publishers_by_loop[loop] = BatchPublisher(fail)
+
+        await enqueue_request_async(
+            topic_name="t",
+            channel_name=channel_name,
+            payload=payload,
+            task_id=task_id,
+            reserved_keys=reserved_keys,
+        )
+        await asyncio.gather(*producer._status_tasks)
+
+        assert (await get_task_data_async(task_id))["status"] == "failed"
+        client = get_redis_async()
+        assert not await client.exists(*reserved_keys)
+        assert await client.zscore(channel_tasks_key(channel_name), task_id) is None
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.run_with_consumer
+@pytest.mark.django_db(transaction=True)
+@override_settings(
+    ASYNC_REQUEST_RAW_BODY=True,
+    ASYNC_REQUEST_PRODUCER_BATCHING=True,
+    ASYNC_REQUEST_PRODUCER_LINGER_MS=5,
+)
+def test_batched_requests_complete(create_test_data, sample_app, process_async_response):
+    _, manager, _, _, _ = create_test_data
+    client = get_api_client(sample_app, manager.jwt_build())
+
+    task_ids = []
+    for index in range(3):
+        response = client.post(
+            "/api/v1/some-echo-endpoint/",
+            content=f"body {index}".encode(),
+            headers={"X-Async-Background": "true", "Content-Type": "text/plain"},
+        )
+        assert response.status_code == 202
+        task_ids.append(response.json()["meta"]["async_request_id"])
+
+    for index, task_id in enumerate(task_ids):
+        result_in_redis = process_async_response(task_id)
+        response_data = json.loads(result_in_redis.decode("utf-8"))["response"]
+        assert response_data["response"]["size"] == len(f"body {index}")
@@ -0,0 +1,84 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Raw body mode (ASYNC_REQUEST_RAW_BODY): a body of any content type reaches the endpoint in the
+background verbatim, also in a compressed message.
+"""
+
+import hashlib
+import json
+
+from django.test import override_settings
+
+import pytest
+from bazis_test_utils.utils import get_api_client
+
+
+@pytest.mark.run_with_consumer
+@pytest.mark.django_db(transaction=True)
+@override_settings(ASYNC_REQUEST_RAW_BODY=True)
+@pytest.mark.parametrize(
+    "content_type, body",
+    [
+        ("application/x-www-form-urlencoded", b"description=Order+1&amount=1000"),
+        ("text/csv", b"id;description\n1;Order 1\n2;Order 2\n"),
+        ("application/json", b"42"),
+        ("application/octet-stream", bytes(range(256))),
+    ],
+)
+def test_raw_body_passthrough(create_test_data, sample_app, process_async_response, content_type, body):
+    _, manager, _, _, _ = create_test_data
+
+    response = get_api_client(sample_app, manager.jwt_build()).post(
+        "/api/v1/some-echo-endpoint/",
+        content=body,
+        headers={"X-Async-Background": "true", "Content-Type": content_type},
+    )
+    assert response.status_code == 202
+    task_id = response.json()["meta"]["async_request_id"]
+
+    result_in_redis = process_async_response(task_id)
+    response_data = json.loads(result_in_redis.decode("utf-8"))["response"]
+    assert response_data["status"] == 200
+    assert response_data["response"] == {
+        "size": len(body),
+        "sha256": hashlib.sha256(body).hexdigest(),
+        "content_type": content_type,
+    }
+
+
+@pytest.mark.run_with_consumer
+@pytest.mark.django_db(transaction=True)
+@override_settings(
+    ASYNC_REQUEST_RAW_BODY=True,
+    ASYNC_REQUEST_COMPRESSION="gzip",
+    ASYNC_REQUEST_COMPRESSION_THRESHOLD=1024,
+)
+def test_compressed_raw_body(create_test_data, sample_app, process_async_response):
+    _, manager, _, _, _ = create_test_data
+    # a body above the threshold: the consumer decompresses the message
+    body = b"id;description\n" + b"".join(b"%d;Order %d\n" % (i, i) for i in range(2000))
+
+    response = get_api_client(sample_app, manager.jwt_build()).post(
+        "/api/v1/some-echo-endpoint/",
+        content=body,
+        headers={"X-Async-Background": "true", "Content-Type": "text/csv"},
+    )
+    assert response.status_code == 202
+    task_id = response.json()["meta"]["async_request_id"]
+
+    result_in_redis = process_async_response(task_id)
+    response_data = json.loads(result_in_redis.decode("utf-8"))["response"]
+    assert response_data["response"]["sha256"] == hashlib.sha256(body).hexdigest()
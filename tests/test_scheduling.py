@@ -0,0 +1,138 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Delayed execution: X-Async-Not-Before and X-Async-Delay.
+"""
+
+import asyncio
+import json
+import time
+
+from django.test import override_settings
+
+from starlette.testclient import TestClient
+
+import pytest
+from bazis_test_utils.utils import get_api_client
+
+from bazis.contrib.async_background.utils import get_redis_async, get_task_data_async
+from bazis.contrib.async_request import producer
+from bazis.contrib.async_request.scheduling import (
+    SCHEDULED_KEY,
+    SCHEDULED_MESSAGES_KEY,
+    get_scheduled_releaser,
+    parse_not_before,
+    schedule_encoded,
+)
+
+
+def test_parse_not_before():
+    assert parse_not_before({}) is None
+    # a time in the past is due at once
+    assert parse_not_before({"x-async-not-before": "2020-01-01T00:00:00+00:00"}) is None
+    assert parse_not_before({"x-async-delay": "0"}) is None
+
+    due = parse_not_before({"x-async-delay": "60"})
+    assert 59 < due - time.time() <= 60
+    due = parse_not_before({"x-async-not-before": str(int(time.time()) + 3600)})
+    assert 3598 < due - time.time() <= 3600
+
+
+@pytest.mark.parametrize(
+    "headers",
+    [
+        {"x-async-delay": "soon"},
+        {"x-async-delay": "nan"},
+        {"x-async-delay": "7200"},
+        {"x-async-not-before": "2030-01-01T00:00:00"},  # no offset
+        {"x-async-not-before": "tomorrow"},
+    ],
+)
+def test_parse_not_before_invalid(headers):
+    with override_settings(ASYNC_REQUEST_MAX_DELAY_SEC=3600), pytest.raises(ValueError):
+        parse_not_before(headers)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_invalid_delay(create_test_data, sample_app):
+    _, manager, _, _, _ = create_test_data
+
+    response = get_api_client(sample_app, manager.jwt_build()).post(
+        "/api/v1/some-echo-endpoint/",
+        content=b"1",
+        headers={"X-Async-Background": "true", "X-Async-Delay": "later"},
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.run_with_consumer
+@pytest.mark.django_db(transaction=True)
+@override_settings(ASYNC_REQUEST_RAW_BODY=True, ASYNC_REQUEST_SCHEDULER_POLL_SEC=1)
+def test_delayed_request(create_test_data, sample_app, process_async_response):
+    _, manager, _, _, _ = create_test_data
+    headers = {
+        "Authorization": f"Bearer {manager.jwt_build()}",
+        "X-Async-Background": "true",
+        "X-Async-Delay": "2",
+        "Content-Type": "text/plain",
+    }
+
+    # the releaser runs in the event loop of the client
+    with TestClient(sample_app) as client:
+        started = time.time()
+        response = client.post("/api/v1/some-echo-endpoint/", content=b"later", headers=headers)
+        assert response.status_code == 202
+        task_id = response.json()["meta"]["async_request_id"]
+
+        result_in_redis = process_async_response(task_id)
+    assert time.time() - started >= 2
+    assert json.loads(result_in_redis.decode("utf-8"))["response"]["response"]["size"] == 5
+
+
+@pytest.mark.parametrize("published", [True, False])
+def test_release_sets_pending_first(monkeypatch, published):
+    task_id = f"release-status-test-{published}"
+    statuses = []
+
+    async def publish_encoded(topic_name, data, partition_marker=None, headers=None):
+        # a consumer may store the result before the publication returns
+        statuses.append((await get_task_data_async(task_id))["status"])
+        if not published:
+            raise ConnectionError("the broker is down")
+
+    monkeypatch.setattr(producer, "publish_encoded", publish_encoded)
+
+    async def scenario():
+        await schedule_encoded(
+            task_id=task_id,
+            channel_name="release-status-channel",
+            topic_name="t",
+            data=b"{}",
+            partition_marker=None,
+            headers=None,
+            not_before=time.time() - 1,
+        )
+        releaser = get_scheduled_releaser()
+        await releaser.stop()
+        await releaser.release_due(100)
+        async with get_redis_async().pipeline(transaction=True) as pipe:
+            pipe.zrem(SCHEDULED_KEY, task_id)
+            pipe.hdel(SCHEDULED_MESSAGES_KEY, task_id)
+            await pipe.execute()
+        return (await get_task_data_async(task_id))["status"]
+
+    # a failed publication is released again once its lease expires
+    assert asyncio.run(scenario()) == ("pending" if published else "created")
+    assert statuses == ["pending"]
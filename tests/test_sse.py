@@ -0,0 +1,77 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Server-sent events of the task statuses.
+"""
+
+import json
+
+import pytest
+from bazis_test_utils.utils import get_api_client
+
+from bazis.contrib.async_background.schemas import TaskStatus
+from bazis.contrib.async_background.utils import set_and_publish_status
+
+
+def parse_events(text: str) -> list[dict]:
+    return [
+        json.loads(line.removeprefix("data: "))
+        for line in text.splitlines()
+        if line.startswith("data: ")
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_task_events_of_finished_task(create_test_data, sample_app):
+    _, manager, _, _, _ = create_test_data
+    task_id = "sse-finished-task-test"
+    set_and_publish_status(task_id, manager.user_channel, TaskStatus.COMPLETED, {"status": 200})
+
+    response = get_api_client(sample_app, manager.jwt_build()).get(
+        f"/api/v1/async_request/events/{task_id}/"
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert parse_events(response.text) == [
+        {"status": "completed", "task_id": task_id, "action": "async_bg"}
+    ]
+
+
+@pytest.mark.run_with_consumer
+@pytest.mark.django_db(transaction=True)
+def test_task_events_until_completed(create_test_data, sample_app):
+    _, manager, _, _, _ = create_test_data
+    client = get_api_client(sample_app, manager.jwt_build())
+
+    response = client.get(
+        "/api/v1/some-async-endpoint/?some_str=sse", headers={"X-Async-Background": "true"}
+    )
+    task_id = response.json()["meta"]["async_request_id"]
+
+    response = client.get(f"/api/v1/async_request/events/{task_id}/")
+    statuses = [event["status"] for event in parse_events(response.text)]
+    assert statuses[-1] == "completed"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_task_events_of_other_channel(create_test_data, sample_app):
+    _, manager, buyer_1, _, _ = create_test_data
+    task_id = "sse-other-channel-test"
+    set_and_publish_status(task_id, buyer_1.user_channel, TaskStatus.PROCESSING)
+
+    response = get_api_client(sample_app, manager.jwt_build()).get(
+        f"/api/v1/async_request/events/{task_id}/"
+    )
+    assert response.status_code == 403
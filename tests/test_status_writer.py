@@ -0,0 +1,69 @@
+# Copyright 2026 EcoFuture Technology Services LLC and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Pipelined status writes: the statuses of concurrent tasks reach Redis in shared round trips.
+"""
+
+import asyncio
+import json
+
+from redis.asyncio.client import Pipeline
+
+from bazis.contrib.async_background.schemas import TaskStatus
+from bazis.contrib.async_background.utils import task_key
+from bazis.contrib.async_request.schemas import AsyncRequestStatus
+from bazis.contrib.async_request.statuses import get_status_writer, write_status
+
+
+def test_concurrent_status_writes(monkeypatch):
+    from bazis.contrib.ws.models_abstract import redis
+
+    task_ids = [f"status-writer-test-{index}" for index in range(5)]
+    round_trips = []
+    execute = Pipeline.execute
+
+    async def counted_execute(self, *args, **kwargs):
+        round_trips.append(len(self.command_stack))
+        return await execute(self, *args, **kwargs)
+
+    monkeypatch.setattr(Pipeline, "execute", counted_execute)
+
+    async def scenario():
+        await asyncio.gather(
+            *(
+                write_status(task_id, "status-writer-channel", TaskStatus.COMPLETED, {"index": index})
+                for index, task_id in enumerate(task_ids)
+            )
+        )
+        # the five statuses (SET and PUBLISH each) share one round trip
+        assert round_trips == [10]
+        # the statuses of one task keep their order
+        await asyncio.gather(
+            write_status(task_ids[0], "status-writer-channel", TaskStatus.PROCESSING),
+            write_status(task_ids[0], "status-writer-channel", AsyncRequestStatus.CANCELLED),
+        )
+        assert not get_status_writer().pending
+        assert round_trips == [10, 4]
+
+    asyncio.run(scenario())
+
+    for index, task_id in enumerate(task_ids[1:], start=1):
+        data = json.loads(redis.get(task_key(task_id)))
+        assert data == {
+            "status": "completed",
+            "channel_name": "status-writer-channel",
+            "response": {"index": index},
+        }
+    assert json.loads(redis.get(task_key(task_ids[0])))["status"] == "cancelled"